@@ -4,12 +4,16 @@ import json
 import os
 import time
 import html
-from pathlib import Path
 
 import streamlit as st
 from dotenv import load_dotenv
 from streamlit_chat import message
 
+from chat_context import build_contents, context_config
+from chat_index import open_indexed_chat_store
+from chat_schema import GEMINI, IN, OUT, TELEGRAM, gemini_pairs, new_chat, upgrade_chat
+from chat_schema import message as chat_message
+from chat_store import ChatVersionConflict, append_messages, ensure_seqs
 from redis_facil import RedisFacil
 from streamlit_autorefresh import st_autorefresh
 
@@ -29,8 +33,10 @@ st.set_page_config(
 )
 
 
-CHAT_DIR = Path("chats")
-CHAT_DIR.mkdir(exist_ok=True)
+# Same backend and sidebar index as the API (CHAT_STORE env var)
+chat_store = open_indexed_chat_store()
+# The API may write the same chat; a stale save is retried on a fresh copy this many times
+SAVE_ATTEMPTS = 3
 
 # Initialize Redis connection
 redis_facil = RedisFacil()
@@ -67,27 +73,36 @@ def run_redis_async(coro):
         print(f"Redis operation failed: {e}")
         raise
 
-def get_chat_file_path(chat_id: str) -> Path:
-    return CHAT_DIR / f"{chat_id}.json"
-
-
-def load_existing_chats() -> dict:
-    chats: dict[str, dict] = {}
-    if not CHAT_DIR.exists():
-        return chats
-    for file in CHAT_DIR.glob("*.json"):
-        try:
-            with file.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-            chat_id = file.stem
-            # Ensure required keys
-            data.setdefault("generated", [])
-            data.setdefault("past", [])
-            data.setdefault("messages", [])
-            chats[chat_id] = data
-        except Exception:
-            continue
-    return chats
+def load_existing_chats() -> list:
+    """Chat ids from the index, most recently active first; chats are loaded when selected"""
+    return [chat_id for chat_id, _ in chat_store.list_chats()]
+
+
+def get_session_chat(chat_id: str) -> dict:
+    sessions = st.session_state['chat_sessions']
+    if chat_id not in sessions:
+        data = chat_store.load(chat_id) or {}
+        # Ensure required keys and the current message schema
+        data.setdefault("metadata", {})
+        upgrade_chat(data)
+        ensure_seqs(data)
+        sessions[chat_id] = data
+        st.session_state['chat_stored'][chat_id] = len(data["messages"])
+    return sessions[chat_id]
+
+
+def rebase_chat(chat_id: str, data: dict) -> None:
+    """Another writer saved first: reload the chat in place and re-append what only this session has"""
+    stored = st.session_state['chat_stored'].get(chat_id, 0)
+    pending = data.get("messages", [])[stored:]
+    fresh = chat_store.load(chat_id) or new_chat(data.get("metadata", {}))
+    upgrade_chat(fresh)
+    ensure_seqs(fresh)
+    st.session_state['chat_stored'][chat_id] = len(fresh["messages"])
+    append_messages(fresh, *({k: v for k, v in m.items() if k != "seq"} for m in pending))
+    # In place, so references to the session chat held by the running script stay current
+    data.clear()
+    data.update(fresh)
 
 
 def save_chat(chat_id: str) -> None:
@@ -96,17 +111,27 @@ def save_chat(chat_id: str) -> None:
     data = st.session_state['chat_sessions'].get(chat_id)
     if not data:
         return
-    path = get_chat_file_path(chat_id)
     try:
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+        for _ in range(SAVE_ATTEMPTS):
+            try:
+                chat_store.save(chat_id, data, expected_version=data.get("version", 0))
+            except ChatVersionConflict:
+                rebase_chat(chat_id, data)
+                continue
+            st.session_state['chat_stored'][chat_id] = len(data["messages"])
+            return
+        st.error(f"Could not save chat {chat_id}: it kept changing while saving")
+    except Exception as e:
+        print(f"❌ Failed to save chat {chat_id}: {e}")
+        st.error(f"Failed to save chat {chat_id}: {e}")
 
 
 # Initialise session state variables
 if 'chat_sessions' not in st.session_state:
-    st.session_state['chat_sessions'] = load_existing_chats()
+    st.session_state['chat_sessions'] = {}
+# How many messages of each session chat the store already holds
+if 'chat_stored' not in st.session_state:
+    st.session_state['chat_stored'] = {}
 if 'current_chat_id' not in st.session_state:
     st.session_state['current_chat_id'] = ""
 
@@ -126,17 +151,12 @@ def ensure_current_chat() -> None:
         base = st.session_state.get('client_name') or "client"
         chat_id = f"{base}_start_{ts}"
         st.session_state['current_chat_id'] = chat_id
-        st.session_state['chat_sessions'][chat_id] = {
-            'metadata': {
-                'client_phone': st.session_state['client_phone'],
-                'client_name': st.session_state['client_name'],
-                'client_details': st.session_state['client_details'],
-                'start_timestamp': ts,
-            },
-            'generated': [],
-            'past': [],
-            'messages': [],
-        }
+        st.session_state['chat_sessions'][chat_id] = new_chat({
+            'client_phone': st.session_state['client_phone'],
+            'client_name': st.session_state['client_name'],
+            'client_details': st.session_state['client_details'],
+            'start_timestamp': ts,
+        })
         save_chat(chat_id)
 
 
@@ -158,7 +178,7 @@ if not st.session_state['client_name']:
 ensure_current_chat()
 
 # Alias current chat session for easier access
-current_chat = st.session_state['chat_sessions'][st.session_state['current_chat_id']]
+current_chat = get_session_chat(st.session_state['current_chat_id'])
 
 # Telegram chat state (left pane)
 if 'tg_messages' not in st.session_state:
@@ -208,14 +228,7 @@ def check_new_messages(max_retries: int = 3) -> bool:
                         "timestamp": ts_msg,
                     })
                     # Also log to persistent chat history
-                    current_chat['messages'].append({
-                        "source": "telegram_client",
-                        "direction": "incoming",
-                        "text": text,
-                        "sender": sender_name,
-                        "message_id": msg_id,
-                        "timestamp": ts_msg,
-                    })
+                    append_messages(current_chat, chat_message(TELEGRAM, IN, text, sender=sender_name, message_id=msg_id, ts=ts_msg))
                 save_chat(st.session_state['current_chat_id'])
                 return True
             return False
@@ -234,9 +247,9 @@ check_new_messages()
 # Sidebar - chat session management for chats stored on disk
 st.sidebar.title("Chat Controls")
 st.sidebar.subheader("Chat Sessions")
-chat_names = list(st.session_state['chat_sessions'].keys())
-if not chat_names:
-    chat_names = [st.session_state['current_chat_id']]
+chat_names = load_existing_chats()
+if st.session_state['current_chat_id'] not in chat_names:
+    chat_names.insert(0, st.session_state['current_chat_id'])
 selected_chat_name = st.sidebar.selectbox(
     "Select a chat:",
     chat_names,
@@ -246,7 +259,7 @@ selected_chat_name = st.sidebar.selectbox(
 
 if selected_chat_name != st.session_state['current_chat_id']:
     st.session_state['current_chat_id'] = selected_chat_name
-    current_chat = st.session_state['chat_sessions'][selected_chat_name]
+    current_chat = get_session_chat(selected_chat_name)
 
 # Start New Chat: reset client info so the 3-field setup form appears again
 if st.sidebar.button("Start New Chat", key="create_chat_btn_unique"):
@@ -259,34 +272,13 @@ if st.sidebar.button("Start New Chat", key="create_chat_btn_unique"):
 
 # generate a response using Gemini (right pane)
 def generate_response(prompt):
-    # Add user message to current chat session
-    current_chat['messages'].append({"role": "user", "parts": [prompt]})
-
-    # Initialize Gemini model
-    
-    # gemini_model = genai.GenerativeModel(model)
-
-    # Prepare messages for Gemini API
-    formatted_messages = []
-    for msg in current_chat['messages']:
-        if msg["role"] == "system":
-            formatted_messages.append({"role": "user", "parts": [msg["content"]]})
-        elif msg["role"] == "user":
-            formatted_messages.append({"role": "user", "parts": [msg["content"]] if "content" in msg else msg["parts"]})
-        elif msg["role"] == "assistant":
-            formatted_messages.append({"role": "model", "parts": [msg["content"]] if "content" in msg else msg["parts"]})
-
-    # Generate content using Gemini
-    response_obj = client.models.generate_content(model="gemini-2.5-flash", contents=formatted_messages)
-    response = response_obj.text
-
-    # Add assistant response to current chat session
-    current_chat['messages'].append({"role": "model", "parts": [response]})
-
-    # Persist updated chat
-    save_chat(st.session_state['current_chat_id'])
-
-    return response
+    # Recent turns verbatim plus the rolling summary the API keeps for long chats
+    response_obj = client.models.generate_content(
+        model="gemini-2.5-flash",
+        contents=build_contents(current_chat, prompt),
+        config=context_config(current_chat),
+    )
+    return response_obj.text
 
 
 # Main content area split into two columns
@@ -355,12 +347,7 @@ with left_col:
                     "text": tg_input,
                 })
                 # Log to current chat messages for persistence
-                current_chat['messages'].append({
-                    "source": "telegram_ui",
-                    "direction": "outgoing",
-                    "text": tg_input,
-                    "timestamp": time.time(),
-                })
+                append_messages(current_chat, chat_message(TELEGRAM, OUT, tg_input))
                 save_chat(st.session_state['current_chat_id'])
                 st.rerun()
             except Exception as e:
@@ -384,10 +371,11 @@ with right_col:
             "<div style='height: 60vh; overflow-y: auto; padding:0.5rem 0.75rem 0.5rem 0; "
             "border: 1px solid #333; border-radius: 0.5rem;'>"
         ]
-        if current_chat['generated']:
-            for i in range(len(current_chat['generated'])):
-                user_txt = current_chat["past"][i]
-                bot_txt = current_chat["generated"][i]
+        past, generated = gemini_pairs(current_chat)
+        if generated:
+            for i in range(len(generated)):
+                user_txt = past[i]
+                bot_txt = generated[i]
                 safe_user = html.escape(user_txt)
                 safe_bot = html.escape(bot_txt)
                 # user bubble
@@ -422,20 +410,11 @@ with right_col:
 
         if submit_button and user_input:
             output = generate_response(user_input)
-            current_chat['past'].append(user_input)
-            current_chat['generated'].append(output)
-            # Log user + model messages in metadata log for JSON persistence
-            current_chat['messages'].append({
-                "source": "convosphere_ui",
-                "direction": "outgoing",
-                "text": user_input,
-                "timestamp": time.time(),
-            })
-            current_chat['messages'].append({
-                "source": "convosphere_model",
-                "direction": "incoming",
-                "text": output,
-                "timestamp": time.time(),
-            })
+            now_ts = time.time()
+            append_messages(
+                current_chat,
+                chat_message(GEMINI, OUT, user_input, ts=now_ts),
+                chat_message(GEMINI, IN, output, ts=now_ts),
+            )
             save_chat(st.session_state['current_chat_id'])
 
@@ -1,24 +1,35 @@
+import asyncio
 import json
 import os
 import time
-from pathlib import Path
-from typing import Any, Dict, List
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, TypeVar
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from google import genai
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
+from chat_cache import ChatCache, snapshot_chat
+from chat_context import ContextSummarizer, build_contents, context_config
+from chat_index import SORT_COLUMNS, open_indexed_chat_store
+from chat_schema import GEMINI, IN, OUT, TELEGRAM, message, new_chat, telegram_view
+from chat_locks import ChatLocks
+from chat_turns import ChatTurn, ChatTurnQueue, TurnQueueFull
+from chat_store import AsyncChatStore, ChatVersionConflict, append_messages, select_messages
 from redis_facil import RedisFacil
 
 
 load_dotenv()
 
-CHAT_DIR = Path("chats")
-CHAT_DIR.mkdir(exist_ok=True)
-
 REDIS_TOPIC = "telegram_chat"
+GEMINI_MODEL = "gemini-2.5-flash"
+# Reload-and-reapply rounds when another process saved the chat first
+SAVE_ATTEMPTS = 3
+
+T = TypeVar("T")
 
 api_key = os.getenv("GEMINI_API_KEY")
 if not api_key:
@@ -26,8 +37,30 @@ if not api_key:
 
 client = genai.Client(api_key=api_key)
 redis_facil = RedisFacil()
+# JSON files under chats/ by default (CHAT_STORE=sqlite|jsonl), plus the sidebar index.
+# Every storage call is awaited on the store's own threads, never run on the event loop.
+chat_store = AsyncChatStore(open_indexed_chat_store())
+# Hot chats are served from memory and written back after a short debounce.
+# Run a single worker per chat directory, or set CHAT_CACHE_SIZE=0 for several.
+chat_cache = ChatCache(
+    chat_store,
+    capacity=int(os.getenv("CHAT_CACHE_SIZE", "64")),
+    flush_delay=float(os.getenv("CHAT_FLUSH_DELAY", "0.5")),
+)
+chat_locks = ChatLocks()
+# Folds turns older than the verbatim window into each chat's rolling summary
+summarizer = ContextSummarizer(client, GEMINI_MODEL)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    await turn_queue.close()
+    await summarizer.close()
+    await chat_cache.close()
+
 
-app = FastAPI(title="ConvoSphere API")
+app = FastAPI(title="ConvoSphere API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -35,29 +68,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
 
-def get_chat_file_path(chat_id: str) -> Path:
-    return CHAT_DIR / f"{chat_id}.json"
-
-
-def load_chat(chat_id: str) -> Dict[str, Any]:
-    path = get_chat_file_path(chat_id)
-    if not path.exists():
+async def load_chat(chat_id: str) -> Dict[str, Any]:
+    data = await chat_cache.get(chat_id)
+    if data is None:
         raise HTTPException(status_code=404, detail="Chat not found")
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-    data.setdefault("generated", [])
-    data.setdefault("past", [])
-    data.setdefault("messages", [])
     return data
 
 
-def save_chat(chat_id: str, data: Dict[str, Any]) -> None:
-    path = get_chat_file_path(chat_id)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+async def save_chat(chat_id: str, data: Dict[str, Any]) -> None:
+    """Persist a chat from load_chat(); with the cache off, ChatVersionConflict if it went stale"""
+    await chat_cache.put(chat_id, data)
+
+
+async def update_chat(chat_id: str, mutate: Callable[[Dict[str, Any]], T]) -> Tuple[Dict[str, Any], T]:
+    """Load, mutate and save a chat without losing concurrent writes.
+
+    Requests in this process take turns on the chat's lock. With the cache
+    off, a save that another worker process beat is retried on a fresh
+    copy, so `mutate` must only change the chat it is given. Slow work (Gemini, Redis) belongs
+    before this call, not inside it.
+    """
+    async with chat_locks.hold(chat_id):
+        for _ in range(SAVE_ATTEMPTS):
+            chat = await load_chat(chat_id)
+            result = mutate(chat)
+            try:
+                await save_chat(chat_id, chat)
+                return chat, result
+            except ChatVersionConflict:
+                continue
+    raise HTTPException(status_code=409, detail="Chat is being updated elsewhere, please retry")
 
 
 def create_chat_id(base: str) -> str:
@@ -66,50 +110,73 @@ def create_chat_id(base: str) -> str:
     return f"{base}_start_{ts}"
 
 
-def generate_gemini_response(chat: Dict[str, Any], prompt: str) -> str:
-    chat["messages"].append({"role": "user", "parts": [prompt]})
-
-    formatted_messages: List[Dict[str, Any]] = []
-    for msg in chat["messages"]:
-        role = msg.get("role")
-        if role == "system":
-            formatted_messages.append({"role": "user", "parts": [msg.get("content", "")]})
-        elif role == "user":
-            parts = msg.get("parts") or [msg.get("content", "")]
-            formatted_messages.append({"role": "user", "parts": parts})
-        elif role in ("assistant", "model"):
-            parts = msg.get("parts") or [msg.get("content", "")]
-            formatted_messages.append({"role": "model", "parts": parts})
+def format_gemini_contents(chat: Dict[str, Any], prompt: str) -> List[Dict[str, Any]]:
+    """Gemini `contents` for the next reply: the recent turns verbatim plus the new prompt.
 
-    response_obj = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=formatted_messages,
-    )
-    response_text = response_obj.text
+    Older turns reach the model through the rolling summary in context_config().
+    """
+    return build_contents(chat, prompt)
 
-    chat["messages"].append({"role": "model", "parts": [response_text]})
-    chat.setdefault("past", []).append(prompt)
-    chat.setdefault("generated", []).append(response_text)
 
+def record_gemini_turn(chat: Dict[str, Any], prompt: str, response_text: str) -> List[Dict[str, Any]]:
+    """Append a completed prompt/reply pair to the chat; returns the two records"""
     now_ts = time.time()
-    chat["messages"].append(
-        {
-            "source": "convosphere_ui",
-            "direction": "outgoing",
-            "text": prompt,
-            "timestamp": now_ts,
-        }
+    return append_messages(
+        chat,
+        message(GEMINI, OUT, prompt, ts=now_ts),
+        message(GEMINI, IN, response_text, ts=now_ts),
     )
-    chat["messages"].append(
-        {
-            "source": "convosphere_model",
-            "direction": "incoming",
-            "text": response_text,
-            "timestamp": now_ts,
-        }
+
+
+def generate_gemini_response(chat: Dict[str, Any], prompt: str) -> str:
+    """Blocking Gemini call for the next reply; the caller records the turn"""
+    response_obj = client.models.generate_content(
+        model=GEMINI_MODEL,
+        contents=format_gemini_contents(chat, prompt),
+        config=context_config(chat),
     )
+    return response_obj.text
+
+
+def stream_gemini_response(turn: ChatTurn, chat: Dict[str, Any], loop: asyncio.AbstractEventLoop) -> str:
+    """Blocking streamed Gemini call; emits each chunk as a `token` event and returns the whole reply"""
+    chunks: List[str] = []
+    for chunk in client.models.generate_content_stream(
+        model=GEMINI_MODEL,
+        contents=format_gemini_contents(chat, turn.prompt),
+        config=context_config(chat),
+    ):
+        text = chunk.text or ""
+        if text:
+            chunks.append(text)
+            loop.call_soon_threadsafe(turn.emit, "token", {"text": text})
+    return "".join(chunks)
+
+
+async def process_turn(turn: ChatTurn) -> Dict[str, Any]:
+    """Answer one queued prompt and record the turn (run by a turn_queue worker)"""
+    chat = snapshot_chat(await load_chat(turn.chat_id))
+    # The model call runs without the chat lock so Telegram traffic keeps flowing meanwhile
+    if turn.stream:
+        reply = await turn_queue.run_blocking(stream_gemini_response, turn, chat, asyncio.get_running_loop())
+    else:
+        reply = await turn_queue.run_blocking(generate_gemini_response, chat, turn.prompt)
+    # Recorded on the latest copy so messages appended by other requests meanwhile survive
+    latest, appended = await update_chat(turn.chat_id, lambda c: record_gemini_turn(c, turn.prompt, reply))
+    summarizer.maybe_refresh(turn.chat_id, latest, update_chat)
+    return {"reply": reply, "messages": appended, "last_seq": appended[-1]["seq"]}
+
+
+# Gemini turns wait in a bounded queue served by CHAT_TURN_WORKERS workers; a full queue answers 429
+turn_queue = ChatTurnQueue(
+    process_turn,
+    workers=int(os.getenv("CHAT_TURN_WORKERS", "4")),
+    max_queued=int(os.getenv("CHAT_TURN_QUEUE", "32")),
+)
+
 
-    return response_text
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
 class CreateChatRequest(BaseModel):
@@ -121,6 +188,10 @@ class CreateChatRequest(BaseModel):
 class ChatSummary(BaseModel):
     id: str
     metadata: Dict[str, Any]
+    created_at: Optional[float] = None
+    last_message_at: Optional[float] = None
+    message_count: int = 0
+    last_snippet: str = ""
 
 
 class SendTelegramRequest(BaseModel):
@@ -139,71 +210,91 @@ def health() -> Dict[str, str]:
 
 
 @app.get("/api/chats", response_model=List[ChatSummary])
-def list_chats() -> List[ChatSummary]:
-    summaries: List[ChatSummary] = []
-    if not CHAT_DIR.exists():
-        return summaries
-    for file in CHAT_DIR.glob("*.json"):
-        try:
-            with file.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-            meta = data.get("metadata", {})
-            summaries.append(ChatSummary(id=file.stem, metadata=meta))
-        except Exception:
-            continue
-    return summaries
+async def list_chats(
+    response: Response,
+    q: str = "",
+    sort: str = "recent",
+    order: str = "desc",
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+) -> List[ChatSummary]:
+    """Chat summaries from the index; `q` is a prefix of the client name, chat id or phone.
+
+    The total number of matches is returned in the X-Total-Count header.
+    """
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {sorted(SORT_COLUMNS)}")
+    total, entries = await chat_store.run(
+        chat_store.store.index.query, q, sort, order != "asc", limit, offset
+    )
+    response.headers["X-Total-Count"] = str(total)
+    return [ChatSummary(**entry) for entry in entries]
 
 
 @app.post("/api/chats")
-def create_chat(req: CreateChatRequest) -> Dict[str, Any]:
+async def create_chat(req: CreateChatRequest) -> Dict[str, Any]:
     chat_id = create_chat_id(req.client_name.strip() or "client")
     ts = time.strftime("%Y%m%d_%H%M%S")
-    chat = {
-        "metadata": {
+    chat = new_chat(
+        {
             "client_phone": req.client_phone.strip(),
             "client_name": req.client_name.strip() or "client",
             "client_details": req.client_details.strip(),
             "start_timestamp": ts,
-        },
-        "generated": [],
-        "past": [],
-        "messages": [],
-    }
-    save_chat(chat_id, chat)
+        }
+    )
+    try:
+        await chat_cache.create(chat_id, chat)
+    except ChatVersionConflict:
+        raise HTTPException(status_code=409, detail="A chat with this id already exists")
     return {"id": chat_id, "chat": chat}
 
 
 @app.get("/api/chats/{chat_id}")
-def get_chat(chat_id: str) -> Dict[str, Any]:
-    chat = load_chat(chat_id)
-    return {"id": chat_id, "chat": chat}
+async def get_chat(
+    chat_id: str,
+    after_seq: Optional[int] = Query(None, ge=0),
+    before_seq: Optional[int] = Query(None, ge=1),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+) -> Dict[str, Any]:
+    """The whole chat, or with any of after_seq/before_seq/limit just a window of its messages.
+
+    `?after_seq=N` returns what a client that has seen up to N is missing;
+    `?before_seq=N&limit=M` pages back through older history.
+    """
+    chat = await load_chat(chat_id)
+    last_seq = chat["messages"][-1]["seq"] if chat["messages"] else 0
+    if after_seq is None and before_seq is None and limit is None:
+        return {"id": chat_id, "chat": chat, "last_seq": last_seq}
+    messages, has_more = select_messages(chat["messages"], after_seq, before_seq, limit)
+    return {
+        "id": chat_id,
+        "metadata": chat["metadata"],
+        "messages": messages,
+        "has_more": has_more,
+        "last_seq": last_seq,
+    }
 
 
 @app.post("/api/telegram/send")
 async def send_telegram(req: SendTelegramRequest) -> Dict[str, Any]:
-    chat = load_chat(req.chat_id)
+    if not await chat_cache.exists(req.chat_id):  # 404 before anything reaches Telegram
+        raise HTTPException(status_code=404, detail="Chat not found")
     payload = {"text": req.text}
     ok = await redis_facil.write_outgoing_msg(REDIS_TOPIC, payload)
     if not ok:
         raise HTTPException(status_code=500, detail="Failed to write message to Redis")
 
-    chat["messages"].append(
-        {
-            "source": "telegram_ui",
-            "direction": "outgoing",
-            "text": req.text,
-            "timestamp": time.time(),
-        }
-    )
-    save_chat(req.chat_id, chat)
-    return {"success": True}
+    record = message(TELEGRAM, OUT, req.text)
+    _, appended = await update_chat(req.chat_id, lambda chat: append_messages(chat, dict(record)))
+    return {"success": True, "messages": appended, "last_seq": appended[-1]["seq"]}
 
 
 @app.get("/api/telegram/messages")
 async def poll_telegram(chat_id: str, batch_size: int = 20) -> Dict[str, Any]:
-    chat = load_chat(chat_id)
+    chat = await load_chat(chat_id)
     messages = await redis_facil.read_incoming_msgs(REDIS_TOPIC, batch_size=batch_size)
-    new_messages_for_client: List[Dict[str, Any]] = []
+    incoming: List[Dict[str, Any]] = []
     for payload in messages:
         text = payload.get("text", "") if isinstance(payload, dict) else str(payload)
         if not text:
@@ -215,35 +306,81 @@ async def poll_telegram(chat_id: str, batch_size: int = 20) -> Dict[str, Any]:
                 or payload.get("sender_username")
                 or sender_name
             )
-        ts_msg = time.time()
-        chat["messages"].append(
-            {
-                "source": "telegram_client",
-                "direction": "incoming",
-                "text": text,
-                "sender": sender_name,
-                "timestamp": ts_msg,
-            }
-        )
-        new_messages_for_client.append(
-            {
-                "sender": sender_name,
-                "text": text,
-                "timestamp": ts_msg,
-            }
-        )
-
-    if new_messages_for_client:
-        save_chat(chat_id, chat)
-    return {"messages": new_messages_for_client}
-
-
-@app.post("/api/gemini/send")
-def send_gemini(req: SendGeminiRequest) -> Dict[str, Any]:
-    chat = load_chat(req.chat_id)
-    reply = generate_gemini_response(chat, req.text)
-    save_chat(req.chat_id, chat)
-    return {"reply": reply, "chat": chat}
+        message_id = payload.get("message_id") if isinstance(payload, dict) else None
+        incoming.append(message(TELEGRAM, IN, text, sender=sender_name, message_id=message_id))
+
+    appended: List[Dict[str, Any]] = []
+    if incoming:
+        # Redis has already handed these over, so they are recorded even if the chat moved on meanwhile
+        chat, appended = await update_chat(chat_id, lambda c: append_messages(c, *(dict(m) for m in incoming)))
+    last_seq = chat["messages"][-1]["seq"] if chat["messages"] else 0
+    return {"messages": [telegram_view(m) for m in appended], "appended": appended, "last_seq": last_seq}
+
+
+def turn_queue_busy(e: TurnQueueFull) -> HTTPException:
+    return HTTPException(
+        status_code=503 if e.closed else 429,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+@app.post("/api/gemini/send", status_code=202)
+async def send_gemini(req: SendGeminiRequest) -> Dict[str, Any]:
+    """Queue a Gemini turn and return its id at once; follow it at /api/gemini/turns/{turn_id}"""
+    if not await chat_cache.exists(req.chat_id):
+        raise HTTPException(status_code=404, detail="Chat not found")
+    try:
+        turn = turn_queue.submit(req.chat_id, req.text)
+    except TurnQueueFull as e:
+        raise turn_queue_busy(e)
+    return {**turn.snapshot(), "position": turn_queue.position(turn)}
+
+
+@app.get("/api/gemini/turns/{turn_id}")
+async def get_gemini_turn(turn_id: str, wait: float = Query(0, ge=0, le=30)) -> Dict[str, Any]:
+    """A queued turn's status, and its reply once done; `wait` holds the request up to that many seconds for it"""
+    turn = turn_queue.get(turn_id)
+    if turn is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired turn")
+    if wait and not turn.finished.is_set():
+        try:
+            await asyncio.wait_for(turn.finished.wait(), timeout=wait)
+        except asyncio.TimeoutError:
+            pass
+    return {**turn.snapshot(), "position": turn_queue.position(turn)}
+
+
+@app.post("/api/gemini/stream")
+async def stream_gemini(req: SendGeminiRequest) -> StreamingResponse:
+    """Queue a Gemini turn and stream it as server-sent events.
+
+    Emits `queued` with the turn id and its place in line, `token` events as
+    chunks arrive, then a single `done` event with the full reply and the
+    appended messages once they have been persisted (or an `error` event).
+    A full queue is refused with 429 and Retry-After before the stream opens.
+    The turn is completed and recorded even if the client disconnects.
+    """
+    if not await chat_cache.exists(req.chat_id):
+        raise HTTPException(status_code=404, detail="Chat not found")
+    try:
+        turn = turn_queue.submit(req.chat_id, req.text, stream=True)
+    except TurnQueueFull as e:
+        raise turn_queue_busy(e)
+
+    async def event_stream():
+        yield sse_event("queued", {"turn_id": turn.id, "position": turn_queue.position(turn)})
+        while True:
+            event, data = await turn.events.get()
+            yield sse_event(event, data)
+            if event in ("done", "error"):
+                return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 if __name__ == "__main__":
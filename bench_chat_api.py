@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Event-loop responsiveness of the chat API under concurrent polling.
+
+Drives api.py in-process over httpx's ASGI transport with Redis stubbed
+out: N pollers hit /api/telegram/messages on a chat with a long history
+while a probe measures how late the event loop wakes from a short sleep.
+Chats are normally served from the API's write-back cache and storage
+calls run on AsyncChatStore's threads; --no-cache loads and saves on every
+request and --inline runs storage on the event loop, for comparison.
+
+    python bench_chat_api.py --pollers 50 --history 5000 --seconds 5
+    python bench_chat_api.py --store sqlite --no-cache --inline
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List
+
+PROBE_INTERVAL = 0.01
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "mean": statistics.mean(values) if values else 0.0,
+        "p50": _percentile(values, 50),
+        "p99": _percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+class StubRedis:
+    """Stands in for RedisFacil; a share of polls find one new Telegram message"""
+
+    def __init__(self, incoming_rate: float, seed: int) -> None:
+        self.incoming_rate = incoming_rate
+        self.rng = random.Random(seed)
+
+    async def write_outgoing_msg(self, topic: str, payload: Dict[str, Any]) -> bool:
+        return True
+
+    async def read_incoming_msgs(self, topic: str, batch_size: int = 10) -> List[Dict[str, Any]]:
+        if self.rng.random() < self.incoming_rate:
+            return [{"text": "new message from the client", "sender_name": "Bench"}]
+        return []
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    import api
+
+    api.redis_facil = StubRedis(args.incoming_rate, args.seed)
+    api.chat_store.offload = not args.inline
+
+    chat_id = "bench_start_20250101_000000"
+    history = [
+        {"source": "telegram_client", "direction": "incoming", "text": f"message {i} " + "x" * 200, "timestamp": i}
+        for i in range(args.history)
+    ]
+    chat = {"metadata": {"client_name": "bench"}, "generated": [], "past": [], "messages": history}
+    api.chat_store.store.save(chat_id, chat, expected_version=0)
+
+    latencies: List[float] = []
+    lags: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + args.seconds
+
+    async def probe() -> None:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL)
+            lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+    async def poller(client: "httpx.AsyncClient") -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            res = await client.get("/api/telegram/messages", params={"chat_id": chat_id})
+            latencies.append(time.perf_counter() - start)
+            if res.status_code != 200:
+                errors += 1
+            await asyncio.sleep(args.interval)
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(probe(), *(poller(client) for _ in range(args.pollers)))
+        wall = time.perf_counter() - started
+    await api.chat_cache.close()
+
+    return {
+        "store": args.store,
+        "offloaded": not args.inline,
+        "cached": api.chat_cache.capacity > 0,
+        "cache": dict(api.chat_cache.stats),
+        "pollers": args.pollers,
+        "history": args.history,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": len(latencies) / wall,
+        "latency_seconds": _summary(latencies),
+        "loop_lag_seconds": _summary(lags),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    mode = "storage threads" if report["offloaded"] else "inline on the event loop"
+    mode += ", cached" if report["cached"] else ", uncached"
+    print(f"🏁 {report['pollers']} pollers on a {report['history']}-message chat ({report['store']} store, {mode})")
+    print(f"   {report['requests']} polls ({report['requests_per_second']:.0f}/s), {report['errors']} errors")
+    lat, lag = report["latency_seconds"], report["loop_lag_seconds"]
+    print(f"   poll latency  p50 {lat['p50'] * 1000:7.1f} ms  p99 {lat['p99'] * 1000:7.1f} ms  max {lat['max'] * 1000:7.1f} ms")
+    cache = report["cache"]
+    print(f"   cache: {cache['hits']} hits, {cache['misses']} loads, {cache['saves']} saves in {cache['flushes']} flushes")
+    print(f"   loop lag      p50 {lag['p50'] * 1000:7.1f} ms  p99 {lag['p99'] * 1000:7.1f} ms  max {lag['max'] * 1000:7.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", choices=["json", "sqlite", "jsonl"], default="json")
+    parser.add_argument("--pollers", type=int, default=50, help="concurrent polling clients")
+    parser.add_argument("--history", type=int, default=5000, help="messages already in the chat")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.05, help="pause between polls of one client")
+    parser.add_argument("--incoming-rate", type=float, default=0.02, help="share of polls that append a message")
+    parser.add_argument("--inline", action="store_true", help="run storage calls on the event loop")
+    parser.add_argument("--no-cache", action="store_true", help="load and save every request (CHAT_CACHE_SIZE=0)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_chat_api_")
+    os.environ["CHAT_STORE"] = args.store
+    os.environ["CHAT_DIR"] = os.path.join(workdir, "chats")
+    os.environ["CHAT_DB_PATH"] = os.path.join(workdir, "chats.db")
+    os.environ["CHAT_JSONL_DIR"] = os.path.join(workdir, "jsonl")
+    os.environ["CHAT_INDEX_PATH"] = os.path.join(workdir, "chat_index.db")
+    os.environ["CHAT_CACHE_SIZE"] = "0" if args.no_cache else os.getenv("CHAT_CACHE_SIZE", "64")
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📁 Report saved to: {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark against the offline provider simulator.
+
+Runs N concurrent enrich_person calls with no network access and reports
+wall time, time per stage, the critical path through each stage and the
+number of calls per provider.
+
+    python bench_pipeline.py --runs 10 --time-scale 0.05
+    python bench_pipeline.py --runs 20 --error-rate 0.05 --rate-limit-rate 0.1 --json bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+from circuit_breaker import DEFAULT_BREAKERS
+from gemini_client import GeminiClient
+from orchestrator import PersonOSINTOrchestrator
+from provider_simulator import (
+    SimulatedGeminiAPI,
+    SimulatedToolWrappers,
+    SimulatorConfig,
+    current_run,
+    person_placeholders,
+)
+
+
+SAMPLE_PEOPLE = [
+    ("Priya Raman", "+14155550101", "staff engineer at Acme Robotics, twitter handle: @priyaraman"),
+    ("Daniel Okafor", "+442071234567", "head of data at Acme Robotics, speaks at PyData"),
+    ("Mei Lin Chen", "+6591234567", "founder, previously ML lead at Acme Robotics"),
+]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "mean": round(statistics.mean(values), 3) if values else 0.0,
+        "p50": round(_percentile(values, 50), 3),
+        "p95": round(_percentile(values, 95), 3),
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+async def _one_run(run_id: str, config: SimulatorConfig) -> Dict[str, Any]:
+    name, phone, context_info = SAMPLE_PEOPLE[int(run_id.split("-")[1]) % len(SAMPLE_PEOPLE)]
+    person = person_placeholders(name, phone, context_info)
+    orchestrator = PersonOSINTOrchestrator(
+        tools=SimulatedToolWrappers(config, person),
+        gemini=GeminiClient(client=SimulatedGeminiAPI(config, person)),
+    )
+    current_run.set(run_id)
+    started = time.perf_counter()
+    result = await orchestrator.enrich_person(phone, name, context_info)
+    return {"run_id": run_id, "started": started, "seconds": time.perf_counter() - started, "result": result}
+
+
+def _critical_path(run: Dict[str, Any], calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per stage: the slowest call inside it and how much time was orchestrator overhead"""
+    path = []
+    for timing in run["result"].get("timings", []):
+        lo = run["started"] + timing["offset"]
+        hi = lo + timing["seconds"]
+        inside = [c for c in calls if lo - 1e-3 <= c["start"] <= hi]
+        slowest = max(inside, key=lambda c: c["end"] - c["start"], default=None)
+        slowest_s = (slowest["end"] - slowest["start"]) if slowest else 0.0
+        path.append({
+            "stage": timing["stage"],
+            "seconds": timing["seconds"],
+            "critical_call": f"{slowest['provider']}.{slowest['method']}" if slowest and slowest["provider"] == "gemini"
+                             else (slowest["provider"] if slowest else None),
+            "critical_call_seconds": round(slowest_s, 4),
+            "overhead_seconds": round(max(0.0, timing["seconds"] - slowest_s), 4),
+        })
+    return path
+
+
+async def run_benchmark(runs: int, config: SimulatorConfig, quiet: bool = True) -> Dict[str, Any]:
+    # Breakers are process-wide; start each benchmark with every circuit closed
+    DEFAULT_BREAKERS.reset()
+    # Redirect once around all runs; per-run redirects would interleave and leak
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        wall_started = time.perf_counter()
+        results = await asyncio.gather(*[_one_run(f"run-{i}", config) for i in range(runs)])
+        wall = time.perf_counter() - wall_started
+
+    circuit_skips: Dict[str, int] = {}
+    for run in results:
+        for provider, count in run["result"].get("usage", {}).get("skipped_by_circuit", {}).items():
+            circuit_skips[provider] = circuit_skips.get(provider, 0) + count
+
+    stage_times: Dict[str, List[float]] = {}
+    critical_counts: Dict[str, Dict[str, int]] = {}
+    overhead: Dict[str, List[float]] = {}
+    errors = 0
+    for run in results:
+        if run["result"].get("error"):
+            errors += 1
+        calls = config.log.for_run(run["run_id"])
+        for step in _critical_path(run, calls):
+            stage_times.setdefault(step["stage"], []).append(step["seconds"])
+            overhead.setdefault(step["stage"], []).append(step["overhead_seconds"])
+            if step["critical_call"]:
+                counts = critical_counts.setdefault(step["stage"], {})
+                counts[step["critical_call"]] = counts.get(step["critical_call"], 0) + 1
+
+    calls_by_provider: Dict[str, Dict[str, int]] = {}
+    for call in config.log.calls:
+        key = f"{call['provider']}.{call['method']}" if call["provider"] == "gemini" else call["provider"]
+        stats = calls_by_provider.setdefault(key, {"calls": 0, "errors": 0, "rate_limited": 0})
+        stats["calls"] += 1
+        if call["status"] == 429:
+            stats["rate_limited"] += 1
+        elif call["status"] != 200:
+            stats["errors"] += 1
+
+    return {
+        "runs": runs,
+        "time_scale": config.time_scale,
+        "wall_seconds": round(wall, 3),
+        "run_seconds": _summary([r["seconds"] for r in results]),
+        "failed_runs": errors,
+        "stages": {
+            stage: {
+                **_summary(times),
+                "overhead_mean": round(statistics.mean(overhead[stage]), 4),
+                "critical_calls": critical_counts.get(stage, {}),
+            }
+            for stage, times in stage_times.items()
+        },
+        "calls": calls_by_provider,
+        "breakers": {
+            provider: {**snapshot, "skipped_by_orchestrator": circuit_skips.get(provider, 0)}
+            for provider, snapshot in DEFAULT_BREAKERS.snapshot().items()
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"🏁 {report['runs']} concurrent runs (time scale {report['time_scale']}) - wall {report['wall_seconds']:.2f}s")
+    rs = report["run_seconds"]
+    print(f"   per run: mean {rs['mean']:.2f}s  p50 {rs['p50']:.2f}s  p95 {rs['p95']:.2f}s  max {rs['max']:.2f}s  failed {report['failed_runs']}")
+    print("\n⏱️  Stages (critical path is sequential through these):")
+    print(f"   {'stage':<26}{'mean':>8}{'p95':>8}{'overhead':>10}  critical call")
+    for stage, s in report["stages"].items():
+        critical = max(s["critical_calls"].items(), key=lambda kv: kv[1])[0] if s["critical_calls"] else "-"
+        print(f"   {stage:<26}{s['mean']:>8.3f}{s['p95']:>8.3f}{s['overhead_mean']:>10.4f}  {critical}")
+    print("\n📞 Calls:")
+    for provider, c in sorted(report["calls"].items()):
+        print(f"   {provider:<36}{c['calls']:>6} calls  {c['errors']:>4} errors  {c['rate_limited']:>4} x 429")
+    print("\n⚡ Circuit breakers:")
+    for provider, b in sorted(report["breakers"].items()):
+        skipped = b["rejected"] + b["skipped_by_orchestrator"]
+        print(f"   {provider:<36}{b['state']:>10}  opened {b['times_opened']}x  {skipped:>4} calls skipped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="concurrent enrich_person runs")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="multiplier on simulated latencies")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 5xx per call")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="probability of a 429 per call")
+    parser.add_argument("--providers", nargs="*", help="limit failure rates to these providers (e.g. firecrawl gemini)")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="show orchestrator output")
+    args = parser.parse_args()
+
+    config = SimulatorConfig(time_scale=args.time_scale, seed=args.seed)
+    if args.error_rate or args.rate_limit_rate:
+        config.set_failure_rates(args.error_rate, args.rate_limit_rate, args.providers)
+
+    report = asyncio.run(run_benchmark(args.runs, config, quiet=not args.verbose))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📁 Report saved to: {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
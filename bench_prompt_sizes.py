@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Prompt-size regression benchmark for GeminiClient.
+
+Rebuilds every GeminiClient prompt from the recorded person_info fixtures in
+fixtures/prompt_bench/, measures characters and estimated tokens per method
+and compares them with the stored baseline. Exits non-zero when any prompt
+grows past the allowed threshold.
+
+    python bench_prompt_sizes.py                   # check against baseline
+    python bench_prompt_sizes.py --threshold 0.05  # allow at most +5%
+    python bench_prompt_sizes.py --update-baseline # accept current sizes
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+from typing import Any, Dict
+
+from gemini_client import GeminiClient
+from link_ranker import rank_search_links
+from page_content import CHARS_PER_TOKEN
+from phone_metadata import phone_metadata
+from relevance import TargetProfile
+
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "prompt_bench")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+SEARCH_KEY_PREFIXES = ("linkedin_search", "username_search", "company_search", "generic_search")
+# enrichment_data keys that only exist after the stage a prompt is built in
+LATE_KEYS = {
+    "filter_search_links": {"priority_links", "parsed_scraped_content"},
+    "parse_scraped_content": {"parsed_scraped_content"},
+}
+
+
+class _OfflineClient:
+    """Placeholder so GeminiClient can be built without an API key; never called"""
+
+
+def _size(prompt: str) -> Dict[str, int]:
+    return {"chars": len(prompt), "tokens": len(prompt) // CHARS_PER_TOKEN}
+
+
+async def measure_fixture(gemini: GeminiClient, person_info: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """Build each prompt the way the orchestrator would at that stage of the run"""
+    ground_truth = person_info["ground_truth"]
+    enrichment = person_info.get("enrichment_data", {})
+    tool_outputs = person_info.get("tool_outputs", {})
+    sizes: Dict[str, Dict[str, int]] = {}
+
+    country_info = phone_metadata(ground_truth["phone"]).get("data", {})
+    sizes["parse_initial_info"] = _size(gemini._parse_initial_prompt(
+        ground_truth["name"], ground_truth["phone"], ground_truth["context_info"], country_info
+    ))
+
+    step4_enrichment = {k: v for k, v in enrichment.items() if k not in LATE_KEYS["filter_search_links"]}
+    searches = {k: v for k, v in tool_outputs.items() if k.startswith(SEARCH_KEY_PREFIXES)}
+    ranking = rank_search_links(TargetProfile.from_person_info(ground_truth, step4_enrichment), searches)
+    shortlist = {"combined_searches": {"ranked_candidates": {
+        "success": True, "data": {"organic_results": ranking["shortlist"]}
+    }}}
+    sizes["filter_search_links"] = _size(gemini._filter_links_prompt(step4_enrichment, shortlist))
+
+    step65_enrichment = {k: v for k, v in enrichment.items() if k not in LATE_KEYS["parse_scraped_content"]}
+    step65_enrichment["parsed_scraped_content"] = {}
+    sizes["parse_scraped_content.preamble"] = _size(gemini._scrape_parsing_preamble(step65_enrichment, ground_truth))
+    page_sizes = [
+        _size(await gemini._scrape_page_prompt(output, step65_enrichment, ground_truth))
+        for key, output in tool_outputs.items()
+        if key.startswith("firecrawl") and output.get("success")
+    ]
+    if page_sizes:
+        sizes["parse_scraped_content.page_max"] = max(page_sizes, key=lambda s: s["chars"])
+
+    all_collected_data = {"tool_outputs": tool_outputs, "enrichment_data": enrichment}
+    sizes["verify_and_summarize"] = _size(gemini._summary_prompt(ground_truth, all_collected_data))
+    return sizes
+
+
+async def measure_all() -> Dict[str, Dict[str, Dict[str, int]]]:
+    gemini = GeminiClient(client=_OfflineClient())
+    results = {}
+    for path in sorted(glob.glob(os.path.join(BENCH_DIR, "person_info_*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            person_info = json.load(f)
+        results[os.path.basename(path)] = await measure_fixture(gemini, person_info)
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> int:
+    """Print a table of sizes vs baseline; return the number of regressions"""
+    regressions = 0
+    print(f"{'fixture / prompt':<68}{'chars':>9}{'~tokens':>9}{'baseline':>10}{'delta':>9}")
+    for fixture, methods in current.items():
+        for method, size in methods.items():
+            base = baseline.get(fixture, {}).get(method)
+            if base is None:
+                delta_txt, status = "new", "🆕"
+            else:
+                delta = (size["tokens"] - base["tokens"]) / max(base["tokens"], 1)
+                delta_txt = f"{delta:+.1%}"
+                status = "✅"
+                if delta > threshold:
+                    status = "❌"
+                    regressions += 1
+            base_tokens = base["tokens"] if base else "-"
+            print(f"{status} {fixture + ' / ' + method:<66}{size['chars']:>9}{size['tokens']:>9}{base_tokens:>10}{delta_txt:>9}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative token growth per prompt")
+    parser.add_argument("--update-baseline", action="store_true", help="write current sizes as the new baseline")
+    args = parser.parse_args()
+
+    current = asyncio.run(measure_all())
+    if not current:
+        print(f"❌ No fixtures found in {BENCH_DIR}")
+        sys.exit(1)
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        print(f"📁 Baseline updated: {BASELINE_PATH}")
+        return
+
+    baseline: Dict[str, Any] = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {regressions} prompt(s) grew more than {args.threshold:.0%} over baseline")
+        sys.exit(1)
+    print(f"\n✅ All prompts within {args.threshold:.0%} of baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Record/replay of every tool and Gemini call made during an enrich_person run.
+
+In record mode ToolWrappers and GeminiClient pass calls through and append
+each request, response and its timing to a cassette file. In replay mode
+they serve the recorded responses instead, either with the original
+latencies or instantly, so a slow production run can be reproduced locally
+and orchestrator overhead profiled separately from network time.
+
+    python cassette.py record run.json --name "Jane Doe" --phone +1555... --context "..."
+    python cassette.py replay run.json            # original timings
+    python cassette.py replay run.json --instant  # zero latency
+"""
+import argparse
+import asyncio
+import copy
+import hashlib
+import json
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+
+USAGE_FIELDS = ("prompt_token_count", "cached_content_token_count", "candidates_token_count", "thoughts_token_count")
+
+
+class CassetteMiss(Exception):
+    """Replay was asked for a call that the cassette never recorded"""
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+class Cassette:
+    """An ordered log of provider calls that can be written once and replayed"""
+
+    def __init__(self, path: str, mode: str = "record", instant: bool = False) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.instant = instant
+        self.meta: Dict[str, Any] = {}
+        self.entries: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+        self._used: set = set()
+        if mode == "replay":
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.meta = data.get("meta", {})
+            self.entries = data.get("entries", [])
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def record(self, kind: str, name: str, request: Any, response: Any, started: float, duration: float) -> None:
+        self.entries.append({
+            "kind": kind,
+            "name": name,
+            "request_digest": _digest(request),
+            "request": request,
+            # Snapshot now; callers go on to annotate the live response
+            "response": copy.deepcopy(response),
+            "offset": round(started - self._started, 4),
+            "duration": round(duration, 4),
+        })
+
+    async def replay(self, kind: str, name: str, request: Any) -> Any:
+        """Return the recorded response for this call, sleeping its original latency unless instant.
+
+        Calls are matched on their exact request first. Gemini prompts embed
+        the run timestamp, so they fall back to the next unused call of the
+        same kind and name in recording order.
+        """
+        digest = _digest(request)
+        match = self._find(kind, name, digest) or self._find(kind, name, None)
+        if match is None:
+            raise CassetteMiss(f"No recorded {kind} call for {name}")
+        index, entry = match
+        self._used.add(index)
+        if not self.instant and entry["duration"] > 0:
+            await asyncio.sleep(entry["duration"])
+        return copy.deepcopy(entry["response"])
+
+    def _find(self, kind: str, name: str, digest: Optional[str]):
+        for index, entry in enumerate(self.entries):
+            if index in self._used or entry["kind"] != kind or entry["name"] != name:
+                continue
+            if digest is None or entry["request_digest"] == digest:
+                return index, entry
+        return None
+
+    def save(self) -> None:
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"meta": self.meta, "entries": self.entries}, f, indent=2, ensure_ascii=False)
+
+
+def gemini_response_to_dict(response: Any) -> Dict[str, Any]:
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "text": response.text,
+        "usage_metadata": {f: getattr(usage, f, None) for f in USAGE_FIELDS} if usage is not None else None,
+    }
+
+
+def gemini_response_from_dict(data: Dict[str, Any]) -> Any:
+    """Rebuild an object with the parts of a genai response GeminiClient reads"""
+    usage = data.get("usage_metadata")
+    return SimpleNamespace(
+        text=data["text"],
+        usage_metadata=SimpleNamespace(**usage) if usage is not None else None,
+    )
+
+
+class _ReplayOnlyClient:
+    """Stands in for genai.Client during replay; any live call is a cassette gap"""
+
+    def __getattr__(self, name: str) -> Any:
+        raise CassetteMiss(f"Live Gemini access ({name}) attempted during replay")
+
+
+async def _run(args: argparse.Namespace) -> None:
+    from gemini_client import GeminiClient
+    from orchestrator import PersonOSINTOrchestrator
+
+    if args.command == "record":
+        cassette = Cassette(args.path, "record")
+        cassette.meta = {"name": args.name, "phone": args.phone, "context_info": args.context}
+        orchestrator = PersonOSINTOrchestrator(cassette=cassette)
+    else:
+        cassette = Cassette(args.path, "replay", instant=args.instant)
+        orchestrator = PersonOSINTOrchestrator(
+            gemini=GeminiClient(client=_ReplayOnlyClient()),
+            cassette=cassette,
+        )
+
+    started = time.perf_counter()
+    result = await orchestrator.enrich_person(cassette.meta["phone"], cassette.meta["name"], cassette.meta["context_info"])
+    elapsed = time.perf_counter() - started
+
+    if args.command == "record":
+        cassette.meta["recorded_seconds"] = round(elapsed, 3)
+        cassette.meta["timings"] = result.get("timings", [])
+        cassette.save()
+        print(f"\n📼 Recorded {len(cassette.entries)} calls in {elapsed:.2f}s to {args.path}")
+        return
+
+    recorded = {t["stage"]: t["seconds"] for t in cassette.meta.get("timings", [])}
+    print(f"\n📼 Replayed {len(cassette._used)}/{len(cassette.entries)} calls in {elapsed:.2f}s "
+          f"({'instant' if args.instant else 'original timings'}; recorded run took {cassette.meta.get('recorded_seconds', 0):.2f}s)")
+    print(f"   {'stage':<26}{'recorded':>10}{'replay':>10}")
+    for timing in result.get("timings", []):
+        print(f"   {timing['stage']:<26}{recorded.get(timing['stage'], 0):>10.3f}{timing['seconds']:>10.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="run a live enrichment and record every call")
+    rec.add_argument("path")
+    rec.add_argument("--name", required=True)
+    rec.add_argument("--phone", required=True)
+    rec.add_argument("--context", default="")
+    rep = sub.add_parser("replay", help="re-run an enrichment from a cassette")
+    rep.add_argument("path")
+    rep.add_argument("--instant", action="store_true", help="serve responses with zero latency")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
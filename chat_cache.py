@@ -0,0 +1,206 @@
+"""
+In-process write-back cache of active chats for the API.
+
+The frontend polls every open chat about once a second, and nearly every
+poll finds nothing new. Recently used chats are kept in an LRU of
+`capacity` entries, so those polls never touch storage. A write changes
+the cached chat and marks it dirty. Shortly afterwards (`flush_delay`
+seconds) one flush saves each dirty chat once, however many messages
+arrived in between. close() flushes whatever is left on shutdown.
+
+The cache assumes this process is the only writer of the chats it holds.
+If a flush finds that another process saved a chat first, the entries not
+yet stored are re-applied on top of the stored copy instead of being lost.
+Their sequence numbers may change when that happens.
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from chat_schema import new_chat, upgrade_chat
+from chat_store import AsyncChatStore, ChatVersionConflict, append_messages, ensure_seqs
+
+
+DEFAULT_CAPACITY = 64
+DEFAULT_FLUSH_DELAY = 0.5
+# A flush that hit a conflict leaves the re-applied chat dirty for another round
+CLOSE_FLUSH_ROUNDS = 3
+
+
+def prepare_chat(chat: Dict[str, Any]) -> Dict[str, Any]:
+    """Bring a loaded chat to the current message schema and number its messages"""
+    upgrade_chat(chat)
+    ensure_seqs(chat)
+    return chat
+
+
+def snapshot_chat(chat: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a chat whose lists stay put while the original keeps growing.
+
+    Entries are shared, not copied: once appended they are never changed.
+    """
+    return {key: list(value) if isinstance(value, list) else value for key, value in chat.items()}
+
+
+class _Entry:
+    def __init__(self, chat: Dict[str, Any]) -> None:
+        self.chat = chat
+        self.dirty = False
+        # How many messages the store already holds
+        self.stored = len(chat["messages"])
+
+
+class ChatCache:
+    """LRU of chats with debounced write-back to an AsyncChatStore.
+
+    A capacity of 0 turns the cache off: every get() loads and every put()
+    saves straight away, raising ChatVersionConflict as the store does.
+    """
+
+    def __init__(
+        self,
+        store: AsyncChatStore,
+        capacity: int = DEFAULT_CAPACITY,
+        flush_delay: float = DEFAULT_FLUSH_DELAY,
+    ) -> None:
+        self.store = store
+        self.capacity = capacity
+        self.flush_delay = flush_delay
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._loading: Dict[str, "asyncio.Future[Optional[Dict[str, Any]]]"] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.stats = {"hits": 0, "misses": 0, "saves": 0, "flushes": 0, "evictions": 0, "rebased": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """The chat, from memory when cached; changes to it must be passed to put()"""
+        entry = self._entries.get(chat_id)
+        if entry is not None:
+            self._entries.move_to_end(chat_id)
+            self.stats["hits"] += 1
+            return entry.chat
+        if self.capacity <= 0:
+            self.stats["misses"] += 1
+            chat = await self.store.load(chat_id)
+            return prepare_chat(chat) if chat is not None else None
+        # Concurrent requests for an uncached chat share a single load
+        loading = self._loading.get(chat_id)
+        if loading is None:
+            self.stats["misses"] += 1
+            loading = self._loading[chat_id] = asyncio.ensure_future(self._load(chat_id))
+            loading.add_done_callback(lambda _: self._loading.pop(chat_id, None))
+        else:
+            self.stats["hits"] += 1
+        return await asyncio.shield(loading)
+
+    async def _load(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        chat = await self.store.load(chat_id)
+        if chat is None:
+            return None
+        entry = self._entries[chat_id] = _Entry(prepare_chat(chat))
+        self._trim()
+        return entry.chat
+
+    async def exists(self, chat_id: str) -> bool:
+        return chat_id in self._entries or await self.store.exists(chat_id)
+
+    async def create(self, chat_id: str, chat: Dict[str, Any]) -> None:
+        """Store a new chat right away; ChatVersionConflict if the id is taken"""
+        prepare_chat(chat)
+        await self.store.save(chat_id, chat, expected_version=0)
+        if self.capacity > 0:
+            self._entries[chat_id] = _Entry(chat)
+            self._trim()
+
+    async def put(self, chat_id: str, chat: Dict[str, Any]) -> None:
+        """Record a change to a chat returned by get(); the next flush persists it"""
+        entry = self._entries.get(chat_id)
+        if entry is None or entry.chat is not chat:
+            # Not the cached copy (cache off, or evicted since get()): save it as before
+            await self.store.save(chat_id, chat, expected_version=chat.get("version", 0))
+            self.stats["saves"] += 1
+            if self.capacity > 0:
+                self._entries[chat_id] = _Entry(chat)
+                self._trim()
+            return
+        entry.dirty = True
+        self._entries.move_to_end(chat_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_soon())
+
+    async def _flush_soon(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_delay)
+            await self.flush()
+            if not any(entry.dirty for entry in self._entries.values()):
+                return
+
+    async def flush(self) -> int:
+        """Save every dirty chat once; returns how many were saved"""
+        saved = 0
+        async with self._flush_lock:
+            for chat_id in [cid for cid, entry in self._entries.items() if entry.dirty]:
+                entry = self._entries.get(chat_id)
+                if entry is not None and entry.dirty and await self._save(chat_id, entry):
+                    saved += 1
+            if saved:
+                self.stats["flushes"] += 1
+            self._trim()
+        return saved
+
+    async def _save(self, chat_id: str, entry: _Entry) -> bool:
+        # Writes landing while the save runs go to entry.chat and mark it dirty again
+        data = snapshot_chat(entry.chat)
+        entry.dirty = False
+        try:
+            await self.store.save(chat_id, data, expected_version=data.get("version", 0))
+        except ChatVersionConflict:
+            try:
+                await self._rebase(chat_id, entry)
+            except Exception as e:
+                entry.dirty = True
+                print(f"❌ Failed to reload chat {chat_id} after a conflicting save: {e}")
+            return False
+        except Exception as e:
+            entry.dirty = True
+            print(f"❌ Failed to save chat {chat_id}: {e}")
+            return False
+        entry.chat["version"] = data["version"]
+        entry.stored = len(data["messages"])
+        self.stats["saves"] += 1
+        return True
+
+    async def _rebase(self, chat_id: str, entry: _Entry) -> None:
+        """Another process saved first: re-apply what only this process has onto the stored copy"""
+        stored = await self.store.load(chat_id)
+        chat = entry.chat
+        fresh = prepare_chat(stored if stored is not None else new_chat(chat.get("metadata", {})))
+        pending = chat["messages"][entry.stored:]
+        entry.stored = len(fresh["messages"])
+        append_messages(fresh, *({k: v for k, v in m.items() if k != "seq"} for m in pending))
+        entry.chat = fresh
+        entry.dirty = True
+        self.stats["rebased"] += 1
+        print(f"⚠️ Chat {chat_id} was saved elsewhere; re-applied {len(pending)} unsaved messages")
+
+    def _trim(self) -> None:
+        """Evict least recently used clean chats down to capacity; dirty ones wait for their flush"""
+        while len(self._entries) > self.capacity:
+            victim = next((cid for cid, entry in self._entries.items() if not entry.dirty), None)
+            if victim is None:
+                return
+            del self._entries[victim]
+            self.stats["evictions"] += 1
+
+    async def close(self) -> None:
+        """Flush outstanding writes, then close the store"""
+        for _ in range(CLOSE_FLUSH_ROUNDS):
+            await self.flush()
+            if not any(entry.dirty for entry in self._entries.values()):
+                break
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        await self.store.close()
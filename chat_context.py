@@ -0,0 +1,191 @@
+"""
+Bounded Gemini context for long chats.
+
+Sending a chat's whole history on every turn makes each reply slower and
+more expensive than the last. Instead each request carries the last
+RECENT_TURNS Gemini turns verbatim, plus a rolling summary of everything
+older as the system instruction. The summary is stored with the chat under
+"context_summary", together with the seq of the last message it covers.
+
+ContextSummarizer folds turns that have left the window into the summary
+in the background, a batch at a time, so a reply never waits for it.
+Turns that have left the window but are not summarised yet are still sent
+verbatim, so nothing drops out of the context while a summary is pending.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from google.genai import types
+
+from chat_schema import gemini_content
+
+
+SUMMARY_KEY = "context_summary"
+# Gemini turns (a prompt or a reply) always sent verbatim; even, so the window starts on a prompt
+RECENT_TURNS = 20
+# Turns outside the window that trigger a summary refresh
+SUMMARIZE_AFTER = 10
+# At most this many turns are folded per refresh; a long backlog is worked off over several turns
+SUMMARY_BATCH_TURNS = 200
+SUMMARY_WORDS = 300
+
+# api.update_chat: applies a mutation to the latest copy of a chat and returns (chat, result)
+UpdateChat = Callable[[str, Callable[[Dict[str, Any]], Any]], Awaitable[Tuple[Dict[str, Any], Any]]]
+
+
+def _summary(chat: Dict[str, Any]) -> Dict[str, Any]:
+    return chat.get(SUMMARY_KEY) or {}
+
+
+def recent_contents(chat: Dict[str, Any], recent_turns: int = RECENT_TURNS) -> List[Dict[str, Any]]:
+    """Turns to send verbatim: the recent window plus anything older the summary lacks.
+
+    Walks back from the newest message only as far as needed, so the cost
+    does not grow with the length of the chat.
+    """
+    through = _summary(chat).get("through_seq", 0)
+    contents: List[Dict[str, Any]] = []
+    for message in reversed(chat.get("messages", [])):
+        content = gemini_content(message)
+        if content is None:
+            continue
+        covered = len(contents) >= recent_turns and message.get("seq", 0) <= through
+        # Gemini expects the history to open with a prompt, not a reply
+        if covered and (not contents or contents[-1]["role"] == "user"):
+            break
+        contents.append(content)
+    contents.reverse()
+    return contents
+
+
+def build_contents(chat: Dict[str, Any], prompt: str, recent_turns: int = RECENT_TURNS) -> List[Dict[str, Any]]:
+    """Gemini `contents` for the next reply: the verbatim turns plus the new prompt"""
+    return recent_contents(chat, recent_turns) + [{"role": "user", "parts": [prompt]}]
+
+
+def context_config(chat: Dict[str, Any]) -> Optional[types.GenerateContentConfig]:
+    """Request config carrying the chat's rolling summary, if it has one"""
+    text = _summary(chat).get("text")
+    if not text:
+        return None
+    return types.GenerateContentConfig(
+        system_instruction=f"Summary of the earlier part of this conversation:\n{text}"
+    )
+
+
+def pending_turns(chat: Dict[str, Any], recent_turns: int = RECENT_TURNS) -> List[Tuple[int, Dict[str, Any]]]:
+    """(seq, content) of turns outside the recent window that the summary does not cover, oldest first"""
+    through = _summary(chat).get("through_seq", 0)
+    seen = 0
+    pending: List[Tuple[int, Dict[str, Any]]] = []
+    for message in reversed(chat.get("messages", [])):
+        content = gemini_content(message)
+        if content is None:
+            continue
+        seen += 1
+        if seen <= recent_turns:
+            continue
+        if message.get("seq", 0) <= through:
+            break
+        pending.append((message["seq"], content))
+    pending.reverse()
+    # Keep the window aligned on a prompt, as recent_contents() does
+    if pending and pending[-1][1]["role"] == "user":
+        pending.pop()
+    return pending
+
+
+def summary_prompt(previous: str, contents: List[Dict[str, Any]]) -> str:
+    transcript = "\n".join(
+        f"{'User' if c['role'] == 'user' else 'Assistant'}: {' '.join(str(p) for p in c['parts'])}"
+        for c in contents
+    )
+    return f"""
+You maintain a running summary of a conversation between a user and an assistant.
+
+CURRENT SUMMARY:
+{previous or "(none yet)"}
+
+NEW TURNS:
+{transcript}
+
+TASK: Rewrite the summary so it also covers the new turns. Keep names, numbers, facts,
+decisions, open questions and the user's stated preferences; drop greetings and filler.
+Write at most {SUMMARY_WORDS} words of plain text and return only the summary.
+"""
+
+
+class ContextSummarizer:
+    """Refreshes chat summaries in the background, at most one run per chat at a time"""
+
+    def __init__(
+        self,
+        client: Any,
+        model: str,
+        recent_turns: int = RECENT_TURNS,
+        summarize_after: int = SUMMARIZE_AFTER,
+    ) -> None:
+        self.client = client
+        self.model = model
+        self.recent_turns = recent_turns
+        self.summarize_after = summarize_after
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def maybe_refresh(self, chat_id: str, chat: Dict[str, Any], update: UpdateChat) -> bool:
+        """Start a refresh if enough turns have left the window; `update` is how the result is saved"""
+        if chat_id in self._running:
+            return False
+        pending = pending_turns(chat, self.recent_turns)
+        if len(pending) < self.summarize_after:
+            return False
+        self._running.add(chat_id)
+        task = asyncio.get_running_loop().create_task(
+            self._refresh(chat_id, dict(_summary(chat)), pending[:SUMMARY_BATCH_TURNS], update)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    def _summarize(self, previous: str, contents: List[Dict[str, Any]]) -> str:
+        response = self.client.models.generate_content(model=self.model, contents=summary_prompt(previous, contents))
+        text = (response.text or "").strip()
+        if not text:
+            raise ValueError("empty summary")
+        return text
+
+    async def _refresh(
+        self,
+        chat_id: str,
+        previous: Dict[str, Any],
+        pending: List[Tuple[int, Dict[str, Any]]],
+        update: UpdateChat,
+    ) -> None:
+        try:
+            text = await asyncio.to_thread(self._summarize, previous.get("text", ""), [c for _, c in pending])
+
+            def apply(chat: Dict[str, Any]) -> bool:
+                if _summary(chat).get("through_seq", 0) != previous.get("through_seq", 0):
+                    return False  # replaced meanwhile (e.g. by another worker)
+                chat[SUMMARY_KEY] = {
+                    "text": text,
+                    "through_seq": pending[-1][0],
+                    "turns": previous.get("turns", 0) + len(pending),
+                    "updated_at": time.time(),
+                }
+                return True
+
+            _, applied = await update(chat_id, apply)
+            if applied:
+                print(f"📝 Summarised {len(pending)} older turns of chat {chat_id}")
+        except Exception as e:
+            print(f"❌ Summary refresh failed for chat {chat_id}: {e}")
+        finally:
+            self._running.discard(chat_id)
+
+    async def close(self) -> None:
+        """Cancel refreshes still running; they are redone on a later turn"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
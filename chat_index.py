@@ -0,0 +1,230 @@
+"""
+Index of chat summaries for the sidebar.
+
+One SQLite row per chat with its metadata, message count, last activity
+time and a snippet of the last message. `IndexedChatStore` updates the row
+on every save, so listing, sorting, paging and prefix search never open
+the chats themselves. The index is rebuilt from the store once, when it
+is new or was built for a different backend.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from chat_store import ChatStore, open_chat_store
+
+
+DEFAULT_INDEX_PATH = Path("chat_index.db")
+SNIPPET_CHARS = 120
+# Sort keys accepted by query(), mapped to indexed columns
+SORT_COLUMNS = {"recent": "last_message_at", "created": "created_at", "name": "name_lc"}
+# Queries that look like (part of) a phone number also match the stored digits
+_PHONE_QUERY_RE = re.compile(r"^[\d+\s()-]*\d[\d+\s()-]*$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_index (
+    chat_id TEXT PRIMARY KEY,
+    id_lc TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_lc TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_message_at REAL NOT NULL,
+    message_count INTEGER NOT NULL,
+    last_snippet TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chat_index_recent ON chat_index (last_message_at);
+CREATE INDEX IF NOT EXISTS idx_chat_index_created ON chat_index (created_at);
+CREATE INDEX IF NOT EXISTS idx_chat_index_name ON chat_index (name_lc);
+CREATE INDEX IF NOT EXISTS idx_chat_index_id ON chat_index (id_lc);
+CREATE INDEX IF NOT EXISTS idx_chat_index_phone ON chat_index (phone);
+
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    if message.get("text"):
+        return str(message["text"])
+    parts = message.get("parts")
+    if parts:
+        return " ".join(str(p) for p in parts)
+    return str(message.get("content", ""))
+
+
+def _created_at(metadata: Dict[str, Any]) -> Optional[float]:
+    try:
+        return time.mktime(time.strptime(metadata.get("start_timestamp", ""), "%Y%m%d_%H%M%S"))
+    except ValueError:
+        return None
+
+
+def _prefix_range(prefix: str) -> Tuple[str, str]:
+    """Bounds that select every string starting with prefix, usable by a column index"""
+    return prefix, prefix + "\U0010ffff"
+
+
+class ChatIndex:
+    """Per-chat summary rows with sorted, paged, prefix-searchable listing"""
+
+    def __init__(self, db_path: Path = DEFAULT_INDEX_PATH) -> None:
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def entry(chat_id: str, chat: Dict[str, Any]) -> Dict[str, Any]:
+        """Summary row for a chat document"""
+        metadata = chat.get("metadata", {})
+        messages = chat.get("messages", [])
+        created_at = _created_at(metadata) or time.time()
+        # "ts" in current chats, "timestamp" in chats not migrated yet
+        last_message_at = next(
+            (m.get("ts") or m["timestamp"] for m in reversed(messages) if m.get("ts") or m.get("timestamp")), None
+        )
+        if last_message_at is None:
+            last_message_at = time.time() if messages else created_at
+        snippet = " ".join(_message_text(messages[-1]).split()) if messages else ""
+        return {
+            "chat_id": chat_id,
+            "name": metadata.get("client_name") or chat_id,
+            "phone": "".join(c for c in str(metadata.get("client_phone", "")) if c.isdigit()),
+            "metadata": metadata,
+            "created_at": created_at,
+            "last_message_at": last_message_at,
+            "message_count": len(messages),
+            "last_snippet": snippet[:SNIPPET_CHARS],
+        }
+
+    def update(self, chat_id: str, chat: Dict[str, Any]) -> None:
+        e = self.entry(chat_id, chat)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_index (chat_id, id_lc, name, name_lc, phone, metadata, created_at,"
+                " last_message_at, message_count, last_snippet) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    chat_id, chat_id.lower(), e["name"], e["name"].lower(), e["phone"],
+                    json.dumps(e["metadata"], ensure_ascii=False), e["created_at"], e["last_message_at"],
+                    e["message_count"], e["last_snippet"],
+                ),
+            )
+
+    def remove(self, chat_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chat_index WHERE chat_id = ?", (chat_id,))
+
+    def query(
+        self,
+        prefix: str = "",
+        sort: str = "recent",
+        descending: bool = True,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """(total matches, one page of summaries); prefix matches client name, chat id or phone"""
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        where, params = "", []
+        prefix = prefix.strip().lower()
+        if prefix:
+            low, high = _prefix_range(prefix)
+            clauses = ["(name_lc >= ? AND name_lc < ?)", "(id_lc >= ? AND id_lc < ?)"]
+            params = [low, high, low, high]
+            if _PHONE_QUERY_RE.match(prefix):
+                clauses.append("(phone >= ? AND phone < ?)")
+                params.extend(_prefix_range("".join(c for c in prefix if c.isdigit())))
+            where = f"WHERE {' OR '.join(clauses)}"
+        order = f"{SORT_COLUMNS[sort]} {'DESC' if descending else 'ASC'}, chat_id"
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM chat_index {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT * FROM chat_index {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                (*params, -1 if limit is None else limit, offset),
+            ).fetchall()
+        return total, [
+            {
+                "id": row["chat_id"],
+                "metadata": json.loads(row["metadata"]),
+                "created_at": row["created_at"],
+                "last_message_at": row["last_message_at"],
+                "message_count": row["message_count"],
+                "last_snippet": row["last_snippet"],
+            }
+            for row in rows
+        ]
+
+    def built_for(self) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM index_meta WHERE key = 'source'").fetchone()
+        return row[0] if row else None
+
+    def rebuild(self, store: ChatStore) -> int:
+        """Re-index every chat in the store; the only time chats are opened in bulk"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chat_index")
+        count = 0
+        for chat_id, _ in store.list_chats():
+            try:
+                chat = store.load(chat_id)
+            except Exception:
+                continue
+            if chat is not None:
+                self.update(chat_id, chat)
+                count += 1
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('source', ?)", (store.location,)
+            )
+        return count
+
+
+class IndexedChatStore(ChatStore):
+    """A chat store whose saves keep a ChatIndex current"""
+
+    def __init__(self, store: ChatStore, index: ChatIndex) -> None:
+        self.store = store
+        self.index = index
+        self.location = store.location
+        if index.built_for() != store.location:
+            count = index.rebuild(store)
+            print(f"📇 Indexed {count} chats from {store.location}")
+
+    def exists(self, chat_id: str) -> bool:
+        return self.store.exists(chat_id)
+
+    def load(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.load(chat_id)
+
+    def save(self, chat_id: str, data: Dict[str, Any], expected_version: Optional[int] = None) -> None:
+        self.store.save(chat_id, data, expected_version)
+        self.index.update(chat_id, data)
+
+    def list_chats(self) -> List[Tuple[str, Dict[str, Any]]]:
+        return [(e["id"], e["metadata"]) for e in self.index.query()[1]]
+
+    def close(self) -> None:
+        self.store.close()
+        self.index.close()
+
+
+def open_indexed_chat_store(kind: Optional[str] = None) -> IndexedChatStore:
+    """open_chat_store() plus the sidebar index at CHAT_INDEX_PATH"""
+    index = ChatIndex(Path(os.getenv("CHAT_INDEX_PATH") or DEFAULT_INDEX_PATH))
+    return IndexedChatStore(open_chat_store(kind), index)
@@ -0,0 +1,36 @@
+"""
+Per-chat write serialisation for the API.
+
+Requests that touch the same chat queue on that chat's asyncio lock, while
+different chats proceed in parallel. Locks only exist while someone holds
+or waits for them, so the table does not grow with the number of chats.
+Across worker processes the store's version-checked saves catch the writes
+these locks cannot see.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+
+class ChatLocks:
+    """One asyncio.Lock per chat id, dropped when no request needs it"""
+
+    def __init__(self) -> None:
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._waiters: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def hold(self, chat_id: str) -> AsyncIterator[None]:
+        lock = self._locks.setdefault(chat_id, asyncio.Lock())
+        self._waiters[chat_id] = self._waiters.get(chat_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._waiters[chat_id] -= 1
+            if not self._waiters[chat_id]:
+                del self._waiters[chat_id]
+                del self._locks[chat_id]
+
+    def __len__(self) -> int:
+        return len(self._locks)
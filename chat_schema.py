@@ -0,0 +1,154 @@
+"""
+Compact chat message records and the views derived from them.
+
+A chat (schema 2) keeps one `messages` list, one record per event:
+
+    {"seq": 7, "ts": 1732170000.5, "channel": "telegram", "dir": "in", "text": "Hi", "sender": "Ann"}
+
+`channel` is "telegram" (the conversation with the client) or "gemini"
+(the assistant pane). `dir` is "out" for text the user sent and "in" for
+text that came back: a Telegram reply or a Gemini answer. `sender` and
+`message_id` are only present for incoming Telegram messages that had them.
+Gemini contents and the UI's prompt/reply pairs are derived from this list
+instead of being stored next to it.
+
+Schema 1 chats stored each Gemini turn three times: as role/parts entries,
+as source/direction log entries and in past/generated. upgrade_chat() folds
+them into one record per message; migrate_chats.py rewrites stored chats.
+"""
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from chat_store import ensure_seqs
+
+
+SCHEMA_VERSION = 2
+TELEGRAM = "telegram"
+GEMINI = "gemini"
+IN = "in"
+OUT = "out"
+# Lists schema 1 kept next to `messages`
+LEGACY_LISTS = ("past", "generated")
+
+_LEGACY_SOURCES = {
+    "telegram_client": (TELEGRAM, IN),
+    "telegram_ui": (TELEGRAM, OUT),
+    "convosphere_ui": (GEMINI, OUT),
+    "convosphere_model": (GEMINI, IN),
+}
+_LEGACY_ROLES = {"system": OUT, "user": OUT, "assistant": IN, "model": IN}
+
+
+def new_chat(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    return {"schema": SCHEMA_VERSION, "metadata": metadata, "messages": []}
+
+
+def message(
+    channel: str,
+    direction: str,
+    text: str,
+    sender: Optional[str] = None,
+    message_id: Optional[Any] = None,
+    ts: Optional[float] = None,
+) -> Dict[str, Any]:
+    """A message record without its seq; append_messages() assigns that"""
+    record: Dict[str, Any] = {"ts": time.time() if ts is None else ts, "channel": channel, "dir": direction, "text": text}
+    if sender:
+        record["sender"] = sender
+    if message_id is not None:
+        record["message_id"] = message_id
+    return record
+
+
+def gemini_content(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The Gemini `contents` entry for a record, or None for Telegram traffic"""
+    if record.get("channel") != GEMINI:
+        return None
+    return {"role": "user" if record["dir"] == OUT else "model", "parts": [record.get("text", "")]}
+
+
+def gemini_pairs(chat: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """(prompts, replies) of the assistant pane, index-aligned as the UIs render them"""
+    prompts: List[str] = []
+    replies: List[str] = []
+    for record in chat.get("messages", []):
+        if record.get("channel") != GEMINI:
+            continue
+        if record["dir"] == OUT:
+            prompts.append(record.get("text", ""))
+        else:
+            replies.append(record.get("text", ""))
+    return prompts, replies
+
+
+def telegram_view(record: Dict[str, Any]) -> Dict[str, Any]:
+    """How the Telegram pane shows a record"""
+    return {
+        "sender": "You" if record["dir"] == OUT else record.get("sender") or "Telegram",
+        "text": record.get("text", ""),
+        "timestamp": record.get("ts"),
+        "seq": record.get("seq"),
+    }
+
+
+def _legacy_text(entry: Dict[str, Any]) -> str:
+    if entry.get("text") is not None:
+        return str(entry["text"])
+    parts = entry.get("parts")
+    if parts:
+        return " ".join(str(p) for p in parts)
+    return str(entry.get("content", ""))
+
+
+def upgrade_chat(chat: Dict[str, Any]) -> bool:
+    """Convert a schema 1 chat to schema 2 in place; returns whether anything changed.
+
+    Gemini turns are taken from the source/direction log entries, which
+    carry timestamps, when the chat has any; otherwise from the role/parts
+    entries, and for the oldest chats from past/generated. Sequence numbers
+    are kept when every surviving record has one, so clients that synced
+    before the upgrade stay in step.
+    """
+    if chat.get("schema", 1) >= SCHEMA_VERSION:
+        chat.setdefault("messages", [])
+        for name in LEGACY_LISTS:
+            if not chat.get(name):
+                chat.pop(name, None)
+        return False
+
+    entries = chat.get("messages", [])
+    has_log = any(_LEGACY_SOURCES.get(e.get("source"), ("",))[0] == GEMINI for e in entries)
+    has_roles = any(e.get("role") in _LEGACY_ROLES for e in entries)
+    records: List[Dict[str, Any]] = []
+    if not has_log and not has_roles:
+        # Chats from before the message log only kept the pane's prompt/reply pairs
+        for prompt, reply in zip(chat.get("past", []), chat.get("generated", [])):
+            records.append({"ts": None, "channel": GEMINI, "dir": OUT, "text": prompt})
+            records.append({"ts": None, "channel": GEMINI, "dir": IN, "text": reply})
+    last_ts = None
+    for entry in entries:
+        if entry.get("source") in _LEGACY_SOURCES:
+            channel, direction = _LEGACY_SOURCES[entry["source"]]
+        elif entry.get("role") in _LEGACY_ROLES and not has_log:
+            channel, direction = GEMINI, _LEGACY_ROLES[entry["role"]]
+        else:
+            continue
+        # role/parts entries had no timestamp; they take the one logged just before them
+        last_ts = entry.get("timestamp", last_ts)
+        record: Dict[str, Any] = {"ts": last_ts, "channel": channel, "dir": direction, "text": _legacy_text(entry)}
+        for key in ("sender", "message_id", "seq"):
+            if entry.get(key) is not None:
+                record[key] = entry[key]
+        records.append(record)
+
+    if not all("seq" in r for r in records):
+        for record in records:
+            record.pop("seq", None)
+    chat["messages"] = records
+    ensure_seqs(chat)
+    # A rolling summary (chat_context) points at seqs of the old layout; it is rebuilt on a later turn
+    chat.pop("context_summary", None)
+    for name in LEGACY_LISTS:
+        chat.pop(name, None)
+    chat["schema"] = SCHEMA_VERSION
+    return True
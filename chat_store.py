@@ -0,0 +1,642 @@
+"""
+Storage backends for API chats.
+
+`JsonChatStore` keeps the original one-file-per-chat layout under `chats/`.
+`SqliteChatStore` keeps chats, metadata and messages in a WAL-mode SQLite
+database and `JsonlChatStore` keeps an append-only log per chat under
+`chats/jsonl/`. Both write only what a save appended, so a send costs the
+same on a long conversation as on a new one. The backend is picked with
+the CHAT_STORE environment variable ("json", "sqlite" or "jsonl").
+
+Existing JSON chats can be copied into another backend once with:
+
+    python chat_store.py import [--backend sqlite|jsonl] [--chat-dir chats] [--db chats.db]
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are only serialised within one process
+    fcntl = None
+
+
+DEFAULT_CHAT_DIR = Path("chats")
+DEFAULT_DB_PATH = Path("chats.db")
+DEFAULT_JSONL_DIR = DEFAULT_CHAT_DIR / "jsonl"
+# Log records folded into the snapshot once a chat's log grows past this
+COMPACT_AFTER_RECORDS = 500
+
+# Top-level lists of a chat document; each item is stored as one message row
+MESSAGE_LISTS = ("messages", "past", "generated")
+# Threads reserved for chat I/O so slow model calls in the default executor cannot starve it.
+# Kept small: JSON parsing holds the GIL, and every extra parser thread competes with the
+# event loop (bench_chat_api.py: loop lag p50 ~2 ms at 1-2 threads, ~50 ms at 8)
+STORAGE_THREADS = 2
+
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    extra TEXT NOT NULL DEFAULT '{}',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS chat_metadata (
+    chat_id TEXT NOT NULL REFERENCES chats (id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (chat_id, key)
+);
+
+CREATE TABLE IF NOT EXISTS messages (
+    chat_id TEXT NOT NULL REFERENCES chats (id) ON DELETE CASCADE,
+    list TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (chat_id, list, seq)
+);
+"""
+
+
+class ChatVersionConflict(Exception):
+    """A save expected a chat version that another writer has already replaced"""
+
+    def __init__(self, chat_id: str, expected: int, stored: int):
+        super().__init__(f"Chat {chat_id} is at version {stored}, expected {expected}")
+        self.chat_id = chat_id
+        self.expected = expected
+        self.stored = stored
+
+
+def _check_version(chat_id: str, stored: int, expected: Optional[int]) -> int:
+    """The version a save writes; raises if the caller's copy is stale"""
+    if expected is not None and stored != expected:
+        raise ChatVersionConflict(chat_id, expected, stored)
+    return stored + 1
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exclusive advisory lock shared by every process writing the same chat"""
+    if fcntl is None:
+        yield
+        return
+    with path.open("a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def empty_chat(metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    chat: Dict[str, Any] = {"metadata": dict(metadata or {})}
+    for name in MESSAGE_LISTS:
+        chat[name] = []
+    return chat
+
+
+def ensure_seqs(chat: Dict[str, Any]) -> int:
+    """Number messages that predate sequence numbers; returns the chat's last seq (0 if empty).
+
+    Each entry of `messages` carries a per-chat `seq` that only ever grows,
+    so clients can ask for what they have not seen yet.
+    """
+    last = 0
+    for message in chat.get("messages", []):
+        if "seq" not in message:
+            message["seq"] = last + 1
+        last = message["seq"]
+    return last
+
+
+def append_messages(chat: Dict[str, Any], *messages: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Append messages with the next sequence numbers; returns them as stored"""
+    existing = chat["messages"]
+    # Loaded chats are numbered already, so only the tail needs checking
+    last = existing[-1]["seq"] if existing and "seq" in existing[-1] else ensure_seqs(chat)
+    for offset, message in enumerate(messages, start=1):
+        message["seq"] = last + offset
+        chat["messages"].append(message)
+    return list(messages)
+
+
+def select_messages(
+    messages: List[Dict[str, Any]],
+    after_seq: Optional[int] = None,
+    before_seq: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Messages with after_seq < seq < before_seq, oldest first, and whether more lie beyond the limit.
+
+    With only before_seq the page is the `limit` messages just before it
+    (scrolling back through history); otherwise it starts right after
+    after_seq (catching up).
+    """
+    seqs = [m["seq"] for m in messages]
+    start = bisect.bisect_right(seqs, after_seq) if after_seq is not None else 0
+    end = bisect.bisect_left(seqs, before_seq) if before_seq is not None else len(messages)
+    window = messages[start:end]
+    if limit is None or len(window) <= limit:
+        return window, False
+    if before_seq is not None and after_seq is None:
+        return window[-limit:], True
+    return window[:limit], True
+
+
+class ChatStore:
+    """Interface shared by the chat backends"""
+
+    # Identifies where the chats live, e.g. for indexes built over a store
+    location = ""
+
+    def exists(self, chat_id: str) -> bool:
+        raise NotImplementedError
+
+    def load(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """The chat document, or None if there is no such chat"""
+        raise NotImplementedError
+
+    def save(self, chat_id: str, data: Dict[str, Any], expected_version: Optional[int] = None) -> None:
+        """Write the chat and bump data["version"].
+
+        With expected_version the write only happens if the stored chat is
+        still at that version (0 for a chat that does not exist yet);
+        otherwise ChatVersionConflict is raised and nothing is written.
+        """
+        raise NotImplementedError
+
+    def list_chats(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """(chat id, metadata) for every stored chat"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonChatStore(ChatStore):
+    """One pretty-printed JSON file per chat, rewritten on every save"""
+
+    def __init__(self, chat_dir: Path = DEFAULT_CHAT_DIR) -> None:
+        self.chat_dir = Path(chat_dir)
+        self.chat_dir.mkdir(exist_ok=True)
+        self.lock_dir = self.chat_dir / ".locks"
+        self.lock_dir.mkdir(exist_ok=True)
+        self.location = f"json:{self.chat_dir.resolve()}"
+
+    def path(self, chat_id: str) -> Path:
+        return self.chat_dir / f"{chat_id}.json"
+
+    def exists(self, chat_id: str) -> bool:
+        return self.path(chat_id).exists()
+
+    def load(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        path = self.path(chat_id)
+        if not path.exists():
+            return None
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, chat_id: str, data: Dict[str, Any], expected_version: Optional[int] = None) -> None:
+        path = self.path(chat_id)
+        with _file_lock(self.lock_dir / f"{chat_id}.lock"):
+            stored = self.load(chat_id) if path.exists() else None
+            version = _check_version(chat_id, (stored or {}).get("version", 0), expected_version)
+            data["version"] = version
+            # Write aside and rename so readers never see a half-written file
+            tmp = path.with_name(path.name + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, path)
+
+    def list_chats(self) -> List[Tuple[str, Dict[str, Any]]]:
+        chats = []
+        for file in self.chat_dir.glob("*.json"):
+            try:
+                with file.open("r", encoding="utf-8") as f:
+                    chats.append((file.stem, json.load(f).get("metadata", {})))
+            except Exception:
+                continue
+        return chats
+
+
+class SqliteChatStore(ChatStore):
+    """Chats in SQLite; saves insert only the list items appended since the last save.
+
+    Stored items are treated as immutable: a list that grew gets its tail
+    inserted, while a list that shrank is rewritten in full.
+    """
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH) -> None:
+        self.db_path = str(db_path)
+        self.location = f"sqlite:{Path(db_path).resolve()}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(chats)")}
+        if "version" not in columns:  # databases created before versioned saves
+            self._conn.execute("ALTER TABLE chats ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def exists(self, chat_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM chats WHERE id = ?", (chat_id,)).fetchone() is not None
+
+    def load(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT extra, version FROM chats WHERE id = ?", (chat_id,)).fetchone()
+            if row is None:
+                return None
+            meta_rows = self._conn.execute(
+                "SELECT key, value FROM chat_metadata WHERE chat_id = ?", (chat_id,)
+            ).fetchall()
+            message_rows = self._conn.execute(
+                "SELECT list, payload FROM messages WHERE chat_id = ? ORDER BY list, seq", (chat_id,)
+            ).fetchall()
+
+        chat = json.loads(row[0])
+        chat.update(empty_chat({key: json.loads(value) for key, value in meta_rows}))
+        chat["version"] = row[1]
+        for list_name, payload in message_rows:
+            chat.setdefault(list_name, []).append(json.loads(payload))
+        return chat
+
+    def save(self, chat_id: str, data: Dict[str, Any], expected_version: Optional[int] = None) -> None:
+        now = time.time()
+        extra = {k: v for k, v in data.items() if k not in ("metadata", "version") and k not in MESSAGE_LISTS}
+        metadata = data.get("metadata", {})
+        with self._lock, self._conn:
+            # Take the write lock before reading the version so other processes cannot interleave
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute("SELECT version FROM chats WHERE id = ?", (chat_id,)).fetchone()
+            version = _check_version(chat_id, row[0] if row else 0, expected_version)
+            self._conn.execute(
+                "INSERT INTO chats (id, version, extra, created_at, updated_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (id) DO UPDATE SET version = excluded.version, extra = excluded.extra,"
+                " updated_at = excluded.updated_at",
+                (chat_id, version, json.dumps(extra, ensure_ascii=False), now, now),
+            )
+            self._conn.execute("DELETE FROM chat_metadata WHERE chat_id = ?", (chat_id,))
+            self._conn.executemany(
+                "INSERT INTO chat_metadata (chat_id, key, value) VALUES (?, ?, ?)",
+                [(chat_id, key, json.dumps(value, ensure_ascii=False)) for key, value in metadata.items()],
+            )
+
+            stored = dict(self._conn.execute(
+                "SELECT list, COUNT(*) FROM messages WHERE chat_id = ? GROUP BY list", (chat_id,)
+            ).fetchall())
+            for list_name in MESSAGE_LISTS:
+                items = data.get(list_name, [])
+                start = stored.get(list_name, 0)
+                if len(items) < start:
+                    self._conn.execute("DELETE FROM messages WHERE chat_id = ? AND list = ?", (chat_id, list_name))
+                    start = 0
+                self._conn.executemany(
+                    "INSERT INTO messages (chat_id, list, seq, payload) VALUES (?, ?, ?, ?)",
+                    [
+                        (chat_id, list_name, seq, json.dumps(item, ensure_ascii=False))
+                        for seq, item in enumerate(items[start:], start=start)
+                    ],
+                )
+        data["version"] = version
+
+    def list_chats(self) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute("SELECT id FROM chats ORDER BY created_at")]
+            meta_rows = self._conn.execute("SELECT chat_id, key, value FROM chat_metadata").fetchall()
+        metadata: Dict[str, Dict[str, Any]] = {chat_id: {} for chat_id in ids}
+        for chat_id, key, value in meta_rows:
+            metadata.setdefault(chat_id, {})[key] = json.loads(value)
+        return [(chat_id, metadata[chat_id]) for chat_id in ids]
+
+
+def _write_atomic(path: Path, data: Dict[str, Any], fsync: bool = True) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class JsonlChatStore(ChatStore):
+    """Plain-file chats as a metadata header, a snapshot and an append-only log.
+
+    Per chat, `<id>.meta.json` holds the metadata and other top-level keys,
+    `<id>.snapshot.json` the lists as of the last compaction and
+    `<id>.log.jsonl` one {"list", "seq", "item"} record per appended item.
+    A save appends and fsyncs only the new records, then rewrites the
+    header with the bumped version. Loading replays the log
+    over the snapshot, skipping records the snapshot already holds, so
+    replay is idempotent and a crash costs at most a torn final line. Once
+    a log passes `compact_after` records, a background thread rotates it
+    aside and folds it into a new snapshot while appends continue.
+    """
+
+    def __init__(self, root: Path = DEFAULT_JSONL_DIR, compact_after: int = COMPACT_AFTER_RECORDS, fsync: bool = True) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.location = f"jsonl:{self.root.resolve()}"
+        self.compact_after = compact_after
+        self.fsync = fsync
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # chat id -> {"counts": {list: items stored}, "log_records": int, "header": dict}
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._compact_queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._pending_compactions: set = set()
+        self._compactor = threading.Thread(target=self._compact_loop, name="jsonl-compactor", daemon=True)
+        self._compactor.start()
+
+    def _paths(self, chat_id: str) -> Dict[str, Path]:
+        return {
+            "meta": self.root / f"{chat_id}.meta.json",
+            "snapshot": self.root / f"{chat_id}.snapshot.json",
+            "log": self.root / f"{chat_id}.log.jsonl",
+            "compacting": self.root / f"{chat_id}.log.compacting",
+            "lock": self.root / f"{chat_id}.lock",
+        }
+
+    def _lock(self, chat_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(chat_id, threading.Lock())
+
+    def exists(self, chat_id: str) -> bool:
+        return self._paths(chat_id)["meta"].exists()
+
+    @staticmethod
+    def _read_log(path: Path) -> Tuple[List[Dict[str, Any]], int]:
+        """Complete records of a log and the byte length they span; a torn last line is left out"""
+        if not path.exists():
+            return [], 0
+        records, good_bytes = [], 0
+        with path.open("rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                good_bytes += len(line)
+        return records, good_bytes
+
+    def _read(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Fold snapshot and logs into a chat document and cache the append state"""
+        paths = self._paths(chat_id)
+        if not paths["meta"].exists():
+            return None
+        with paths["meta"].open("r", encoding="utf-8") as f:
+            header = json.load(f)
+        chat = {**header, **empty_chat(header.get("metadata"))}
+        if paths["snapshot"].exists():
+            with paths["snapshot"].open("r", encoding="utf-8") as f:
+                chat.update(json.load(f))
+
+        compacting, _ = self._read_log(paths["compacting"])
+        records, good_bytes = self._read_log(paths["log"])
+        if paths["log"].exists() and paths["log"].stat().st_size > good_bytes:
+            # Drop a torn line left by a crash so the next append starts on a clean line
+            with paths["log"].open("r+b") as f:
+                f.truncate(good_bytes)
+        for record in compacting + records:
+            items = chat.setdefault(record["list"], [])
+            if record["seq"] == len(items):
+                items.append(record["item"])
+
+        self._state[chat_id] = {
+            "counts": {name: len(chat.get(name, [])) for name in MESSAGE_LISTS},
+            "log_records": len(records),
+            "header": header,
+        }
+        return chat
+
+    def load(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock(chat_id), _file_lock(self._paths(chat_id)["lock"]):
+            return self._read(chat_id)
+
+    def save(self, chat_id: str, data: Dict[str, Any], expected_version: Optional[int] = None) -> None:
+        paths = self._paths(chat_id)
+        with self._lock(chat_id), _file_lock(paths["lock"]):
+            state = self._state.get(chat_id)
+            disk_version = None
+            if paths["meta"].exists():
+                with paths["meta"].open("r", encoding="utf-8") as f:
+                    disk_version = json.load(f).get("version", 0)
+            if state is None or (state["header"] or {}).get("version", 0) != (disk_version or 0):
+                # First save in this process, or another process wrote since: refresh the append state
+                self._read(chat_id)
+                state = self._state.get(chat_id) or {"counts": {}, "log_records": 0, "header": None}
+            version = _check_version(chat_id, disk_version or 0, expected_version)
+            header = {k: v for k, v in data.items() if k not in MESSAGE_LISTS}
+            header.setdefault("metadata", {})
+            header["version"] = version
+
+            counts = state["counts"]
+            if any(len(data.get(name, [])) < counts.get(name, 0) for name in MESSAGE_LISTS):
+                # History was rewritten rather than appended to: start over from a fresh snapshot
+                _write_atomic(paths["snapshot"], {name: data.get(name, []) for name in MESSAGE_LISTS})
+                for key in ("log", "compacting"):
+                    paths[key].unlink(missing_ok=True)
+                state["counts"] = {name: len(data.get(name, [])) for name in MESSAGE_LISTS}
+                state["log_records"] = 0
+            else:
+                lines = []
+                for name in MESSAGE_LISTS:
+                    items = data.get(name, [])
+                    for seq in range(counts.get(name, 0), len(items)):
+                        lines.append(json.dumps({"list": name, "seq": seq, "item": items[seq]}, ensure_ascii=False) + "\n")
+                    counts[name] = len(items)
+                if lines:
+                    with paths["log"].open("a", encoding="utf-8") as f:
+                        f.write("".join(lines))
+                        f.flush()
+                        if self.fsync:
+                            os.fsync(f.fileno())
+                    state["log_records"] += len(lines)
+
+            # The header goes last so its version only moves once the records are durable
+            _write_atomic(paths["meta"], header, fsync=self.fsync)
+            state["header"] = header
+            data["version"] = version
+            if state["log_records"] >= self.compact_after and chat_id not in self._pending_compactions:
+                self._pending_compactions.add(chat_id)
+                self._compact_queue.put(chat_id)
+
+    def compact(self, chat_id: str) -> None:
+        """Fold the log into the snapshot; appends are only blocked while files are swapped"""
+        paths = self._paths(chat_id)
+        with self._lock(chat_id), _file_lock(paths["lock"]):
+            # A .compacting file left by an interrupted compaction is folded before the log is rotated again
+            if not paths["compacting"].exists():
+                if not paths["log"].exists():
+                    return
+                os.replace(paths["log"], paths["compacting"])
+                state = self._state.get(chat_id)
+                if state:
+                    state["log_records"] = 0
+
+        snapshot = empty_chat()
+        del snapshot["metadata"]
+        if paths["snapshot"].exists():
+            with paths["snapshot"].open("r", encoding="utf-8") as f:
+                snapshot.update(json.load(f))
+        records, _ = self._read_log(paths["compacting"])
+        for record in records:
+            items = snapshot.setdefault(record["list"], [])
+            if record["seq"] == len(items):
+                items.append(record["item"])
+
+        with self._lock(chat_id), _file_lock(paths["lock"]):
+            if not paths["compacting"].exists():
+                return  # a save rewrote the chat from scratch meanwhile
+            _write_atomic(paths["snapshot"], snapshot)
+            paths["compacting"].unlink()
+
+    def _compact_loop(self) -> None:
+        while True:
+            chat_id = self._compact_queue.get()
+            if chat_id is None:
+                return
+            try:
+                self.compact(chat_id)
+            except Exception as e:
+                print(f"⚠️ Compaction of chat {chat_id} failed: {e}")
+            finally:
+                self._pending_compactions.discard(chat_id)
+
+    def list_chats(self) -> List[Tuple[str, Dict[str, Any]]]:
+        chats = []
+        for file in self.root.glob("*.meta.json"):
+            try:
+                with file.open("r", encoding="utf-8") as f:
+                    chats.append((file.name[: -len(".meta.json")], json.load(f).get("metadata", {})))
+            except Exception:
+                continue
+        return chats
+
+    def close(self) -> None:
+        """Finish queued compactions and stop the compactor"""
+        self._compact_queue.put(None)
+        self._compactor.join()
+
+
+class AsyncChatStore:
+    """Awaitable front for a ChatStore for use inside async handlers.
+
+    Every file or database call runs on a small dedicated thread pool, so
+    parsing and writing a large chat never blocks the event loop. Pass
+    offload=False to run calls inline (only useful to measure the
+    difference).
+    """
+
+    def __init__(self, store: ChatStore, threads: int = STORAGE_THREADS, offload: bool = True) -> None:
+        self.store = store
+        self.offload = offload
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="chat-io")
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run any blocking storage call (e.g. an index query) on the storage threads"""
+        if not self.offload:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def exists(self, chat_id: str) -> bool:
+        return await self.run(self.store.exists, chat_id)
+
+    async def load(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        return await self.run(self.store.load, chat_id)
+
+    async def save(self, chat_id: str, data: Dict[str, Any], expected_version: Optional[int] = None) -> None:
+        await self.run(self.store.save, chat_id, data, expected_version)
+
+    async def list_chats(self) -> List[Tuple[str, Dict[str, Any]]]:
+        return await self.run(self.store.list_chats)
+
+    async def close(self) -> None:
+        await self.run(self.store.close)
+        self._executor.shutdown(wait=True)
+
+
+def open_chat_store(kind: Optional[str] = None) -> ChatStore:
+    """Backend named by `kind` or the CHAT_STORE env var; JSON files by default"""
+    kind = (kind or os.getenv("CHAT_STORE") or "json").lower()
+    if kind == "json":
+        return JsonChatStore(Path(os.getenv("CHAT_DIR") or DEFAULT_CHAT_DIR))
+    if kind == "sqlite":
+        return SqliteChatStore(Path(os.getenv("CHAT_DB_PATH") or DEFAULT_DB_PATH))
+    if kind == "jsonl":
+        return JsonlChatStore(Path(os.getenv("CHAT_JSONL_DIR") or DEFAULT_JSONL_DIR))
+    raise ValueError(f"Unknown CHAT_STORE backend: {kind}")
+
+
+def import_json_chats(target: ChatStore, chat_dir: Path = DEFAULT_CHAT_DIR, overwrite: bool = False) -> Dict[str, int]:
+    """Copy every chats/*.json file into another backend; existing chats are skipped unless overwrite"""
+    source = JsonChatStore(chat_dir)
+    counts = {"imported": 0, "skipped": 0, "failed": 0}
+    for file in sorted(source.chat_dir.glob("*.json")):
+        chat_id = file.stem
+        if target.exists(chat_id) and not overwrite:
+            counts["skipped"] += 1
+            continue
+        try:
+            data = source.load(chat_id)
+        except Exception as e:
+            print(f"❌ Could not read {file}: {e}")
+            counts["failed"] += 1
+            continue
+        if overwrite:
+            # Rewrite from scratch rather than appending onto stale rows
+            target.save(chat_id, {**data, **{name: [] for name in MESSAGE_LISTS}})
+        target.save(chat_id, data)
+        counts["imported"] += 1
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chat store maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    importer = sub.add_parser("import", help="Copy chats/*.json into the SQLite or JSONL store")
+    importer.add_argument("--backend", choices=["sqlite", "jsonl"], default="sqlite")
+    importer.add_argument("--chat-dir", default=str(DEFAULT_CHAT_DIR))
+    importer.add_argument("--db", default=str(DEFAULT_DB_PATH))
+    importer.add_argument("--jsonl-dir", default=str(DEFAULT_JSONL_DIR))
+    importer.add_argument("--overwrite", action="store_true", help="Replace chats already in the database")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        if args.backend == "sqlite":
+            store, target = SqliteChatStore(Path(args.db)), args.db
+        else:
+            store, target = JsonlChatStore(Path(args.jsonl_dir)), args.jsonl_dir
+        counts = import_json_chats(store, Path(args.chat_dir), overwrite=args.overwrite)
+        store.close()
+        print(f"✅ Imported {counts['imported']} chats into {target} "
+              f"({counts['skipped']} already present, {counts['failed']} unreadable)")
+
+
+if __name__ == "__main__":
+    main()
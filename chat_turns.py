@@ -0,0 +1,216 @@
+"""
+Bounded work queue for Gemini chat turns.
+
+Every turn is submitted to one asyncio queue of `max_queued` slots and
+processed by a fixed number of worker tasks. Each blocking Gemini call runs
+on the queue's own threads (one per worker), so a burst of turns can never
+take more than `workers` threads, and everything else the API does keeps
+its threads and its event loop. When the queue is full, submit() raises
+TurnQueueFull with an estimate of how long the backlog needs to drain,
+which the API returns as 429 with Retry-After. A burst is turned away early instead of
+piling up, so the wait of an accepted turn is bounded by roughly
+(queued / workers + 1) turn durations.
+
+Callers follow a turn by id (ChatTurn.snapshot) or consume its events
+(`token`, then `done` or `error`) to stream the reply.
+"""
+import asyncio
+import math
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_QUEUED = 32
+# Finished turns stay readable by id this long
+TURN_TTL_SECONDS = 300
+MAX_KEPT_TURNS = 1000
+# Assumed turn duration until real ones have been measured
+INITIAL_TURN_SECONDS = 5.0
+# How long close() lets queued and running turns finish
+DRAIN_SECONDS = 10.0
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+
+T = TypeVar("T")
+
+
+class TurnQueueFull(Exception):
+    """No room for another turn; retry_after is a wait estimate in whole seconds"""
+
+    def __init__(self, retry_after: int, closed: bool = False):
+        super().__init__("Chat turn queue is closed" if closed else f"Chat turn queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+        self.closed = closed
+
+
+class ChatTurn:
+    """One prompt for one chat, from submission to its recorded reply"""
+
+    def __init__(self, chat_id: str, prompt: str, stream: bool = False) -> None:
+        self.id = uuid.uuid4().hex
+        self.chat_id = chat_id
+        self.prompt = prompt
+        self.stream = stream
+        self.status = QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.error_status = 500
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # (event, data) pairs for a streaming client
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.finished = asyncio.Event()
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        if self.stream:
+            self.events.put_nowait((event, data))
+
+    def snapshot(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"turn_id": self.id, "chat_id": self.chat_id, "status": self.status}
+        if self.status == DONE:
+            data.update(self.result or {})
+        elif self.status == ERROR:
+            data["error"] = self.error
+        return data
+
+
+class ChatTurnQueue:
+    """Bounded FIFO of chat turns served by a fixed pool of workers.
+
+    `handler` does the work of a turn and returns its result; raising an
+    exception with a `status_code` (e.g. HTTPException) fails the turn with
+    that status. Workers are started on the first submit().
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[ChatTurn], Awaitable[Dict[str, Any]]],
+        workers: int = DEFAULT_WORKERS,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+    ) -> None:
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        self._queue: Optional["asyncio.Queue[ChatTurn]"] = None
+        self._tasks: List[asyncio.Task] = []
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="chat-turn")
+        self._turns: "OrderedDict[str, ChatTurn]" = OrderedDict()
+        self._running = 0
+        self._closed = False
+        self._turn_seconds = INITIAL_TURN_SECONDS
+        self.stats = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0}
+
+    def _ensure_workers(self) -> "asyncio.Queue[ChatTurn]":
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        return self._queue
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def retry_after(self) -> int:
+        """Seconds the current backlog needs to drain, from the average turn duration"""
+        backlog = self.queued + self._running
+        return max(1, math.ceil(self._turn_seconds * backlog / self.workers))
+
+    def submit(self, chat_id: str, prompt: str, stream: bool = False) -> ChatTurn:
+        """Queue a turn; TurnQueueFull when there is no room or the queue is shutting down"""
+        if self._closed:
+            raise TurnQueueFull(self.retry_after(), closed=True)
+        queue = self._ensure_workers()
+        turn = ChatTurn(chat_id, prompt, stream)
+        try:
+            queue.put_nowait(turn)
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise TurnQueueFull(self.retry_after())
+        self.stats["submitted"] += 1
+        self._turns[turn.id] = turn
+        self._prune()
+        return turn
+
+    def get(self, turn_id: str) -> Optional[ChatTurn]:
+        self._prune()
+        return self._turns.get(turn_id)
+
+    def position(self, turn: ChatTurn) -> int:
+        """1-based place of a queued turn in line, 0 once it has started"""
+        if turn.status != QUEUED or self._queue is None:
+            return 0
+        waiting = [t for t in self._turns.values() if t.status == QUEUED]
+        return next((i for i, t in enumerate(waiting, start=1) if t is turn), 0)
+
+    async def run_blocking(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run a blocking call (the Gemini request) on the queue's threads"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            turn = await self._queue.get()
+            try:
+                await self._process(turn)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, turn: ChatTurn) -> None:
+        turn.status = RUNNING
+        turn.started_at = time.time()
+        self._running += 1
+        try:
+            turn.result = await self.handler(turn)
+            turn.status = DONE
+            self.stats["done"] += 1
+            turn.emit("done", turn.result)
+        except asyncio.CancelledError:
+            turn.status, turn.error, turn.error_status = ERROR, "Server is shutting down", 503
+            turn.emit("error", {"detail": turn.error})
+            raise
+        except Exception as e:
+            turn.status = ERROR
+            turn.error = str(getattr(e, "detail", None) or e)
+            turn.error_status = getattr(e, "status_code", 500)
+            self.stats["failed"] += 1
+            turn.emit("error", {"detail": turn.error})
+        finally:
+            self._running -= 1
+            turn.finished_at = time.time()
+            # Moving average of how long turns take, for Retry-After
+            self._turn_seconds = 0.8 * self._turn_seconds + 0.2 * (turn.finished_at - turn.started_at)
+            turn.finished.set()
+
+    def _prune(self) -> None:
+        """Forget finished turns past their TTL, and the oldest finished ones beyond MAX_KEPT_TURNS"""
+        cutoff = time.time() - TURN_TTL_SECONDS
+        for turn_id, turn in list(self._turns.items()):
+            if turn.finished_at is not None and (turn.finished_at < cutoff or len(self._turns) > MAX_KEPT_TURNS):
+                del self._turns[turn_id]
+
+    async def close(self) -> None:
+        """Stop accepting turns, give queued ones DRAIN_SECONDS to finish, then cancel the rest"""
+        self._closed = True
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=DRAIN_SECONDS)
+            except asyncio.TimeoutError:
+                print(f"⚠️ Cancelling {self.queued + self._running} unfinished chat turns")
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            while not self._queue.empty():
+                turn = self._queue.get_nowait()
+                turn.status, turn.error, turn.error_status = ERROR, "Server is shutting down", 503
+                turn.emit("error", {"detail": turn.error})
+                turn.finished.set()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,179 @@
+"""
+Per-provider circuit breakers for the tool engine.
+
+A breaker opens after a run of consecutive failures or slow calls. While
+open, calls fail fast with a "circuit_open" marker instead of waiting on a
+degraded provider. After the reset timeout a limited number of half-open
+probes go through; a successful probe closes the breaker again, a failed
+one re-opens it. Each allowed call carries a Permit, so a call that was
+already in flight when the breaker opened cannot be mistaken for a probe. The registry is process-wide, so one bad provider is
+detected once and skipped by every in-flight enrichment.
+"""
+import time
+from typing import Any, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BreakerSettings:
+    """Thresholds for one provider"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        slow_call_seconds: Optional[float] = None,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        # Consecutive failures (slow calls included) that open the breaker
+        self.failure_threshold = failure_threshold
+        # Calls slower than this count as failures even if they succeed
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+
+# Script-backed providers include subprocess start-up in their latency
+PROVIDER_BREAKER_SETTINGS: Dict[str, BreakerSettings] = {
+    "numverify": BreakerSettings(failure_threshold=3, slow_call_seconds=15, reset_timeout=30),
+    "twitter": BreakerSettings(failure_threshold=3, slow_call_seconds=15, reset_timeout=30),
+    "serpapi": BreakerSettings(failure_threshold=5, slow_call_seconds=20, reset_timeout=30),
+    "firecrawl": BreakerSettings(failure_threshold=5, slow_call_seconds=30, reset_timeout=30),
+    # BrightData polls a snapshot every 5s, so only a very long collection is abnormal
+    "linkedin": BreakerSettings(failure_threshold=2, slow_call_seconds=90, reset_timeout=120),
+}
+
+
+class Permit:
+    """Permission for one call, returned by CircuitBreaker.allow()"""
+
+    __slots__ = ("probe", "generation")
+
+    def __init__(self, probe: bool, generation: int):
+        # Whether this call is a half-open probe
+        self.probe = probe
+        # Which period between openings of the breaker the call was allowed in
+        self.generation = generation
+
+
+class CircuitBreaker:
+    """Closed -> open -> half-open state machine for one provider"""
+
+    def __init__(self, name: str, settings: Optional[BreakerSettings] = None, clock=time.monotonic):
+        self.name = name
+        self.settings = settings or BreakerSettings()
+        self._clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_in_flight = 0
+        self._generation = 0
+        self.stats = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "times_opened": 0}
+
+    def _maybe_half_open(self) -> None:
+        if self.state == OPEN and self._clock() - self.opened_at >= self.settings.reset_timeout:
+            self.state = HALF_OPEN
+            self.half_open_in_flight = 0
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected; does not claim a probe slot"""
+        self._maybe_half_open()
+        if self.state == OPEN:
+            return True
+        return self.state == HALF_OPEN and self.half_open_in_flight >= self.settings.half_open_max_calls
+
+    def allow(self) -> Optional[Permit]:
+        """Claim permission for one call, or None if rejected.
+
+        Every permit must be handed back to record() or release().
+        """
+        self._maybe_half_open()
+        if self.state == CLOSED:
+            return Permit(False, self._generation)
+        if self.state == HALF_OPEN and self.half_open_in_flight < self.settings.half_open_max_calls:
+            self.half_open_in_flight += 1
+            return Permit(True, self._generation)
+        self.stats["rejected"] += 1
+        return None
+
+    def _finish(self, permit: Permit) -> bool:
+        """Free the permit's probe slot; False if the breaker has opened since it was allowed"""
+        if permit.generation != self._generation:
+            return False
+        if permit.probe:
+            self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+        return True
+
+    def record(self, permit: Permit, success: bool, seconds: float) -> None:
+        """Outcome of an allowed call"""
+        self.stats["calls"] += 1
+        slow = self.settings.slow_call_seconds is not None and seconds > self.settings.slow_call_seconds
+        if slow:
+            self.stats["slow_calls"] += 1
+        if not success:
+            self.stats["failures"] += 1
+        if not self._finish(permit):
+            return  # in flight when the breaker opened; says nothing about the provider now
+        if success and not slow:
+            self.consecutive_failures = 0
+            if permit.probe:
+                self.state = CLOSED
+                print(f"✅ Circuit for {self.name} closed - probe succeeded")
+            return
+        self.consecutive_failures += 1
+        if permit.probe or self.consecutive_failures >= self.settings.failure_threshold:
+            self._open()
+
+    def release(self, permit: Permit) -> None:
+        """An allowed call ended without an outcome (e.g. cancelled)"""
+        self._finish(permit)
+
+    def _open(self) -> None:
+        if self.state != OPEN:
+            self.stats["times_opened"] += 1
+            print(f"⚡ Circuit for {self.name} opened after {self.consecutive_failures} failed/slow calls")
+        self.state = OPEN
+        self.opened_at = self._clock()
+        self.half_open_in_flight = 0
+        self._generation += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._maybe_half_open()
+        return {"state": self.state, "consecutive_failures": self.consecutive_failures, **self.stats}
+
+
+class CircuitBreakerRegistry:
+    """One breaker per provider, created on first use"""
+
+    def __init__(self, settings: Optional[Dict[str, BreakerSettings]] = None):
+        self.settings = dict(PROVIDER_BREAKER_SETTINGS if settings is None else settings)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str) -> CircuitBreaker:
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            breaker = self._breakers[provider] = CircuitBreaker(provider, self.settings.get(provider))
+        return breaker
+
+    def reset(self) -> None:
+        self._breakers.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: breaker.snapshot() for name, breaker in self._breakers.items()}
+
+
+def is_provider_failure(result: Dict[str, Any]) -> bool:
+    """Whether a tool result says the provider misbehaved, as opposed to e.g. an unknown user"""
+    if result.get("success"):
+        return False
+    status = result.get("status")
+    if isinstance(status, int) and 400 <= status < 500 and status != 429:
+        return False
+    error = str(result.get("error", "")).lower()
+    return not any(marker in error for marker in ("404", "not found", "no such user"))
+
+
+# Shared by every ToolWrappers instance in the process
+DEFAULT_BREAKERS = CircuitBreakerRegistry()
@@ -0,0 +1,101 @@
+"""
+Deterministic extraction of links, handles and emails from free-text context.
+
+Runs in microseconds, so the orchestrator can start Twitter, LinkedIn and
+direct scrapes for anything stated outright in `context_info` while Gemini
+is still parsing it.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from link_ranker import canonicalize_url
+
+
+_TRAILING_PUNCT = ".,;:!?)]}'\""
+
+_URL_RE = re.compile(
+    r"(?:https?://|www\.)[^\s<>\"'()\[\]{}]+"
+    r"|\b(?:[a-z]{2,3}\.)?(?:linkedin\.com|twitter\.com|x\.com|github\.com|instagram\.com|medium\.com|substack\.com)/[^\s<>\"'()\[\]{}]+",
+    re.IGNORECASE,
+)
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+_HANDLE_RE = re.compile(r"(?<![\w.@/])@([A-Za-z0-9_](?:[A-Za-z0-9_.]{0,29}[A-Za-z0-9_])?)")
+# "twitter: jdoe", "github username = jdoe", "instagram handle: @jdoe", "x handle: jdoe".
+# A bare "x" needs the handle/username/account word, or "Company X: Acme" would read as a handle
+_LABELLED_RE = re.compile(
+    r"\b(?:(twitter|github|instagram|insta|telegram|tiktok|threads)(?:\s+(?:handle|username|user|id|account))?"
+    r"|(x)\s+(?:handle|username|account))"
+    r"\s*[:=]\s*@?([A-Za-z0-9_][A-Za-z0-9_.-]{0,38})",
+    re.IGNORECASE,
+)
+_PLATFORM_HINT_RE = re.compile(
+    r"\b(twitter|tweets?|x\.com|github|instagram|insta|ig|telegram|tiktok|threads)\b", re.IGNORECASE
+)
+_PLATFORM_ALIASES = {
+    "twitter": "twitter", "tweet": "twitter", "tweets": "twitter", "x": "twitter", "x.com": "twitter",
+    "github": "github", "instagram": "instagram", "insta": "instagram", "ig": "instagram",
+    "telegram": "telegram", "tiktok": "tiktok", "threads": "threads",
+}
+# Paths on platform hosts that are not user profiles
+_RESERVED_PATHS = {"home", "search", "intent", "share", "i", "hashtag", "explore", "login", "settings", "orgs", "topics"}
+HINT_WINDOW = 30
+
+
+def _platform_from_url(canonical: str) -> Optional[tuple]:
+    """(platform, username) for a profile URL on a known platform"""
+    match = re.match(r"https://([^/]+)/([^/?#]+)(?:/([^/?#]+))?", canonical)
+    if not match:
+        return None
+    host, first, second = match.group(1), match.group(2), match.group(3)
+    if host == "linkedin.com":
+        return ("linkedin", second) if first == "in" and second else None
+    if first.lower() in _RESERVED_PATHS:
+        return None
+    platform = {"x.com": "twitter", "github.com": "github", "instagram.com": "instagram"}.get(host)
+    return (platform, first) if platform else None
+
+
+def _hinted_platform(text: str, start: int, end: int) -> Optional[str]:
+    """Platform named just before a handle ("twitter handle: @x") or just after ("@x on twitter")"""
+    before = list(_PLATFORM_HINT_RE.finditer(text[max(0, start - HINT_WINDOW):start]))
+    if before:
+        return _PLATFORM_ALIASES[before[-1].group(1).lower()]
+    after = _PLATFORM_HINT_RE.search(text[end:end + HINT_WINDOW])
+    return _PLATFORM_ALIASES[after.group(1).lower()] if after else None
+
+
+def extract_context(context_info: str) -> Dict[str, Any]:
+    """URLs, platform usernames, unassigned @handles and emails stated in the context"""
+    text = context_info or ""
+    links: List[str] = []
+    seen = set()
+    usernames: Dict[str, str] = {}
+
+    for match in _URL_RE.finditer(text):
+        raw = match.group(0).rstrip(_TRAILING_PUNCT)
+        url = raw if raw.lower().startswith("http") else f"https://{raw}"
+        canonical = canonicalize_url(url)
+        if canonical in seen:
+            continue
+        seen.add(canonical)
+        links.append(url)
+        profile = _platform_from_url(canonical)
+        if profile:
+            usernames.setdefault(profile[0], profile[1])
+
+    emails = list(dict.fromkeys(m.group(0) for m in _EMAIL_RE.finditer(text)))
+
+    for match in _LABELLED_RE.finditer(text):
+        platform = _PLATFORM_ALIASES[(match.group(1) or match.group(2)).lower()]
+        usernames.setdefault(platform, match.group(3).rstrip(_TRAILING_PUNCT))
+
+    unassigned: List[str] = []
+    for match in _HANDLE_RE.finditer(text):
+        handle = match.group(1)
+        platform = _hinted_platform(text, match.start(), match.end())
+        if platform and usernames.setdefault(platform, handle) == handle:
+            continue
+        if handle not in unassigned and handle not in usernames.values():
+            unassigned.append(handle)
+
+    return {"links": links, "usernames": usernames, "handles": unassigned, "emails": emails}
@@ -0,0 +1,174 @@
+"""
+Priority crawl frontier for the scraping stages.
+
+Every stage feeds candidate URLs in with an estimated relevance: priority
+links from step 4, links in the Twitter bio, and links harvested from the
+markdown of pages already scraped. A pool of workers pops the best
+candidate next, so scraping effort goes to the highest-value pages within
+page, depth and time budgets instead of fixed slot counts.
+"""
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from link_ranker import canonicalize_url, domain_prior
+from relevance import TargetProfile, score_page
+
+
+CRAWL_WORKERS = 4
+# Children of a page inherit this share of its relevance per hop
+DEPTH_DECAY = 0.7
+# domain_prior of a personal site / portfolio; evidence-free links are only followed within one
+PERSONAL_SITE_PRIOR = 0.8
+# Profiles on these hosts go through their dedicated fetchers, never Firecrawl
+FETCHER_HOSTS = ("linkedin.com", "x.com")
+
+_MD_LINK_RE = re.compile(r"(?<!!)\[([^\]]*)\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"]*\")?\s*\)")
+_BARE_URL_RE = re.compile(r"(?<![(\[<])https?://[^\s<>\"'()\[\]]+")
+_SKIP_SCHEMES = ("mailto:", "tel:", "javascript:", "#")
+_ASSET_RE = re.compile(r"\.(?:png|jpe?g|gif|svg|webp|ico|css|js|zip|gz|mp4|mp3|woff2?)$", re.IGNORECASE)
+
+
+class CrawlBudget:
+    """Limits for one crawl"""
+
+    def __init__(self, max_pages: int = 10, max_depth: int = 2, max_seconds: float = 90.0, min_score: float = 0.15):
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.max_seconds = max_seconds
+        # Harvested links estimated below this are not worth a scrape
+        self.min_score = min_score
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "max_pages": self.max_pages,
+            "max_depth": self.max_depth,
+            "max_seconds": self.max_seconds,
+            "min_score": self.min_score,
+        }
+
+
+def harvest_links(markdown: str, base_url: str) -> List[Tuple[str, str]]:
+    """(absolute url, anchor text) for every followable link in a page's markdown"""
+    found: List[Tuple[str, str]] = []
+    for anchor, href in _MD_LINK_RE.findall(markdown or ""):
+        found.append((href, anchor))
+    for href in _BARE_URL_RE.findall(markdown or ""):
+        found.append((href.rstrip(".,;:!?"), ""))
+
+    links = []
+    for href, anchor in found:
+        if href.lower().startswith(_SKIP_SCHEMES):
+            continue
+        url = urljoin(base_url, href) if base_url else href
+        if not url.startswith(("http://", "https://")) or _ASSET_RE.search(urlsplit(url).path):
+            continue
+        links.append((url, anchor.strip()))
+    return links
+
+
+class CrawlFrontier:
+    """Max-priority queue of URLs to scrape, deduplicated on canonical URL"""
+
+    def __init__(self, profile: TargetProfile, budget: Optional[CrawlBudget] = None):
+        self.profile = profile
+        self.budget = budget or CrawlBudget()
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._order = itertools.count()
+        self._seen: set = set()
+        self._changed = asyncio.Event()
+        self._producers_done = False
+        self._started = time.perf_counter()
+        self.in_flight = 0
+        self.dispatched = 0
+        self.log: List[Dict[str, Any]] = []
+
+    def push(self, url: str, score: float, depth: int = 0, source: str = "") -> bool:
+        """Queue a URL unless it was seen already, is too deep, or belongs to a dedicated fetcher"""
+        canonical = canonicalize_url(url)
+        host = urlsplit(canonical).netloc
+        if canonical in self._seen or depth > self.budget.max_depth or host in FETCHER_HOSTS:
+            return False
+        self._seen.add(canonical)
+        entry = {"url": url, "canonical_url": canonical, "score": round(score, 3), "depth": depth, "source": source}
+        heapq.heappush(self._heap, (-score, next(self._order), entry))
+        self._changed.set()
+        return True
+
+    def mark_seen(self, url: str) -> None:
+        """Record a URL scraped outside the frontier so it is never queued again"""
+        self._seen.add(canonicalize_url(url))
+
+    def score_link(self, url: str, anchor: str, parent_relevance: float, depth: int, parent_url: str = "") -> float:
+        """Estimated value of a link: kind of page, anchor/URL evidence, parent relevance, hop count.
+
+        A harvested link with no evidence about the target (site navigation,
+        footers) scores 0 unless it stays on the target's own personal site.
+        """
+        evidence = score_page(self.profile, anchor, url)["score"]
+        prior = domain_prior(url, self.profile)
+        if evidence == 0 and parent_url:
+            same_host = urlsplit(canonicalize_url(url)).netloc == urlsplit(canonicalize_url(parent_url)).netloc
+            if not (same_host and domain_prior(parent_url, self.profile) >= PERSONAL_SITE_PRIOR):
+                return 0.0
+        base = 0.5 * prior + 0.5 * evidence
+        return base * (0.5 + 0.5 * parent_relevance) * (DEPTH_DECAY ** depth)
+
+    def harvest(self, markdown: str, page_url: str, parent_relevance: float, parent_depth: int) -> int:
+        """Queue the links found on a scraped page; returns how many were new"""
+        depth = parent_depth + 1
+        if depth > self.budget.max_depth:
+            return 0
+        added = 0
+        for url, anchor in harvest_links(markdown, page_url):
+            score = self.score_link(url, anchor, parent_relevance, depth, parent_url=page_url)
+            if score >= self.budget.min_score and self.push(url, score, depth, source=f"harvested:{page_url}"):
+                added += 1
+        return added
+
+    def producers_finished(self) -> None:
+        """No stage will push seeds any more; workers may stop once the queue drains"""
+        self._producers_done = True
+        self._changed.set()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def _exhausted(self) -> bool:
+        return self.dispatched >= self.budget.max_pages or self.elapsed() >= self.budget.max_seconds
+
+    async def next(self) -> Optional[Dict[str, Any]]:
+        """Best queued URL, waiting while in-flight pages or producers may still add more; None when done"""
+        while True:
+            if self._exhausted():
+                return None
+            if self._heap:
+                _, _, entry = heapq.heappop(self._heap)
+                self.in_flight += 1
+                self.dispatched += 1
+                return entry
+            if self._producers_done and self.in_flight == 0:
+                return None
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=max(0.0, self.budget.max_seconds - self.elapsed()))
+            except asyncio.TimeoutError:
+                return None
+
+    def done(self, entry: Dict[str, Any], scraped: bool, relevance: Optional[float] = None) -> None:
+        self.in_flight -= 1
+        self.log.append({**entry, "scraped": scraped, "relevance": relevance, "at": round(self.elapsed(), 3)})
+        self._changed.set()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "budget": self.budget.to_dict(),
+            "pages_dispatched": self.dispatched,
+            "queued_unvisited": [e for _, _, e in sorted(self._heap)][:20],
+            "visited": self.log,
+            "seconds": round(self.elapsed(), 3),
+        }
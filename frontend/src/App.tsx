@@ -1,37 +1,75 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import Sidebar from './components/Sidebar';
 import TelegramChatPane from './components/TelegramChatPane';
 import GeminiChatPane from './components/GeminiChatPane';
-import type { Chat, ChatSummary } from './types';
-import { createChat, getChat, listChats } from './api';
+import type { Chat, ChatMessage, ChatSummary } from './types';
+import { createChat, getChat, getChatMessages, listChats } from './api';
+import { lastSeq, mergeMessages } from './chatSync';
 
 const App: React.FC = () => {
   const [chats, setChats] = useState<ChatSummary[]>([]);
+  const [totalChats, setTotalChats] = useState(0);
+  const [chatQuery, setChatQuery] = useState('');
   const [activeChatId, setActiveChatId] = useState<string | null>(null);
   const [activeChat, setActiveChat] = useState<Chat | null>(null);
   const [loadingChat, setLoadingChat] = useState(false);
+  // Chats opened in this session; reopening one only fetches what it is missing
+  const chatCache = useRef<Record<string, Chat>>({});
+  const activeIdRef = useRef<string | null>(null);
+
+  function showChat(id: string, chat: Chat) {
+    chatCache.current[id] = chat;
+    if (activeIdRef.current === id) setActiveChat(chat);
+  }
+
+  function handleMessagesAppended(id: string, messages: ChatMessage[]) {
+    const cached = chatCache.current[id];
+    if (cached) showChat(id, mergeMessages(cached, messages));
+  }
 
   useEffect(() => {
-    listChats()
-      .then(setChats)
+    listChats({ q: chatQuery })
+      .then((page) => {
+        setChats(page.chats);
+        setTotalChats(page.total);
+      })
       .catch(() => {
         // ignore initial load errors
       });
-  }, []);
+  }, [chatQuery]);
+
+  async function handleLoadMoreChats() {
+    const page = await listChats({ q: chatQuery, offset: chats.length });
+    setChats((prev) => [...prev, ...page.chats.filter((c) => !prev.some((p) => p.id === c.id))]);
+    setTotalChats(page.total);
+  }
 
   useEffect(() => {
+    activeIdRef.current = activeChatId;
     if (!activeChatId) return;
+    const cached = chatCache.current[activeChatId];
+    if (cached) {
+      setActiveChat(cached);
+      getChatMessages(activeChatId, { afterSeq: lastSeq(cached) })
+        .then((res) => handleMessagesAppended(activeChatId, res.messages))
+        .catch(() => {
+          // keep showing the cached copy
+        });
+      return;
+    }
+    setActiveChat(null);
     setLoadingChat(true);
     getChat(activeChatId)
-      .then((res) => setActiveChat(res.chat))
+      .then((res) => showChat(activeChatId, res.chat))
       .finally(() => setLoadingChat(false));
   }, [activeChatId]);
 
   async function handleCreateChat(data: { client_phone: string; client_name: string; client_details: string }) {
     const res = await createChat(data);
-    setChats((prev) => [...prev, { id: res.id, metadata: res.chat.metadata }]);
+    setChats((prev) => [{ id: res.id, metadata: res.chat.metadata }, ...prev]);
+    setTotalChats((n) => n + 1);
+    chatCache.current[res.id] = res.chat;
     setActiveChatId(res.id);
-    setActiveChat(res.chat);
   }
 
   function handleSelectChat(id: string) {
@@ -42,6 +80,10 @@ const App: React.FC = () => {
     <div style={{ display: 'flex', height: '100vh', background: '#0f1419', color: '#e5e7eb' }}>
       <Sidebar
         chats={chats}
+        totalChats={totalChats}
+        query={chatQuery}
+        onQueryChange={setChatQuery}
+        onLoadMore={handleLoadMoreChats}
         activeChatId={activeChatId}
         onSelectChat={handleSelectChat}
         onCreateChat={handleCreateChat}
@@ -65,7 +107,11 @@ const App: React.FC = () => {
         >
           <div style={{ flex: 1, minWidth: 0, display: 'flex', flexDirection: 'column' }}>
             {activeChatId ? (
-              <TelegramChatPane chatId={activeChatId} chat={activeChat} />
+              <TelegramChatPane
+                chatId={activeChatId}
+                chat={activeChat}
+                onMessagesAppended={(messages) => handleMessagesAppended(activeChatId, messages)}
+              />
             ) : (
               <div
                 style={{
@@ -142,7 +188,11 @@ const App: React.FC = () => {
                   Loading ConvoSphere...
                 </div>
               )}
-              <GeminiChatPane chatId={activeChatId} chat={activeChat} onChatUpdated={setActiveChat} />
+              <GeminiChatPane
+                chatId={activeChatId}
+                chat={activeChat}
+                onMessagesAppended={(messages) => handleMessagesAppended(activeChatId, messages)}
+              />
             </div>
           )}
         </div>
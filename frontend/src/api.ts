@@ -1,4 +1,4 @@
-import type { ChatSummary, Chat, TelegramMessage } from './types';
+import type { ChatPage, Chat, ChatMessage, MessageWindow, TelegramMessage } from './types';
 
 const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000';
 
@@ -9,13 +9,33 @@ async function jsonFetch<T>(url: string, init?: RequestInit): Promise<T> {
   });
   if (!res.ok) {
     const text = await res.text();
-    throw new Error(`Request failed ${res.status}: ${text}`);
+    throw new Error(`Request failed ${res.status}: ${text}${retryHint(res)}`);
   }
   return res.json() as Promise<T>;
 }
 
-export function listChats(): Promise<ChatSummary[]> {
-  return jsonFetch<ChatSummary[]>(`${API_BASE}/api/chats`);
+// Set when the Gemini turn queue is full (429) or shutting down (503)
+function retryHint(res: Response): string {
+  const retryAfter = res.headers.get('Retry-After');
+  return retryAfter ? ` (retry in ${retryAfter}s)` : '';
+}
+
+export const CHAT_PAGE_SIZE = 50;
+
+export async function listChats(params: { q?: string; offset?: number; limit?: number } = {}): Promise<ChatPage> {
+  const query = new URLSearchParams({
+    q: params.q ?? '',
+    sort: 'recent',
+    limit: String(params.limit ?? CHAT_PAGE_SIZE),
+    offset: String(params.offset ?? 0),
+  });
+  const res = await fetch(`${API_BASE}/api/chats?${query}`);
+  if (!res.ok) {
+    const text = await res.text();
+    throw new Error(`Request failed ${res.status}: ${text}`);
+  }
+  const chats = await res.json();
+  return { chats, total: Number(res.headers.get('X-Total-Count') ?? chats.length) };
 }
 
 export function createChat(body: {
@@ -29,25 +49,112 @@ export function createChat(body: {
   });
 }
 
-export function getChat(chatId: string): Promise<{ id: string; chat: Chat }> {
-  return jsonFetch<{ id: string; chat: Chat }>(`${API_BASE}/api/chats/${encodeURIComponent(chatId)}`);
+export function getChat(chatId: string): Promise<{ id: string; chat: Chat; last_seq: number }> {
+  return jsonFetch<{ id: string; chat: Chat; last_seq: number }>(`${API_BASE}/api/chats/${encodeURIComponent(chatId)}`);
+}
+
+/** Messages after `afterSeq` (catching up) or the `limit` messages before `beforeSeq` (older history). */
+export function getChatMessages(
+  chatId: string,
+  params: { afterSeq?: number; beforeSeq?: number; limit?: number },
+): Promise<MessageWindow> {
+  const query = new URLSearchParams();
+  if (params.afterSeq !== undefined) query.set('after_seq', String(params.afterSeq));
+  if (params.beforeSeq !== undefined) query.set('before_seq', String(params.beforeSeq));
+  if (params.limit !== undefined) query.set('limit', String(params.limit));
+  return jsonFetch<MessageWindow>(`${API_BASE}/api/chats/${encodeURIComponent(chatId)}?${query}`);
 }
 
-export function sendTelegram(chatId: string, text: string): Promise<{ success: boolean }> {
-  return jsonFetch<{ success: boolean }>(`${API_BASE}/api/telegram/send`, {
+export function sendTelegram(
+  chatId: string,
+  text: string,
+): Promise<{ success: boolean; messages: ChatMessage[]; last_seq: number }> {
+  return jsonFetch<{ success: boolean; messages: ChatMessage[]; last_seq: number }>(`${API_BASE}/api/telegram/send`, {
     method: 'POST',
     body: JSON.stringify({ chat_id: chatId, text }),
   });
 }
 
-export function pollTelegram(chatId: string): Promise<{ messages: TelegramMessage[] }> {
+export function pollTelegram(
+  chatId: string,
+): Promise<{ messages: TelegramMessage[]; appended: ChatMessage[]; last_seq: number }> {
   const url = `${API_BASE}/api/telegram/messages?chat_id=${encodeURIComponent(chatId)}`;
-  return jsonFetch<{ messages: TelegramMessage[] }>(url);
+  return jsonFetch<{ messages: TelegramMessage[]; appended: ChatMessage[]; last_seq: number }>(url);
+}
+
+type GeminiTurn = {
+  turn_id: string;
+  status: 'queued' | 'running' | 'done' | 'error';
+  position: number;
+  reply?: string;
+  messages?: ChatMessage[];
+  last_seq?: number;
+  error?: string;
+};
+
+// Seconds each turn status request is held open while the reply is pending
+const TURN_WAIT_SECONDS = 25;
+
+export function getGeminiTurn(turnId: string, wait = 0): Promise<GeminiTurn> {
+  const url = `${API_BASE}/api/gemini/turns/${encodeURIComponent(turnId)}?wait=${wait}`;
+  return jsonFetch<GeminiTurn>(url);
 }
 
-export function sendGemini(chatId: string, text: string): Promise<{ reply: string; chat: Chat }> {
-  return jsonFetch<{ reply: string; chat: Chat }>(`${API_BASE}/api/gemini/send`, {
+export async function sendGemini(
+  chatId: string,
+  text: string,
+): Promise<{ reply: string; messages: ChatMessage[]; last_seq: number }> {
+  let turn = await jsonFetch<GeminiTurn>(`${API_BASE}/api/gemini/send`, {
     method: 'POST',
     body: JSON.stringify({ chat_id: chatId, text }),
   });
+  while (turn.status === 'queued' || turn.status === 'running') {
+    turn = await getGeminiTurn(turn.turn_id, TURN_WAIT_SECONDS);
+  }
+  if (turn.status === 'error') throw new Error(turn.error ?? 'Gemini turn failed');
+  return { reply: turn.reply ?? '', messages: turn.messages ?? [], last_seq: turn.last_seq ?? 0 };
+}
+
+export async function streamGemini(
+  chatId: string,
+  text: string,
+  onToken: (chunk: string) => void,
+): Promise<{ reply: string; messages: ChatMessage[] }> {
+  const res = await fetch(`${API_BASE}/api/gemini/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ chat_id: chatId, text }),
+  });
+  if (!res.ok || !res.body) {
+    const body = await res.text();
+    throw new Error(`Request failed ${res.status}: ${body}${retryHint(res)}`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let sep = buffer.indexOf('\n\n');
+    while (sep !== -1) {
+      const raw = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      sep = buffer.indexOf('\n\n');
+
+      let event = 'message';
+      let data = '';
+      for (const line of raw.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (!data) continue;
+      const payload = JSON.parse(data);
+      if (event === 'token') onToken(payload.text);
+      else if (event === 'done') return { reply: payload.reply, messages: payload.messages ?? [] };
+      else if (event === 'error') throw new Error(payload.detail);
+    }
+  }
+  throw new Error('Stream ended before the reply completed');
 }
@@ -0,0 +1,45 @@
+import type { Chat, ChatMessage, TelegramMessage } from './types';
+
+export function lastSeq(chat: Chat): number {
+  return chat.messages.length ? chat.messages[chat.messages.length - 1].seq : 0;
+}
+
+/**
+ * Apply messages returned by a write or a catch-up fetch, by seq: anything already held is
+ * skipped, and replies that arrive out of order (an SSE `done` after a later poll) still land.
+ */
+export function mergeMessages(chat: Chat, messages: ChatMessage[]): Chat {
+  const held = new Set(chat.messages.map((m) => m.seq));
+  const fresh: ChatMessage[] = [];
+  for (const m of messages) {
+    if (held.has(m.seq)) continue;
+    held.add(m.seq);
+    fresh.push(m);
+  }
+  if (!fresh.length) return chat;
+  return { ...chat, messages: [...chat.messages, ...fresh].sort((a, b) => a.seq - b.seq) };
+}
+
+/** Prompts and replies of the Gemini pane, index-aligned. */
+export function geminiPairs(chat: Chat | null): { past: string[]; generated: string[] } {
+  const past: string[] = [];
+  const generated: string[] = [];
+  for (const m of chat?.messages ?? []) {
+    if (m.channel !== 'gemini') continue;
+    if (m.dir === 'out') past.push(m.text);
+    else generated.push(m.text);
+  }
+  return { past, generated };
+}
+
+/** The Telegram pane's view of a chat. */
+export function telegramMessages(chat: Chat | null): TelegramMessage[] {
+  return (chat?.messages ?? [])
+    .filter((m) => m.channel === 'telegram')
+    .map((m) => ({
+      sender: m.dir === 'out' ? 'You' : m.sender || 'Telegram',
+      text: m.text,
+      timestamp: m.ts,
+      seq: m.seq,
+    }));
+}
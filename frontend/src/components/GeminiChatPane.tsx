@@ -1,27 +1,31 @@
-import React, { useEffect, useRef, useState } from 'react';
-import type { Chat } from '../types';
-import { sendGemini } from '../api';
+import React, { useEffect, useMemo, useRef, useState } from 'react';
+import type { Chat, ChatMessage } from '../types';
+import { streamGemini } from '../api';
+import { geminiPairs } from '../chatSync';
 
 interface Props {
   chatId: string | null;
   chat: Chat | null;
-  onChatUpdated: (chat: Chat) => void;
+  onMessagesAppended: (messages: ChatMessage[]) => void;
 }
 
-const GeminiChatPane: React.FC<Props> = ({ chatId, chat, onChatUpdated }) => {
+const GeminiChatPane: React.FC<Props> = ({ chatId, chat, onMessagesAppended }) => {
   const [input, setInput] = useState('');
   const [sending, setSending] = useState(false);
   const [isTyping, setIsTyping] = useState(false);
+  const [pending, setPending] = useState<{ prompt: string; reply: string } | null>(null);
   const scrollRef = useRef<HTMLDivElement | null>(null);
 
-  const past = chat?.past ?? [];
-  const generated = chat?.generated ?? [];
+  const pairs = useMemo(() => geminiPairs(chat), [chat]);
+  // While a reply streams in, show it as a provisional last turn
+  const past = pending ? [...pairs.past, pending.prompt] : pairs.past;
+  const generated = pending ? [...pairs.generated, pending.reply] : pairs.generated;
 
   useEffect(() => {
     if (scrollRef.current) {
       scrollRef.current.scrollTop = scrollRef.current.scrollHeight;
     }
-  }, [past.length, generated.length]);
+  }, [past.length, generated.length, pending?.reply]);
 
   useEffect(() => {
     setIsTyping(input.length > 0);
@@ -36,11 +40,18 @@ const GeminiChatPane: React.FC<Props> = ({ chatId, chat, onChatUpdated }) => {
     }
     const text = input.trim();
     setSending(true);
+    setPending({ prompt: text, reply: '' });
+    setInput('');
     try {
-      const { chat: updated } = await sendGemini(chatId, text);
-      onChatUpdated(updated);
-      setInput('');
+      const { messages } = await streamGemini(chatId, text, (chunk) => {
+        setPending((prev) => (prev ? { ...prev, reply: prev.reply + chunk } : prev));
+      });
+      onMessagesAppended(messages);
+    } catch (err) {
+      setInput(text);
+      throw err;
     } finally {
+      setPending(null);
       setSending(false);
     }
   }
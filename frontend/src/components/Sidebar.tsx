@@ -3,18 +3,42 @@ import type { ChatSummary } from '../types';
 
 interface Props {
   chats: ChatSummary[];
+  totalChats: number;
+  query: string;
+  onQueryChange: (q: string) => void;
+  onLoadMore: () => Promise<void>;
   activeChatId: string | null;
   onSelectChat: (id: string) => void;
   onCreateChat: (data: { client_phone: string; client_name: string; client_details: string }) => Promise<void>;
 }
 
-const Sidebar: React.FC<Props> = ({ chats, activeChatId, onSelectChat, onCreateChat }) => {
+const Sidebar: React.FC<Props> = ({
+  chats,
+  totalChats,
+  query,
+  onQueryChange,
+  onLoadMore,
+  activeChatId,
+  onSelectChat,
+  onCreateChat,
+}) => {
   const [phone, setPhone] = useState('');
   const [name, setName] = useState('');
   const [details, setDetails] = useState('');
   const [goal, setGoal] = useState('');
   const [creating, setCreating] = useState(false);
   const [showNew, setShowNew] = useState(false);
+  const [showSearch, setShowSearch] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  async function handleLoadMore() {
+    setLoadingMore(true);
+    try {
+      await onLoadMore();
+    } finally {
+      setLoadingMore(false);
+    }
+  }
 
   async function handleSubmit(e: React.FormEvent) {
     e.preventDefault();
@@ -56,12 +80,16 @@ const Sidebar: React.FC<Props> = ({ chats, activeChatId, onSelectChat, onCreateC
         <div style={{ display: 'flex', gap: '0.5rem', alignItems: 'center' }}>
           <button
             type="button"
+            onClick={() => {
+              if (showSearch) onQueryChange('');
+              setShowSearch((v) => !v);
+            }}
             style={{
               width: 32,
               height: 32,
               borderRadius: 8,
               border: 'none',
-              background: '#1e2530',
+              background: showSearch ? '#0ea5e9' : '#1e2530',
               color: '#9ca3af',
               fontSize: '1rem',
               cursor: 'pointer',
@@ -94,6 +122,25 @@ const Sidebar: React.FC<Props> = ({ chats, activeChatId, onSelectChat, onCreateC
         </div>
       </div>
 
+      {showSearch && (
+        <input
+          autoFocus
+          value={query}
+          onChange={(e) => onQueryChange(e.target.value)}
+          placeholder="Search by name, chat id or phone"
+          style={{
+            margin: '0 0.5rem 0.5rem',
+            padding: '0.6rem 0.75rem',
+            borderRadius: 8,
+            border: '1px solid #2a2f3d',
+            background: '#1a1d29',
+            color: '#ffffff',
+            fontSize: '0.9rem',
+            outline: 'none',
+          }}
+        />
+      )}
+
       {showNew && (
         <div
           style={{
@@ -254,8 +301,9 @@ const Sidebar: React.FC<Props> = ({ chats, activeChatId, onSelectChat, onCreateC
           {chats.map((chat, idx) => {
             const label = chat.metadata.client_name || chat.id;
             const active = chat.id === activeChatId;
-            const time = new Date(chat.metadata.start_timestamp || Date.now()).toLocaleTimeString('en-US', { hour: 'numeric', minute: '2-digit', hour12: true });
-            const preview = 'Last message preview...';
+            const lastActive = chat.last_message_at ? new Date(chat.last_message_at * 1000) : new Date();
+            const time = lastActive.toLocaleTimeString('en-US', { hour: 'numeric', minute: '2-digit', hour12: true });
+            const preview = chat.last_snippet || 'No messages yet';
             return (
               <button
                 key={chat.id}
@@ -333,9 +381,28 @@ const Sidebar: React.FC<Props> = ({ chats, activeChatId, onSelectChat, onCreateC
               </button>
             );
           })}
+          {chats.length < totalChats && (
+            <button
+              type="button"
+              onClick={handleLoadMore}
+              disabled={loadingMore}
+              style={{
+                margin: '0.5rem 0.75rem',
+                padding: '0.5rem',
+                borderRadius: 8,
+                border: '1px solid #2a2f3d',
+                background: 'transparent',
+                color: '#9ca3af',
+                fontSize: '0.85rem',
+                cursor: loadingMore ? 'not-allowed' : 'pointer',
+              }}
+            >
+              {loadingMore ? 'Loading...' : `Load more (${totalChats - chats.length})`}
+            </button>
+          )}
           {chats.length === 0 && (
             <div style={{ fontSize: '0.85rem', color: '#6b7280', padding: '1rem 0.75rem', textAlign: 'center' }}>
-              No chats yet. Click the ✏️ button to start one.
+              {query ? 'No chats match your search.' : 'No chats yet. Click the ✏️ button to start one.'}
             </div>
           )}
         </div>
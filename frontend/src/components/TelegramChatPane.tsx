@@ -1,14 +1,17 @@
-import React, { useEffect, useRef, useState } from 'react';
-import type { TelegramMessage, Chat } from '../types';
+import React, { useEffect, useMemo, useRef, useState } from 'react';
+import type { TelegramMessage, Chat, ChatMessage } from '../types';
 import { pollTelegram, sendTelegram } from '../api';
+import { telegramMessages } from '../chatSync';
 
 interface Props {
   chatId: string | null;
   chat: Chat | null;
+  onMessagesAppended: (messages: ChatMessage[]) => void;
 }
 
-const TelegramChatPane: React.FC<Props> = ({ chatId, chat }) => {
-  const [messages, setMessages] = useState<TelegramMessage[]>([]);
+const TelegramChatPane: React.FC<Props> = ({ chatId, chat, onMessagesAppended }) => {
+  // Telegram history lives in the chat's message list; polls and sends append to it by seq
+  const messages = useMemo<TelegramMessage[]>(() => telegramMessages(chat), [chat]);
   const [input, setInput] = useState('');
   const [sending, setSending] = useState(false);
   const scrollRef = useRef<HTMLDivElement | null>(null);
@@ -17,9 +20,9 @@ const TelegramChatPane: React.FC<Props> = ({ chatId, chat }) => {
     if (!chatId) return;
     const interval = setInterval(async () => {
       try {
-        const { messages: newMessages } = await pollTelegram(chatId);
-        if (newMessages.length) {
-          setMessages(prev => [...prev, ...newMessages]);
+        const { appended } = await pollTelegram(chatId);
+        if (appended.length) {
+          onMessagesAppended(appended);
         }
       } catch (e) {
         // ignore polling errors
@@ -44,11 +47,8 @@ const TelegramChatPane: React.FC<Props> = ({ chatId, chat }) => {
     const text = input.trim();
     setSending(true);
     try {
-      await sendTelegram(chatId, text);
-      setMessages(prev => [
-        ...prev,
-        { sender: 'You', text, timestamp: Date.now() / 1000 },
-      ]);
+      const res = await sendTelegram(chatId, text);
+      onMessagesAppended(res.messages);
       setInput('');
     } finally {
       setSending(false);
@@ -189,18 +189,21 @@ const TelegramChatPane: React.FC<Props> = ({ chatId, chat }) => {
         {messages.length ? (
           messages.map((msg, idx) => {
             const isUser = msg.sender === 'You';
-            const time = new Date(msg.timestamp * 1000).toLocaleTimeString('en-US', {
-              hour: 'numeric',
-              minute: '2-digit',
-              hour12: true,
-            });
+            // Chats migrated from the oldest format may lack times
+            const time = msg.timestamp
+              ? new Date(msg.timestamp * 1000).toLocaleTimeString('en-US', {
+                  hour: 'numeric',
+                  minute: '2-digit',
+                  hour12: true,
+                })
+              : '';
             
             // Check if this is the last message in a consecutive group from the same sender
             const isLastInGroup = idx === messages.length - 1 || messages[idx + 1].sender !== msg.sender;
             
             return (
               <div
-                key={idx}
+                key={msg.seq ?? idx}
                 style={{
                   display: 'flex',
                   justifyContent: isUser ? 'flex-end' : 'flex-start',
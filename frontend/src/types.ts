@@ -9,17 +9,54 @@ export interface ChatMetadata {
 export interface ChatSummary {
   id: string;
   metadata: ChatMetadata;
+  created_at?: number;
+  last_message_at?: number;
+  message_count?: number;
+  last_snippet?: string;
+}
+
+export interface ChatPage {
+  chats: ChatSummary[];
+  total: number;
+}
+
+/** One event in a chat (chat_schema.py): a Telegram message or one side of a Gemini turn. */
+export interface ChatMessage {
+  seq: number;
+  ts: number | null;
+  channel: 'telegram' | 'gemini';
+  /** 'out' for text the user sent, 'in' for a Telegram reply or a Gemini answer */
+  dir: 'in' | 'out';
+  text: string;
+  sender?: string;
+  message_id?: string | number;
+}
+
+export interface ContextSummary {
+  text: string;
+  through_seq: number;
+  turns?: number;
+  updated_at?: number;
 }
 
 export interface Chat {
+  schema?: number;
+  metadata: ChatMetadata;
+  messages: ChatMessage[];
+  context_summary?: ContextSummary;
+}
+
+export interface MessageWindow {
+  id: string;
   metadata: ChatMetadata;
-  generated: string[];
-  past: string[];
-  messages: any[];
+  messages: ChatMessage[];
+  has_more: boolean;
+  last_seq: number;
 }
 
 export interface TelegramMessage {
   sender: string;
   text: string;
-  timestamp: number;
+  timestamp: number | null;
+  seq?: number;
 }
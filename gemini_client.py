@@ -1,26 +1,65 @@
 import os
 import json
 import asyncio
+import time
 from typing import Dict, List, Any, Optional
 from google import genai
+from google.genai import types
 from dotenv import load_dotenv
 
+from cassette import Cassette, gemini_response_from_dict, gemini_response_to_dict
+from page_content import extract_scraped_text, reduce_page_text_async
+from relevance import TargetProfile
+from usage_tracker import UsageTracker
+
 load_dotenv()
 
+# Page content sent per parse_scraped_content call (~8000 characters)
+SCRAPED_CONTENT_MAX_TOKENS = 2000
+
 class GeminiClient:
     """Client for Gemini API interactions"""
     
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
-        
-        # genai.configure(api_key=api_key)
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, client: Optional[Any] = None):
+        if client is None:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY not found in environment variables")
+            
+            # genai.configure(api_key=api_key)
+            client = genai.Client(api_key=api_key)
+        # Anything exposing genai.Client's `models`/`caches` surface works (e.g. the offline simulator)
+        self.client = client
+        # Set per run by the orchestrator to account tokens per method
+        self.usage: Optional[UsageTracker] = None
+        # Records or replays every Gemini response when set
+        self.cassette: Optional[Cassette] = None
     
-    async def parse_initial_info(self, name: str, phone: str, context_info: str, country_info: Dict) -> Dict[str, Any]:
-        """Step 2: Parse initial person info and generate search query"""
-        prompt = f"""
+    async def _generate(self, method: str, prompt: str, config: Optional[types.GenerateContentConfig] = None) -> Any:
+        """Run a blocking generate_content call off the event loop and record its token usage"""
+        request = {"prompt": prompt, "cached_content": getattr(config, "cached_content", None)}
+        if self.cassette is not None and self.cassette.replaying:
+            recorded = await self.cassette.replay("gemini", method, request)
+            if "error" in recorded:
+                raise RuntimeError(recorded["error"])
+            response = gemini_response_from_dict(recorded)
+        else:
+            started = time.perf_counter()
+            try:
+                response = await asyncio.to_thread(self.client.models.generate_content, model="gemini-2.5-flash", contents=prompt, config=config)
+            except Exception as e:
+                if self.cassette is not None:
+                    self.cassette.record("gemini", method, request, {"error": str(e)}, started, time.perf_counter() - started)
+                raise
+            if self.cassette is not None:
+                self.cassette.record("gemini", method, request, gemini_response_to_dict(response), started, time.perf_counter() - started)
+        if self.usage is not None:
+            self.usage.record_gemini(method, response)
+        return response
+    
+    def _parse_initial_prompt(self, name: str, phone: str, context_info: str, country_info: Dict) -> str:
+        """Prompt for step 2: structured parsing and search query generation"""
+        return f"""
 You are an expert OSINT analyst. Parse the following information about a person and extract structured data.
 
 PERSON INFO:
@@ -62,10 +101,14 @@ OUTPUT ONLY VALID JSON in this format:
     
 }}
 """
+    
+    async def parse_initial_info(self, name: str, phone: str, context_info: str, country_info: Dict) -> Dict[str, Any]:
+        """Step 2: Parse initial person info and generate search query"""
+        prompt = self._parse_initial_prompt(name, phone, context_info, country_info)
         
         try:
             print("🤖 Gemini: Parsing initial person information...")
-            response = await asyncio.to_thread(self.client.models.generate_content, model="gemini-2.5-flash", contents=prompt)
+            response = await self._generate("parse_initial_info", prompt)
             
             # Extract JSON from response
             response_text = response.text.strip()
@@ -93,9 +136,9 @@ OUTPUT ONLY VALID JSON in this format:
                 "google_search_generic_query": f'"{name}" profile'
             }
     
-    async def filter_search_links(self, person_info: Dict, search_results: Dict) -> List[str]:
-        """Step 4: Filter and prioritize links from search results"""
-        prompt = f"""
+    def _filter_links_prompt(self, person_info: Dict, search_results: Dict) -> str:
+        """Prompt for step 4: picking the top 5 links to scrape"""
+        return f"""
 You are an expert OSINT analyst. Given person information and multiple Google search results from different queries, identify the TOP 5 most relevant links that should be investigated further with web scraping.
 
 PERSON INFO:
@@ -124,10 +167,14 @@ IMPORTANT:
 OUTPUT ONLY a JSON array of exactly 5 URLs:
 ["url1", "url2", "url3", "url4", "url5"]
 """
+    
+    async def filter_search_links(self, person_info: Dict, search_results: Dict) -> List[str]:
+        """Step 4: Filter and prioritize links from search results"""
+        prompt = self._filter_links_prompt(person_info, search_results)
         
         try:
             print("🤖 Gemini: Filtering search results...")
-            response = await asyncio.to_thread(self.client.models.generate_content, model="gemini-2.5-flash", contents=prompt)
+            response = await self._generate("filter_search_links", prompt)
             
             response_text = response.text.strip()
             if response_text.startswith('```json'):
@@ -141,22 +188,26 @@ OUTPUT ONLY a JSON array of exactly 5 URLs:
             
         except Exception as e:
             print(f"❌ Gemini link filtering error: {str(e)}")
-            # Fallback: extract first 5 URLs from all search results
-            fallback_links = []
-            combined_searches = search_results.get("combined_searches", {})
-            
-            for search_key, search_data in combined_searches.items():
-                if search_data.get("success") and search_data.get("data"):
-                    organic = search_data["data"].get("organic_results", [])
-                    for result in organic:
-                        if result.get("link") and len(fallback_links) < 5:
-                            fallback_links.append(result["link"])
-            
-            return fallback_links[:5]
+            return self.fallback_search_links(search_results)
     
-    async def verify_and_summarize(self, ground_truth: Dict, all_collected_data: Dict) -> Dict[str, Any]:
-        """Step 7-8: Verify against ground truth and create final summary"""
-        prompt = f"""
+    @staticmethod
+    def fallback_search_links(search_results: Dict) -> List[str]:
+        """Fallback: extract first 5 URLs from all search results"""
+        fallback_links = []
+        combined_searches = search_results.get("combined_searches", {})
+        
+        for search_key, search_data in combined_searches.items():
+            if search_data.get("success") and search_data.get("data"):
+                organic = search_data["data"].get("organic_results", [])
+                for result in organic:
+                    if result.get("link") and len(fallback_links) < 5:
+                        fallback_links.append(result["link"])
+        
+        return fallback_links[:5]
+    
+    def _summary_prompt(self, ground_truth: Dict, all_collected_data: Dict) -> str:
+        """Prompt for steps 7-8: verification and the final sales profile"""
+        return f"""
 You are an expert OSINT analyst creating a comprehensive person profile for sales purposes.
 
 GROUND TRUTH (Original Input):
@@ -226,10 +277,14 @@ OUTPUT JSON format:
     }}
 }}
 """
+    
+    async def verify_and_summarize(self, ground_truth: Dict, all_collected_data: Dict) -> Dict[str, Any]:
+        """Step 7-8: Verify against ground truth and create final summary"""
+        prompt = self._summary_prompt(ground_truth, all_collected_data)
         
         try:
             print("🤖 Gemini: Creating final verification and summary...")
-            response = await asyncio.to_thread(self.client.models.generate_content, model="gemini-2.5-flash", contents=prompt)
+            response = await self._generate("verify_and_summarize", prompt)
             
             response_text = response.text.strip()
             if response_text.startswith('```json'):
@@ -252,34 +307,10 @@ OUTPUT JSON format:
                 "data_sources": {}
             }
     
-    async def parse_scraped_content(self, scraped_data: Dict, person_info: Dict, ground_truth: Dict) -> Dict[str, Any]:
-        """Parse and extract relevant information from Firecrawl scraped content"""
-        
-        # Extract the actual content from Firecrawl response
-        content = ""
-        if scraped_data.get("success") and scraped_data.get("data"):
-            firecrawl_data = scraped_data["data"]
-            if isinstance(firecrawl_data, str):
-                # If data is a JSON string, parse it
-                try:
-                    firecrawl_data = json.loads(firecrawl_data)
-                except:
-                    pass
-            
-            # Extract content from various possible fields
-            if isinstance(firecrawl_data, dict):
-                content = firecrawl_data.get("markdown", "") or firecrawl_data.get("content", "") or firecrawl_data.get("text", "")
-            else:
-                content = str(firecrawl_data)
-        
-        # Limit content length to avoid token limits
-        if len(content) > 8000:
-            content = content[:8000] + "... [truncated]"
-        
-        scraped_url = scraped_data.get("scraped_url", "unknown")
-        
-        prompt = f"""
-You are an expert OSINT analyst. Parse the following scraped website content and extract ONLY information that is relevant to the target person.
+    def _scrape_parsing_preamble(self, person_info: Dict, ground_truth: Dict) -> str:
+        """Instructions and person context shared by every parse_scraped_content call in a run"""
+        return f"""
+You are an expert OSINT analyst. You will be given scraped website content and must extract ONLY information that is relevant to the target person.
 
 GROUND TRUTH (Target Person):
 {json.dumps(ground_truth, indent=2)}
@@ -287,11 +318,6 @@ GROUND TRUTH (Target Person):
 CURRENT PERSON INFO COLLECTED:
 {json.dumps(person_info, indent=2)}
 
-SCRAPED URL: {scraped_url}
-
-SCRAPED CONTENT:
-{content}
-
 TASK: Extract ONLY information that is clearly about the target person. Ignore generic company info, other people's profiles, or unrelated content.
 
 VERIFICATION RULES:
@@ -339,10 +365,97 @@ OUTPUT JSON format:
 
 If the content is clearly not about the target person or contains no relevant information, set "not_target_person": true and "relevance_score": 0.0.
 """
+    
+    async def create_scrape_parsing_cache(self, person_info: Dict, ground_truth: Dict) -> Optional[str]:
+        """Register the shared parse_scraped_content preamble as a Gemini cached context.
+        
+        Returns the cache name, or None when caching is unavailable (e.g. the
+        preamble is below the model's minimum cacheable size), in which case
+        callers send the full prompt per page.
+        """
+        preamble = self._scrape_parsing_preamble(person_info, ground_truth)
+        if self.cassette is not None and self.cassette.replaying:
+            try:
+                recorded = await self.cassette.replay("gemini", "caches.create", {})
+            except Exception as e:
+                recorded = {"error": str(e)}
+            if "error" in recorded:
+                print(f"⚠️ Gemini context caching unavailable, sending full prompts: {recorded['error']}")
+                return None
+            return recorded["name"]
+        started = time.perf_counter()
+        try:
+            cache = await asyncio.to_thread(
+                self.client.caches.create,
+                model="gemini-2.5-flash",
+                config=types.CreateCachedContentConfig(
+                    contents=[types.Content(role="user", parts=[types.Part(text=preamble)])],
+                    display_name="osint-scrape-parsing",
+                    ttl="900s",
+                ),
+            )
+            print(f"✅ Gemini: Cached scrape-parsing preamble as {cache.name}")
+            if self.cassette is not None:
+                self.cassette.record("gemini", "caches.create", {}, {"name": cache.name}, started, time.perf_counter() - started)
+            return cache.name
+        except Exception as e:
+            print(f"⚠️ Gemini context caching unavailable, sending full prompts: {str(e)}")
+            if self.cassette is not None:
+                self.cassette.record("gemini", "caches.create", {}, {"error": str(e)}, started, time.perf_counter() - started)
+            return None
+    
+    async def release_cache(self, cache_name: str) -> None:
+        """Delete a cached context created for this run"""
+        if self.cassette is not None and self.cassette.replaying:
+            return
+        try:
+            await asyncio.to_thread(self.client.caches.delete, name=cache_name)
+        except Exception as e:
+            print(f"⚠️ Gemini cache release failed for {cache_name}: {str(e)}")
+    
+    async def _scrape_page_prompt(self, scraped_data: Dict, person_info: Dict, ground_truth: Dict) -> str:
+        """Per-page part of the parse_scraped_content prompt, sent after the shared preamble"""
+        # Extract the actual content from Firecrawl response
+        content = extract_scraped_text(scraped_data)
+        
+        # Keep only the passages around mentions of the target, within the token budget
+        target_terms = TargetProfile.from_person_info(ground_truth, person_info).terms()
+        content = await reduce_page_text_async(content, target_terms, max_tokens=SCRAPED_CONTENT_MAX_TOKENS)
+        
+        scraped_url = scraped_data.get("scraped_url", "unknown")
+        
+        return f"""
+Apply the instructions above to the following page.
+
+SCRAPED URL: {scraped_url}
+
+SCRAPED CONTENT:
+{content}
+"""
+    
+    async def parse_scraped_content(self, scraped_data: Dict, person_info: Dict, ground_truth: Dict, cache_name: Optional[str] = None) -> Dict[str, Any]:
+        """Parse and extract relevant information from Firecrawl scraped content
+        
+        When `cache_name` is given, the shared preamble is served from the
+        Gemini context cache and only the page content is sent.
+        """
+        
+        scraped_url = scraped_data.get("scraped_url", "unknown")
+        page_prompt = await self._scrape_page_prompt(scraped_data, person_info, ground_truth)
         
         try:
             print(f"🤖 Gemini: Parsing scraped content from {scraped_url}")
-            response = await asyncio.to_thread(self.client.models.generate_content, model="gemini-2.5-flash", contents=prompt)
+            if cache_name:
+                try:
+                    response = await self._generate(
+                        "parse_scraped_content", page_prompt,
+                        config=types.GenerateContentConfig(cached_content=cache_name)
+                    )
+                except Exception as e:
+                    print(f"⚠️ Gemini cached call failed, retrying with full prompt: {str(e)}")
+                    response = await self._generate("parse_scraped_content", self._scrape_parsing_preamble(person_info, ground_truth) + page_prompt)
+            else:
+                response = await self._generate("parse_scraped_content", self._scrape_parsing_preamble(person_info, ground_truth) + page_prompt)
             
             response_text = response.text.strip()
             if response_text.startswith('```json'):
@@ -0,0 +1,141 @@
+import re
+from typing import Any, Dict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from relevance import TargetProfile, score_page
+
+
+# Candidates ranked this close to the cut-off are handed to Gemini to decide
+AMBIGUITY_MARGIN = 0.05
+# Below this, even the best candidate has no real identity evidence
+WEAK_MATCH_SCORE = 0.3
+SHORTLIST_SIZE = 10
+
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|igshid|ref|ref_src|trk|trackingid|si|s)$", re.IGNORECASE)
+_HOST_ALIASES = {"twitter.com": "x.com", "mobile.twitter.com": "x.com"}
+
+# Same preference order as the filter_search_links prompt
+_SOCIAL_DOMAINS = (
+    "instagram.com", "facebook.com", "medium.com", "dev.to", "youtube.com",
+    "substack.com", "threads.net", "bsky.app", "mastodon.social", "reddit.com",
+)
+_ACADEMIC_MARKERS = (".edu", ".ac.", "scholar.google", "researchgate.net", "orcid.org", "semanticscholar.org")
+_NEWS_MARKERS = ("news", "techcrunch.com", "forbes.com", "medium.com", "interview", "press")
+# People-search aggregators and directories rarely hold anything we can verify
+_LOW_VALUE_DOMAINS = (
+    "truecaller.com", "spokeo.com", "whitepages.com", "zoominfo.com", "rocketreach.co",
+    "contactout.com", "signalhire.com", "apollo.io", "pinterest.com", "quora.com",
+)
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalise a URL so mirrors of the same page compare equal"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    host = (parts.hostname or "").lower()
+    for prefix in ("www.", "m.", "mobile."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    if host.endswith(".linkedin.com"):
+        host = "linkedin.com"
+    host = _HOST_ALIASES.get(host, host)
+    path = re.sub(r"/+$", "", parts.path) or ""
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not _TRACKING_PARAMS.match(k)))
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def domain_prior(url: str, profile: TargetProfile) -> float:
+    """How valuable this kind of page usually is for profiling a person"""
+    canonical = canonicalize_url(url)
+    parts = urlsplit(canonical)
+    host, path = parts.netloc, parts.path.lower()
+
+    if any(host == d or host.endswith("." + d) for d in _LOW_VALUE_DOMAINS):
+        return 0.1
+    if host == "linkedin.com":
+        if path.startswith("/in/"):
+            return 1.0
+        if path.startswith(("/posts/", "/pulse/")):
+            return 0.6
+        return 0.45
+    if host == "x.com":
+        # Profile pages, not individual statuses or search
+        return 0.9 if path.count("/") == 1 else 0.5
+    if host == "github.com":
+        return 0.75 if path.count("/") == 1 else 0.55
+    if any(host == d or host.endswith("." + d) for d in _SOCIAL_DOMAINS):
+        return 0.7
+    host_words = set(re.findall(r"[a-z0-9]+", host))
+    # A handle must be a whole host label ("sid.dev"), not part of one ("president.com")
+    host_labels = set(host.split("."))
+    if any(h in host_labels for h in profile.handles) or (
+        profile.name_tokens and all(t in host for t in profile.name_tokens)
+    ):
+        return 0.8  # personal site / portfolio
+    if any(t in host_words for t in profile.company_terms):
+        return 0.6
+    if any(m in host or m in path for m in _NEWS_MARKERS):
+        return 0.5
+    if any(m in host for m in _ACADEMIC_MARKERS):
+        return 0.5
+    return 0.3
+
+
+def rank_search_links(profile: TargetProfile, search_results: Dict[str, Dict], top_n: int = 5) -> Dict[str, Any]:
+    """Rank organic results from every SerpAPI call in tool_outputs.
+
+    Each candidate scores a domain prior plus name/handle/company matches in
+    its title, snippet and URL, with small bonuses for a high search
+    position and for showing up in several queries. The ranking is flagged
+    ambiguous when the last selected and first excluded candidates are
+    within AMBIGUITY_MARGIN, or the best candidate has weak identity
+    evidence; only then is Gemini worth consulting.
+    """
+    candidates: Dict[str, Dict[str, Any]] = {}
+    for search_key, search_data in search_results.items():
+        if not (search_data.get("success") and search_data.get("data")):
+            continue
+        for position, result in enumerate(search_data["data"].get("organic_results", []) or []):
+            link = result.get("link")
+            if not link:
+                continue
+            canonical = canonicalize_url(link)
+            title = result.get("title", "") or ""
+            snippet = result.get("snippet", "") or ""
+            match = score_page(profile, f"{title}\n{snippet}", link)
+            score = 0.45 * domain_prior(link, profile) + 0.55 * match["score"] + 0.05 / (1 + position)
+
+            existing = candidates.get(canonical)
+            if existing is None:
+                candidates[canonical] = {
+                    "url": link,
+                    "canonical_url": canonical,
+                    "title": title,
+                    "snippet": snippet,
+                    "score": score,
+                    "match_score": match["score"],
+                    "sources": [search_key],
+                }
+            else:
+                existing["sources"].append(search_key)
+                existing["score"] = max(existing["score"], score) + 0.03
+                existing["match_score"] = max(existing["match_score"], match["score"])
+
+    ranked = sorted(candidates.values(), key=lambda c: c["score"], reverse=True)
+    for c in ranked:
+        c["score"] = round(c["score"], 3)
+
+    ambiguous = False
+    if ranked:
+        if ranked[0]["match_score"] < WEAK_MATCH_SCORE:
+            ambiguous = True
+        elif len(ranked) > top_n and ranked[top_n - 1]["score"] - ranked[top_n]["score"] < AMBIGUITY_MARGIN:
+            ambiguous = True
+
+    shortlist = [
+        {"link": c["url"], "title": c["title"], "snippet": c["snippet"]}
+        for c in ranked[:SHORTLIST_SIZE]
+    ]
+    return {"ranked": ranked, "ambiguous": ambiguous, "shortlist": shortlist}
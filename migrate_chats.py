@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Rewrite stored chats in the compact message schema (chat_schema.py).
+
+Schema 1 chats kept every Gemini turn as role/parts entries, as
+source/direction log entries and again in past/generated. Each chat is
+loaded, folded into one record per message and saved back with the usual
+version check, so the script can run while the API is up. The sidebar
+index is updated as each chat is saved. Chats not migrated here are
+upgraded in memory whenever they are loaded.
+
+    python migrate_chats.py                      # chats/*.json
+    python migrate_chats.py --dry-run            # only report the size change
+    python migrate_chats.py --backend sqlite --db chats.db
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Dict
+
+from chat_index import DEFAULT_INDEX_PATH, ChatIndex, IndexedChatStore
+from chat_schema import upgrade_chat
+from chat_store import (
+    DEFAULT_CHAT_DIR,
+    DEFAULT_DB_PATH,
+    DEFAULT_JSONL_DIR,
+    ChatStore,
+    ChatVersionConflict,
+    JsonChatStore,
+    JsonlChatStore,
+    SqliteChatStore,
+)
+
+
+def _size(chat: Dict) -> int:
+    return len(json.dumps(chat, ensure_ascii=False).encode("utf-8"))
+
+
+def migrate_store(store: ChatStore, dry_run: bool = False) -> Dict[str, int]:
+    """Upgrade every chat in the store; returns counts and the document size before and after"""
+    counts = {"migrated": 0, "current": 0, "failed": 0, "bytes_before": 0, "bytes_after": 0}
+    for chat_id, _ in store.list_chats():
+        for _attempt in range(2):
+            try:
+                chat = store.load(chat_id)
+                if chat is None:
+                    break
+                before = _size(chat)
+                if not upgrade_chat(chat):
+                    counts["current"] += 1
+                    break
+                counts["bytes_before"] += before
+                counts["bytes_after"] += _size(chat)
+                if not dry_run:
+                    store.save(chat_id, chat, expected_version=chat.get("version", 0))
+                counts["migrated"] += 1
+                break
+            except ChatVersionConflict:
+                continue  # written meanwhile: migrate the fresh copy
+            except Exception as e:
+                print(f"❌ Could not migrate {chat_id}: {e}")
+                counts["failed"] += 1
+                break
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["json", "sqlite", "jsonl"], default="json")
+    parser.add_argument("--chat-dir", default=str(DEFAULT_CHAT_DIR))
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH))
+    parser.add_argument("--jsonl-dir", default=str(DEFAULT_JSONL_DIR))
+    parser.add_argument("--index", default=os.getenv("CHAT_INDEX_PATH") or str(DEFAULT_INDEX_PATH))
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without saving")
+    args = parser.parse_args()
+
+    if args.backend == "json":
+        source: ChatStore = JsonChatStore(Path(args.chat_dir))
+    elif args.backend == "sqlite":
+        source = SqliteChatStore(Path(args.db))
+    else:
+        source = JsonlChatStore(Path(args.jsonl_dir))
+    store = source if args.dry_run else IndexedChatStore(source, ChatIndex(Path(args.index)))
+    counts = migrate_store(store, dry_run=args.dry_run)
+    store.close()
+
+    verb = "Would migrate" if args.dry_run else "Migrated"
+    print(f"✅ {verb} {counts['migrated']} chats in {source.location} "
+          f"({counts['current']} already current, {counts['failed']} failed)")
+    if counts["bytes_before"]:
+        ratio = counts["bytes_after"] / counts["bytes_before"]
+        print(f"📉 {counts['bytes_before']:,} -> {counts['bytes_after']:,} bytes of chat data ({ratio:.0%})")
+
+
+if __name__ == "__main__":
+    main()
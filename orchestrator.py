@@ -1,33 +1,81 @@
 import asyncio
 import json
 import re
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from tool_wrappers import ToolWrappers
 from gemini_client import GeminiClient
+from link_ranker import SHORTLIST_SIZE, canonicalize_url, rank_search_links
+from page_content import extract_scraped_text
+from relevance import DROP_THRESHOLD as RELEVANCE_DROP_THRESHOLD, TargetProfile, score_page
+from usage_tracker import RunBudget, UsageTracker
+from cassette import Cassette
+from result_store import EnrichmentResultStore
+from phone_metadata import phone_metadata
+from context_extractor import extract_context
+from crawl_frontier import CRAWL_WORKERS, CrawlBudget, CrawlFrontier
+from page_dedup import cluster_pages
 
 class PersonOSINTOrchestrator:
     """Main orchestrator for person OSINT enrichment using Gemini API"""
     
-    def __init__(self):
-        self.tools = ToolWrappers()
-        self.gemini = GeminiClient()
+    def __init__(
+        self,
+        budget: Optional[RunBudget] = None,
+        tools: Optional[ToolWrappers] = None,
+        gemini: Optional[GeminiClient] = None,
+        cassette: Optional[Cassette] = None,
+        store: Optional[EnrichmentResultStore] = None,
+        verify_phone_remotely: bool = True,
+        crawl_budget: Optional[CrawlBudget] = None,
+    ):
+        self.tools = tools or ToolWrappers()
+        self.gemini = gemini or GeminiClient()
+        if cassette is not None:
+            self.tools.cassette = cassette
+            self.gemini.cassette = cassette
         self.person_info = {}  # Global person info storage
+        self.budget = budget or RunBudget()
+        self.usage = UsageTracker(self.budget)
+        self._parse_cache_name: Optional[str] = None
+        self._firecrawl_count = 0
+        # Previous runs; fresh sources are reused instead of re-fetched
+        self.store = store
+        # Numverify runs in the background; local metadata is enough to start step 2
+        self.verify_phone_remotely = verify_phone_remotely
+        self._numverify_task: Optional[asyncio.Task] = None
+        # Fetches started from context_info while Gemini parses it, awaited in step 3
+        self._speculative: Dict[str, asyncio.Task] = {}
+        self._scraped_urls: set = set()
+        self.crawl_budget = crawl_budget or CrawlBudget()
         
     def log_step(self, step: int, message: str):
         """Enhanced logging with timestamps"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         print(f"[{timestamp}] STEP {step}: {message}")
     
+    async def _timed(self, stage: str, coro):
+        """Await one pipeline stage and record when it started and how long it took"""
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.person_info["timings"].append({
+                "stage": stage,
+                "offset": round(started - self._run_started, 4),
+                "seconds": round(time.perf_counter() - started, 4),
+            })
+    
     async def enrich_person(self, phone: str, name: str, context_info: str) -> Dict[str, Any]:
         """
         Main orchestration flow following your specified steps:
-        1. Numverify phone validation
+        1. Local phone metadata (Numverify validation runs in the background until step 7)
         2. Gemini parsing of input info
         3. First wave enrichment (Twitter, LinkedIn, SerpAPI)
         4. Gemini link filtering
-        5. Second wave enrichment (Firecrawl on filtered links)
-        6. Link extraction and additional scraping
+        5-6. Crawl: priority links, Twitter bio links and links found on scraped pages,
+             best first, within the crawl budget
         6.5. Gemini parsing of all scraped content to extract relevant info
         7. Final Gemini summary with ground truth verification
         """
@@ -42,33 +90,52 @@ class PersonOSINTOrchestrator:
             },
             "enrichment_data": {},
             "tool_outputs": {},
-            "processing_log": []
+            "processing_log": [],
+            "timings": [],
+            "sources": {}
         }
+        self._run_started = time.perf_counter()
+        self._firecrawl_count = 0
+        self._speculative = {}
+        self._scraped_urls = set()
+        started_at = time.time()
+        
+        if self.store is not None:
+            stored_run = self.store.reusable_run(phone, name, context_info)
+            if stored_run is not None:
+                print(f"♻️ Reusing stored run #{stored_run['id']} - every source is still fresh")
+                self.person_info = stored_run["result"]
+                self.person_info["reused_run_id"] = stored_run["id"]
+                return self.person_info
+        
+        # Fresh counters per run, shared with the Gemini client
+        self.usage = UsageTracker(self.budget)
+        self.gemini.usage = self.usage
         
         try:
-            # STEP 1: Phone validation with numverify
-            await self._step1_phone_validation(phone)
+            # STEP 1: Local phone metadata (Numverify validation continues in the background)
+            await self._timed("step1_phone_validation", self._step1_phone_validation(phone))
             
             # STEP 2: Gemini parsing of initial info
-            await self._step2_gemini_parsing(name, phone, context_info)
+            await self._timed("step2_gemini_parsing", self._step2_gemini_parsing(name, phone, context_info))
             
             # STEP 3: First wave enrichment
-            await self._step3_first_wave_enrichment()
+            await self._timed("step3_first_wave", self._step3_first_wave_enrichment())
             
             # STEP 4: Gemini link filtering from search results
-            await self._step4_gemini_link_filtering()
-            
-            # STEP 5: Second wave enrichment on filtered links
-            await self._step5_second_wave_enrichment()
+            await self._timed("step4_link_filtering", self._step4_gemini_link_filtering())
             
-            # STEP 6: Extract links from social media and scrape
-            await self._step6_link_extraction_and_scraping()
+            # STEP 5-6: Crawl the most valuable pages found by any stage
+            await self._timed("step5_6_crawl", self._step5_6_crawl())
             
             # STEP 6.5: Parse all scraped content with Gemini
-            await self._step6_5_parse_scraped_content()
+            await self._timed("step6_5_content_parsing", self._step6_5_parse_scraped_content())
+            
+            # Numverify has had the whole run to finish; fold it in before the summary
+            await self._timed("step1_numverify_merge", self._merge_phone_validation())
             
             # STEP 7-8: Final summary with ground truth verification
-            final_summary = await self._step7_8_final_summary()
+            final_summary = await self._timed("step7_8_final_summary", self._step7_8_final_summary())
             
             self.person_info["final_summary"] = final_summary
             
@@ -78,12 +145,65 @@ class PersonOSINTOrchestrator:
             self.log_step(0, f"❌ CRITICAL ERROR: {str(e)}")
             self.person_info["error"] = str(e)
             return self.person_info
+        
+        finally:
+            if self._numverify_task is not None:
+                self._numverify_task.cancel()
+                self._numverify_task = None
+            for task in self._speculative.values():
+                task.cancel()
+            self._speculative = {}
+            self.person_info["usage"] = self.usage.to_dict()
+            if self.store is not None:
+                try:
+                    self.person_info["run_id"] = self.store.save_run(self.person_info, started_at)
+                except Exception as e:
+                    print(f"⚠️ Could not save run to result store: {str(e)}")
     
     async def _step1_phone_validation(self, phone: str):
-        """Step 1: Run phone through numverify to get country details"""
-        self.log_step(1, f"Validating phone number: {phone}")
+        """Step 1: Derive country details locally and start Numverify validation in the background"""
+        self.log_step(1, f"Looking up phone metadata: {phone}")
         
-        numverify_result = await self.tools.run_numverify(phone)
+        metadata = phone_metadata(phone)
+        self.person_info["tool_outputs"]["phone_metadata"] = metadata
+        
+        # Print raw output
+        print(f"📄 RAW PHONE METADATA:")
+        print(json.dumps(metadata, indent=2))
+        print("-" * 50)
+        
+        if metadata["success"]:
+            self._apply_phone_info(metadata["data"])
+            self.log_step(1, f"✅ Phone metadata - Country: {metadata['data']['country_name']}, line type: {metadata['data']['line_type']}")
+        else:
+            self.log_step(1, f"❌ Phone metadata lookup failed: {metadata.get('error', 'Unknown error')}")
+            self.person_info["enrichment_data"]["country"] = "Unknown"
+            self.person_info["enrichment_data"]["phone_valid"] = False
+        
+        if self.verify_phone_remotely:
+            self._numverify_task = asyncio.create_task(self._fetch_source(
+                "numverify", phone, "numverify", lambda: self.tools.run_numverify(phone)
+            ))
+    
+    def _apply_phone_info(self, country_info: Dict[str, Any]):
+        """Copy country details from phone metadata or Numverify into enrichment_data"""
+        self.person_info["enrichment_data"]["country"] = country_info.get("country_name", "Unknown")
+        self.person_info["enrichment_data"]["country_code"] = country_info.get("country_code", "Unknown")
+        self.person_info["enrichment_data"]["phone_valid"] = country_info.get("valid", False)
+        self.person_info["enrichment_data"]["phone_line_type"] = country_info.get("line_type", "unknown")
+    
+    async def _merge_phone_validation(self):
+        """Wait for background Numverify validation and let it override the local metadata"""
+        if self._numverify_task is None:
+            return
+        try:
+            numverify_result = await self._numverify_task
+        except Exception as e:
+            numverify_result = {"success": False, "error": str(e)}
+        finally:
+            self._numverify_task = None
+        if numverify_result is None:
+            numverify_result = {"success": False, "error": "Skipped: paid call budget exhausted"}
         self.person_info["tool_outputs"]["numverify"] = numverify_result
         
         # Print raw output
@@ -92,23 +212,25 @@ class PersonOSINTOrchestrator:
         print("-" * 50)
         
         if numverify_result["success"]:
-            country_info = numverify_result["data"]
-            self.person_info["enrichment_data"]["country"] = country_info.get("country_name", "Unknown")
-            self.person_info["enrichment_data"]["country_code"] = country_info.get("country_code", "Unknown")
-            self.person_info["enrichment_data"]["phone_valid"] = country_info.get("valid", False)
-            self.log_step(1, f"✅ Phone validated - Country: {country_info.get('country_name', 'Unknown')}")
+            self._apply_phone_info(numverify_result["data"])
+            self.log_step(1, f"✅ Phone validated - Country: {numverify_result['data'].get('country_name', 'Unknown')}")
         else:
-            self.log_step(1, f"❌ Phone validation failed: {numverify_result.get('error', 'Unknown error')}")
-            self.person_info["enrichment_data"]["country"] = "Unknown"
-            self.person_info["enrichment_data"]["phone_valid"] = False
+            self.log_step(1, f"⚠️ Numverify validation failed, keeping local metadata: {numverify_result.get('error', 'Unknown error')}")
     
     async def _step2_gemini_parsing(self, name: str, phone: str, context_info: str):
         """Step 2: Gemini parsing of person info and Google query generation"""
         self.log_step(2, "Parsing person info with Gemini API")
         
-        country_info = self.person_info["tool_outputs"].get("numverify", {}).get("data", {})
+        country_info = self.person_info["tool_outputs"].get("phone_metadata", {}).get("data", {})
+        
+        # Anything stated outright in the context can be fetched while Gemini is still generating queries
+        extracted = extract_context(context_info)
+        # Kept outside enrichment_data; parsed_info already carries what Gemini needs from it
+        self.person_info["context_extraction"] = extracted
+        self._start_speculative_fetches(extracted)
         
         parsed_info = await self.gemini.parse_initial_info(name, phone, context_info, country_info)
+        parsed_info = self._reconcile_context(parsed_info, extracted)
         self.person_info["enrichment_data"]["parsed_info"] = parsed_info
         
         # Print raw output
@@ -127,6 +249,46 @@ class PersonOSINTOrchestrator:
         
         self.log_step(2, f"✅ Parsed info - Found {len(parsed_info.get('links_mentioned', []))} links, {len(parsed_info.get('usernames_mentioned', {}))} usernames")
     
+    def _start_speculative_fetches(self, extracted: Dict[str, Any]):
+        """Start Twitter, LinkedIn and direct scrapes for links/handles found by the local extractor"""
+        twitter = extracted["usernames"].get("twitter")
+        if twitter:
+            self._speculative["twitter"] = asyncio.create_task(self._enrich_twitter(twitter))
+        
+        linkedin_urls = [url for url in extracted["links"] if "linkedin.com/in/" in url]
+        if linkedin_urls:
+            self._speculative["linkedin"] = asyncio.create_task(self._enrich_linkedin(linkedin_urls))
+        
+        # Twitter/LinkedIn pages go through their own fetchers; scrape the rest directly
+        direct_links = [url for url in extracted["links"]
+                        if canonicalize_url(url).split("/")[2] not in ("linkedin.com", "x.com")]
+        for url in direct_links[:3]:
+            self._speculative[f"firecrawl:{canonicalize_url(url)}"] = asyncio.create_task(self._enrich_firecrawl(url))
+        
+        if self._speculative:
+            self.log_step(2, f"⚡ Started {len(self._speculative)} speculative fetches from context: {', '.join(self._speculative)}")
+    
+    def _reconcile_context(self, parsed_info: Dict[str, Any], extracted: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge locally extracted links and usernames into Gemini's parse; explicit text wins on conflicts"""
+        links = list(parsed_info.get("links_mentioned") or [])
+        known = {canonicalize_url(link) for link in links}
+        for link in extracted["links"]:
+            if canonicalize_url(link) not in known:
+                links.append(link)
+        parsed_info["links_mentioned"] = links
+        
+        usernames = dict(parsed_info.get("usernames_mentioned") or {})
+        for platform, handle in extracted["usernames"].items():
+            gemini_handle = str(usernames.get(platform) or "").lstrip("@")
+            if gemini_handle and gemini_handle.lower() != handle.lower():
+                self.log_step(2, f"⚠️ Gemini read {platform} as '{gemini_handle}', context says '{handle}' - using context")
+            usernames[platform] = handle
+        parsed_info["usernames_mentioned"] = usernames
+        
+        if extracted["emails"]:
+            parsed_info["emails_mentioned"] = extracted["emails"]
+        return parsed_info
+    
     async def _step3_first_wave_enrichment(self):
         """Step 3: First wave of tool calls based on parsed info"""
         self.log_step(3, "Starting first wave enrichment")
@@ -135,14 +297,14 @@ class PersonOSINTOrchestrator:
         
         # Twitter enrichment if username found
         twitter_username = self.person_info["enrichment_data"]["usernames_mentioned"].get("twitter")
-        if twitter_username:
+        if twitter_username and "twitter" not in self._speculative:
             self.log_step(3, f"Found Twitter username: {twitter_username}")
             tasks.append(self._enrich_twitter(twitter_username))
         
         # LinkedIn enrichment if URL found
         linkedin_urls = [url for url in self.person_info["enrichment_data"]["links_mentioned"] 
                         if "linkedin.com" in url]
-        if linkedin_urls:
+        if linkedin_urls and "linkedin" not in self._speculative:
             self.log_step(3, f"Found {len(linkedin_urls)} LinkedIn URLs")
             tasks.append(self._enrich_linkedin(linkedin_urls))
         
@@ -171,6 +333,10 @@ class PersonOSINTOrchestrator:
             self.log_step(3, f"Running {search_type}: {query}")
             tasks.append(self._enrich_serpapi_with_key(search_type, query))
         
+        # Speculative fetches from step 2 finish alongside the first wave
+        tasks.extend(self._speculative.values())
+        self._speculative = {}
+        
         # Run all tasks concurrently
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
@@ -178,8 +344,8 @@ class PersonOSINTOrchestrator:
         self.log_step(3, "✅ First wave enrichment completed")
     
     async def _step4_gemini_link_filtering(self):
-        """Step 4: Use Gemini to filter and prioritize search results"""
-        self.log_step(4, "Filtering search results with Gemini")
+        """Step 4: Rank search results locally, asking Gemini only when the ranking is too close to call"""
+        self.log_step(4, "Ranking search results")
         
         # Collect all search results from different queries
         all_search_results = {}
@@ -193,19 +359,38 @@ class PersonOSINTOrchestrator:
                 print("-" * 50)
         
         if all_search_results:
-            # Combine all search results for filtering
-            combined_results = {"combined_searches": all_search_results}
-            
-            filtered_links = await self.gemini.filter_search_links(
-                self.person_info["enrichment_data"], 
-                combined_results
+            profile = TargetProfile.from_person_info(
+                self.person_info["ground_truth"],
+                self.person_info["enrichment_data"]
             )
+            ranking = rank_search_links(profile, all_search_results, top_n=5)
+            filtered_links = [c["url"] for c in ranking["ranked"][:5]]
+            
+            if ranking["ambiguous"]:
+                if self.usage.tokens_available():
+                    self.log_step(4, "Top candidates too close to call - asking Gemini to pick from the shortlist")
+                    # Gemini only sees the deduplicated shortlist, already in ranked order
+                    shortlist = {"combined_searches": {"ranked_candidates": {
+                        "success": True, "data": {"organic_results": ranking["shortlist"]}
+                    }}}
+                    filtered_links = await self.gemini.filter_search_links(
+                        self.person_info["enrichment_data"], 
+                        shortlist
+                    )
+                else:
+                    self.usage.record_skip("filter_search_links")
+                    self.log_step(4, "⚠️ Token budget exhausted - keeping local ranking")
             
             # Limit to top 5 links for Firecrawl
             self.person_info["enrichment_data"]["priority_links"] = filtered_links[:5]
+            # Kept outside enrichment_data so the scores never reach Gemini prompts
+            self.person_info["link_ranking"] = [
+                {"url": c["url"], "score": c["score"], "sources": c["sources"]}
+                for c in ranking["ranked"][:SHORTLIST_SIZE]
+            ]
             
             # Print filtered links
-            print(f"📄 GEMINI FILTERED LINKS (TOP 5):")
+            print(f"📄 PRIORITY LINKS (TOP 5):")
             print(json.dumps(self.person_info["enrichment_data"]["priority_links"], indent=2))
             print("-" * 50)
             
@@ -214,53 +399,108 @@ class PersonOSINTOrchestrator:
             self.person_info["enrichment_data"]["priority_links"] = []
             self.log_step(4, "❌ No search results to filter")
     
-    async def _step5_second_wave_enrichment(self):
-        """Step 5: Second wave enrichment on filtered links"""
-        self.log_step(5, "Starting second wave enrichment on priority links")
+    async def _step5_6_crawl(self):
+        """Steps 5-6: Scrape the highest-value pages found by any stage, following links within the crawl budget"""
+        self.log_step(5, "Crawling priority links and discovered pages")
         
-        priority_links = self.person_info["enrichment_data"].get("priority_links", [])
-        tasks = []
-        
-        for link in priority_links:
-            if "linkedin.com" in link and "linkedin" not in self.person_info["tool_outputs"]:
-                # LinkedIn not done yet
-                tasks.append(self._enrich_linkedin([link]))
-            elif any(domain in link for domain in ["twitter.com", "x.com"]) and "twitter" not in self.person_info["tool_outputs"]:
-                # Extract Twitter username and fetch
+        profile = TargetProfile.from_person_info(
+            self.person_info["ground_truth"],
+            self.person_info["enrichment_data"]
+        )
+        frontier = CrawlFrontier(profile, self._run_crawl_budget())
+        
+        # LinkedIn/Twitter profiles go to their own fetchers; everything else is queued by its step 4 score
+        ranking_scores = {canonicalize_url(c["url"]): c["score"]
+                          for c in self.person_info.get("link_ranking", [])}
+        fetcher_tasks = []
+        for link in self.person_info["enrichment_data"].get("priority_links", []):
+            if "linkedin.com" in link:
+                if "linkedin" not in self.person_info["tool_outputs"]:
+                    fetcher_tasks.append(self._enrich_linkedin([link]))
+            elif any(domain in link for domain in ["twitter.com", "x.com"]):
                 username = self._extract_twitter_username(link)
-                if username:
-                    tasks.append(self._enrich_twitter(username))
+                if username and "twitter" not in self.person_info["tool_outputs"]:
+                    fetcher_tasks.append(self._enrich_twitter(username))
             else:
-                # Use Firecrawl for other links
-                tasks.append(self._enrich_firecrawl(link))
-        
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
-        
-        self.log_step(5, "✅ Second wave enrichment completed")
+                frontier.push(link, ranking_scores.get(canonicalize_url(link), 0.5), depth=0, source="priority_links")
+        
+        # Pages scraped before the crawl (context links) feed their links in too
+        for key, output in list(self.person_info["tool_outputs"].items()):
+            if key.startswith("firecrawl"):
+                frontier.mark_seen(output.get("scraped_url", ""))
+                self._harvest_page(frontier, output, output.get("scraped_url", ""), depth=0)
+        self._push_twitter_bio_links(frontier)
+        
+        async def run_fetchers():
+            try:
+                await asyncio.gather(*fetcher_tasks, return_exceptions=True)
+                # A Twitter profile fetched just now has bio links to queue
+                self._push_twitter_bio_links(frontier)
+            finally:
+                frontier.producers_finished()
+        
+        workers = [self._crawl_worker(frontier) for _ in range(CRAWL_WORKERS)]
+        await asyncio.gather(run_fetchers(), *workers, return_exceptions=True)
+        
+        # Kept outside enrichment_data so the crawl log never reaches Gemini prompts
+        crawl = frontier.summary()
+        self.person_info["crawl"] = crawl
+        scraped = sum(1 for v in crawl["visited"] if v["scraped"])
+        self.log_step(6, f"✅ Crawl completed - {scraped}/{crawl['pages_dispatched']} pages scraped, "
+                         f"{len(crawl['queued_unvisited'])} left in frontier, {crawl['seconds']:.1f}s")
     
-    async def _step6_link_extraction_and_scraping(self):
-        """Step 6: Extract links from social media content and scrape them"""
-        self.log_step(6, "Extracting additional links from social media content")
-        
-        # Extract links from Twitter bio/description
-        twitter_data = self.person_info["tool_outputs"].get("twitter", {}).get("data", {})
-        if twitter_data.get("success") and "data" in twitter_data:
-            user_data = twitter_data["data"]
-            description = user_data.get("description", "")
-            
-            # Extract URLs from Twitter bio
-            extracted_links = self.tools.extract_links_from_text(description)
-            
-            if extracted_links:
-                self.log_step(6, f"Found {len(extracted_links)} links in Twitter bio")
-                
-                # Scrape extracted links with Firecrawl
-                tasks = [self._enrich_firecrawl(link) for link in extracted_links[:3]]  # Limit to 3 links
-                if tasks:
-                    await asyncio.gather(*tasks, return_exceptions=True)
-        
-        self.log_step(6, "✅ Link extraction and scraping completed")
+    def _run_crawl_budget(self) -> CrawlBudget:
+        """This run's crawl budget, capped by the remaining Firecrawl calls in the run budget"""
+        budget = CrawlBudget(**self.crawl_budget.to_dict())
+        firecrawl_cap = self.budget.max_provider_calls.get("firecrawl")
+        if firecrawl_cap is not None:
+            remaining = firecrawl_cap - self.usage.provider_calls.get("firecrawl", 0)
+            budget.max_pages = max(0, min(budget.max_pages, remaining))
+        return budget
+    
+    async def _crawl_worker(self, frontier: CrawlFrontier):
+        """Scrape the best queued URL, then queue the links on it if the page is about the target"""
+        while True:
+            entry = await frontier.next()
+            if entry is None:
+                return
+            scraped, relevance = False, None
+            try:
+                key = await self._enrich_firecrawl(entry["url"])
+                output = self.person_info["tool_outputs"].get(key) if key else None
+                if output and output.get("success"):
+                    scraped = True
+                    relevance = self._harvest_page(frontier, output, entry["url"], entry["depth"])
+            finally:
+                frontier.done(entry, scraped, relevance)
+    
+    def _harvest_page(self, frontier: CrawlFrontier, output: Dict, url: str, depth: int) -> Optional[float]:
+        """Score a scraped page and queue its links when it is relevant; returns the page's relevance"""
+        text = extract_scraped_text(output)
+        if not text:
+            return None
+        relevance = score_page(frontier.profile, text, url)["score"]
+        if relevance >= RELEVANCE_DROP_THRESHOLD:
+            added = frontier.harvest(text, url, relevance, depth)
+            if added:
+                self.log_step(6, f"🔗 Queued {added} links from {url}")
+        return relevance
+    
+    def _push_twitter_bio_links(self, frontier: CrawlFrontier):
+        """Queue URLs from the Twitter bio; the fetcher nests the user object under data.data"""
+        twitter_output = self.person_info["tool_outputs"].get("twitter", {})
+        if not twitter_output.get("success"):
+            return
+        data = twitter_output.get("data") or {}
+        user = data.get("data", data) if isinstance(data, dict) else {}
+        if not isinstance(user, dict):
+            return
+        bio = " ".join(str(user.get(field) or "") for field in ("description", "url"))
+        links = [link.rstrip(".,;:!?)") for link in self.tools.extract_links_from_text(bio)]
+        added = sum(frontier.push(link, frontier.score_link(link, "", 1.0, 0), depth=0, source="twitter_bio")
+                    for link in links)
+        if added:
+            self.log_step(6, f"Found {added} links in Twitter bio")
     
     async def _step6_5_parse_scraped_content(self):
         """Step 6.5: Parse all Firecrawl outputs with Gemini to extract relevant information"""
@@ -277,19 +517,40 @@ class PersonOSINTOrchestrator:
         # Initialize parsed content storage
         self.person_info["enrichment_data"]["parsed_scraped_content"] = {}
         
-        # Parse each scraped content with Gemini
-        parsing_tasks = []
-        for key, scraped_data in firecrawl_outputs.items():
-            if scraped_data.get("success"):
-                parsing_tasks.append(self._parse_single_scraped_content(key, scraped_data))
+        # Drop pages that never mention the target before spending Gemini calls on them
+        parse_keys = self._prefilter_scraped_pages(firecrawl_outputs)
+        
+        # Mirrors and syndicated copies are parsed once; the other URLs corroborate the result
+        parse_keys, duplicates = await self._collapse_duplicate_pages(parse_keys, firecrawl_outputs)
+        
+        # Parse each scraped content with Gemini, most promising pages first
+        parsing_tasks = [self._parse_single_scraped_content(key, firecrawl_outputs[key]) for key in parse_keys]
+        
+        if parsing_tasks and not self.usage.tokens_available():
+            self.usage.record_skip("parse_scraped_content")
+            self.log_step(6.5, f"⚠️ Token budget exhausted - skipping {len(parsing_tasks)} pages")
+            for task in parsing_tasks:
+                task.close()
+            parsing_tasks = []
         
         if parsing_tasks:
-            parsed_results = await asyncio.gather(*parsing_tasks, return_exceptions=True)
+            # Register the shared preamble once so each page call only sends its content
+            self._parse_cache_name = await self.gemini.create_scrape_parsing_cache(
+                self.person_info["enrichment_data"],
+                self.person_info["ground_truth"]
+            )
+            try:
+                parsed_results = await asyncio.gather(*parsing_tasks, return_exceptions=True)
+            finally:
+                if self._parse_cache_name:
+                    await self.gemini.release_cache(self._parse_cache_name)
+                    self._parse_cache_name = None
             
             # Store successful parsing results
-            for i, result in enumerate(parsed_results):
+            for key, result in zip(parse_keys, parsed_results):
                 if isinstance(result, dict) and not result.get("not_target_person", True):
-                    key = list(firecrawl_outputs.keys())[i]
+                    if duplicates.get(key):
+                        result["corroborating_sources"] = [firecrawl_outputs[d].get("scraped_url", d) for d in duplicates[key]]
                     self.person_info["enrichment_data"]["parsed_scraped_content"][key] = result
                     
                     # Print raw parsed content
@@ -300,18 +561,65 @@ class PersonOSINTOrchestrator:
                     relevance = result.get("relevance_score", 0.0)
                     self.log_step(6.5, f"✅ Parsed {key} - Relevance: {relevance:.2f}")
                 else:
-                    key = list(firecrawl_outputs.keys())[i] if i < len(firecrawl_outputs) else f"unknown_{i}"
                     self.log_step(6.5, f"❌ Skipped {key} - Not relevant or parsing failed")
         
         parsed_count = len(self.person_info["enrichment_data"]["parsed_scraped_content"])
         self.log_step(6.5, f"✅ Content parsing completed - {parsed_count} relevant sources found")
     
+    def _prefilter_scraped_pages(self, firecrawl_outputs: Dict[str, Dict]) -> List[str]:
+        """Score successful scrapes locally; return keys worth parsing, best first"""
+        profile = TargetProfile.from_person_info(
+            self.person_info["ground_truth"],
+            self.person_info["enrichment_data"]
+        )
+        
+        scored = []
+        dropped = {}
+        for key, scraped_data in firecrawl_outputs.items():
+            if not scraped_data.get("success"):
+                continue
+            url = scraped_data.get("scraped_url", "")
+            relevance = score_page(profile, extract_scraped_text(scraped_data), url)
+            if relevance["score"] < RELEVANCE_DROP_THRESHOLD:
+                dropped[key] = {"url": url, **relevance}
+                self.log_step(6.5, f"⏭️ Dropped {key} ({url}) - local relevance {relevance['score']:.2f}")
+            else:
+                scored.append((relevance["score"], key))
+        
+        # Kept outside enrichment_data so rejected pages never reach Gemini prompts
+        self.person_info["prefiltered_pages"] = dropped
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [key for _, key in scored]
+    
+    async def _collapse_duplicate_pages(self, parse_keys: List[str], firecrawl_outputs: Dict[str, Dict]) -> Tuple[List[str], Dict[str, List[str]]]:
+        """Cluster near-duplicate pages; return one representative key per cluster and each one's duplicates"""
+        pages = {key: extract_scraped_text(firecrawl_outputs[key]) for key in parse_keys}
+        # Fingerprinting is pure-Python CPU work; keep it off the event loop
+        clusters = await asyncio.to_thread(cluster_pages, pages)
+        
+        duplicate_pages = {}
+        duplicates = {}
+        for cluster in clusters:
+            representative = cluster["representative"]
+            if not cluster["duplicates"]:
+                continue
+            duplicates[representative] = cluster["duplicates"]
+            for key in cluster["duplicates"]:
+                url = firecrawl_outputs[key].get("scraped_url", "")
+                duplicate_pages[key] = {"url": url, "duplicate_of": representative, "distance": cluster["distances"][key]}
+                self.log_step(6.5, f"🪞 {key} ({url}) duplicates {representative} - not parsed separately")
+        
+        # Kept outside enrichment_data; representatives already list their corroborating sources
+        self.person_info["duplicate_pages"] = duplicate_pages
+        return [cluster["representative"] for cluster in clusters], duplicates
+    
     async def _parse_single_scraped_content(self, key: str, scraped_data: Dict) -> Dict[str, Any]:
         """Parse a single scraped content item with Gemini"""
         return await self.gemini.parse_scraped_content(
             scraped_data,
             self.person_info["enrichment_data"],
-            self.person_info["ground_truth"]
+            self.person_info["ground_truth"],
+            cache_name=self._parse_cache_name
         )
     
     async def _step7_8_final_summary(self) -> Dict[str, Any]:
@@ -338,10 +646,53 @@ class PersonOSINTOrchestrator:
         
         return final_summary
     
+    async def _fetch_source(self, provider: str, request_key: str, output_key: str, fetch) -> Optional[Dict[str, Any]]:
+        """Serve a provider call from the result store when fresh, else spend budget and fetch it.
+        
+        Returns None when the budget skipped the call. Records when each
+        source was fetched so the store can judge its staleness next time.
+        """
+        if self.store is not None:
+            stored = self.store.fresh_source(
+                self.person_info["ground_truth"]["phone"], self.person_info["ground_truth"]["name"], provider, request_key
+            )
+            if stored is not None:
+                print(f"♻️ Reusing stored {provider} result for {request_key}")
+                self.person_info["sources"][output_key] = {
+                    "provider": provider, "request_key": request_key, "fetched_at": stored["fetched_at"], "reused": True
+                }
+                return stored["result"]
+        if not self.tools.provider_available(provider):
+            # Degraded provider: skip with a marker instead of waiting on it or spending budget
+            print(f"⚡ Skipping {provider} {request_key} - circuit open")
+            self.usage.record_circuit_skip(provider)
+            return self.tools.circuit_open_result(provider)
+        if not self._reserve_call(provider, request_key):
+            return None
+        result = await fetch()
+        if result.get("skipped") == "circuit_open":
+            # Another call took the half-open probe slot first; nothing was spent
+            self.usage.release_call(provider)
+            self.usage.record_circuit_skip(provider)
+            return result
+        self.person_info["sources"][output_key] = {
+            "provider": provider, "request_key": request_key, "fetched_at": time.time(), "reused": False
+        }
+        return result
+    
+    def _reserve_call(self, provider: str, target: str = "") -> bool:
+        """Check the run budget before spending a paid provider call"""
+        if self.usage.reserve_call(provider):
+            return True
+        print(f"⚠️ Budget exhausted - skipping {provider} {target}".rstrip())
+        return False
+    
     # Helper methods for individual tool enrichment
     async def _enrich_twitter(self, username: str):
         """Enrich with Twitter data"""
-        result = await self.tools.run_twitter_get(username)
+        result = await self._fetch_source("twitter", username.lstrip("@").lower(), "twitter", lambda: self.tools.run_twitter_get(username))
+        if result is None:
+            return
         self.person_info["tool_outputs"]["twitter"] = result
         
         # Print raw output
@@ -351,7 +702,10 @@ class PersonOSINTOrchestrator:
     
     async def _enrich_linkedin(self, urls: List[str]):
         """Enrich with LinkedIn data"""
-        result = await self.tools.run_linkedin_fetch(urls)
+        request_key = " ".join(sorted(canonicalize_url(u) for u in urls))
+        result = await self._fetch_source("linkedin", request_key, "linkedin", lambda: self.tools.run_linkedin_fetch(urls))
+        if result is None:
+            return
         self.person_info["tool_outputs"]["linkedin"] = result
         
         # Print raw output
@@ -361,21 +715,33 @@ class PersonOSINTOrchestrator:
     
     async def _enrich_serpapi(self, query: str):
         """Enrich with Google search data"""
-        result = await self.tools.run_serpapi(query)
+        result = await self._fetch_source("serpapi", query, "serpapi", lambda: self.tools.run_serpapi(query))
+        if result is None:
+            return
         self.person_info["tool_outputs"]["serpapi"] = result
         
         # Print raw output (will be printed in step 4 filtering)
     
     async def _enrich_serpapi_with_key(self, key: str, query: str):
         """Enrich with Google search data using a specific key"""
-        result = await self.tools.run_serpapi(query)
+        result = await self._fetch_source("serpapi", query, key, lambda: self.tools.run_serpapi(query))
+        if result is None:
+            return
         self.person_info["tool_outputs"][key] = result
     
-    async def _enrich_firecrawl(self, url: str):
-        """Enrich with scraped website data"""
-        # Create unique key for each scraped URL
-        key = f"firecrawl_{len([k for k in self.person_info['tool_outputs'].keys() if k.startswith('firecrawl')])}"
-        result = await self.tools.run_firecrawl(url)
+    async def _enrich_firecrawl(self, url: str) -> Optional[str]:
+        """Enrich with scraped website data; returns the tool_outputs key, or None if not scraped"""
+        canonical = canonicalize_url(url)
+        if canonical in self._scraped_urls:
+            print(f"⏭️ Already scraped this run: {url}")
+            return None
+        self._scraped_urls.add(canonical)
+        # Create unique key for each scraped URL in launch order; counting existing keys raced between concurrent scrapes
+        key = f"firecrawl_{self._firecrawl_count}"
+        self._firecrawl_count += 1
+        result = await self._fetch_source("firecrawl", canonical, key, lambda: self.tools.run_firecrawl(url))
+        if result is None:
+            return None
         result["scraped_url"] = url  # Add URL for reference
         self.person_info["tool_outputs"][key] = result
         
@@ -383,6 +749,7 @@ class PersonOSINTOrchestrator:
         print(f"📄 RAW FIRECRAWL OUTPUT ({url}):")
         print(json.dumps(result, indent=2))
         print("-" * 50)
+        return key
     
     def _extract_twitter_username(self, url: str) -> Optional[str]:
         """Extract Twitter username from URL"""
@@ -405,8 +772,8 @@ async def main():
             print("❌ All fields are required!")
             return
         
-        # Create orchestrator and run enrichment
-        orchestrator = PersonOSINTOrchestrator()
+        # Create orchestrator and run enrichment; previous runs of this contact are reused where still fresh
+        orchestrator = PersonOSINTOrchestrator(store=EnrichmentResultStore())
         
         print(f"\n🔍 Starting OSINT enrichment for: {name}")
         print("=" * 60)
@@ -422,6 +789,10 @@ async def main():
         
         print(f"\n✅ OSINT enrichment completed!")
         print(f"📁 Results saved to: {filename}")
+        if result.get("reused_run_id"):
+            print(f"♻️ Served from stored run #{result['reused_run_id']}")
+        elif result.get("run_id"):
+            print(f"🗄️ Run stored as #{result['run_id']} in {orchestrator.store.db_path}")
         
         # Display summary
         final_summary = result.get("final_summary", {})
@@ -0,0 +1,152 @@
+import asyncio
+import atexit
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+def extract_scraped_text(scraped_data: Dict[str, Any]) -> str:
+    """Pull the page text out of a run_firecrawl result.
+
+    The Firecrawl fetcher prints the SDK model as a JSON string, so `data`
+    may be a string that still needs decoding.
+    """
+    if not (scraped_data.get("success") and scraped_data.get("data")):
+        return ""
+
+    firecrawl_data = scraped_data["data"]
+    if isinstance(firecrawl_data, str):
+        try:
+            firecrawl_data = json.loads(firecrawl_data)
+        except json.JSONDecodeError:
+            pass
+
+    if isinstance(firecrawl_data, dict):
+        return firecrawl_data.get("markdown", "") or firecrawl_data.get("content", "") or firecrawl_data.get("text", "") or ""
+    return str(firecrawl_data)
+
+
+# Rough chars-per-token ratio for English markdown, used for budgeting only
+CHARS_PER_TOKEN = 4
+
+# Pages above this size are reduced in a worker process to keep the loop free
+PROCESS_POOL_MIN_CHARS = 200_000
+
+_HEADING_RE = re.compile(r"^#{1,6}\s", re.MULTILINE)
+_MD_LINK_RE = re.compile(r"!?\[[^\]]*\]\([^)]*\)")
+
+_reducer_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _is_boilerplate_line(line: str, stripped_links: str) -> bool:
+    """Navigation rows, bare links/images and separators carry no prose"""
+    if not stripped_links.strip(" |*-_>#\t"):
+        return True
+    link_count = len(_MD_LINK_RE.findall(line))
+    return link_count >= 2 and len(stripped_links.strip()) < 0.3 * len(line)
+
+
+def strip_boilerplate(text: str, mention_re: Optional[re.Pattern] = None) -> str:
+    """Drop repeated lines and link-only navigation, keeping any line that mentions the target"""
+    seen: Set[str] = set()
+    kept: List[str] = []
+    for line in text.splitlines():
+        key = line.strip()
+        if not key:
+            if kept and kept[-1] != "":
+                kept.append("")
+            continue
+        mentions_target = bool(mention_re and mention_re.search(line))
+        if not mentions_target:
+            if key in seen or _is_boilerplate_line(key, _MD_LINK_RE.sub("", key)):
+                continue
+        seen.add(key)
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def _section_bounds(text: str) -> List[Tuple[int, int]]:
+    starts = [m.start() for m in _HEADING_RE.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return list(zip(starts, starts[1:] + [len(text)]))
+
+
+def reduce_page_text(text: str, terms: List[str], max_tokens: int = 2000, window_chars: int = 600) -> str:
+    """Cut a page down to the passages around mentions of the target.
+
+    The cleaned markdown is indexed by heading section; each mention of a
+    term opens a window of `window_chars` either side, clipped to its
+    section and prefixed with the section heading. Windows with the most
+    mentions are kept until the token budget is used, then emitted in
+    document order. Pages without any mention fall back to their head.
+    """
+    char_budget = max_tokens * CHARS_PER_TOKEN
+    literal_terms = sorted({t.lower() for t in terms if t and len(t) >= 2}, key=len, reverse=True)
+    mention_re = None
+    if literal_terms:
+        mention_re = re.compile(r"(?<!\w)(?:" + "|".join(re.escape(t) for t in literal_terms) + r")(?!\w)", re.IGNORECASE)
+
+    cleaned = strip_boilerplate(text, mention_re)
+    if len(cleaned) <= char_budget:
+        return cleaned
+
+    mentions = [m.start() for m in mention_re.finditer(cleaned)] if mention_re else []
+    if not mentions:
+        return cleaned[:char_budget] + "... [truncated]"
+
+    # Merge overlapping windows within a section so they never straddle headings
+    windows: List[List[int]] = []  # [start, end, hit_count, section_start]
+    for sec_start, sec_end in _section_bounds(cleaned):
+        for pos in (p for p in mentions if sec_start <= p < sec_end):
+            start = max(sec_start, pos - window_chars)
+            end = min(sec_end, pos + window_chars)
+            if windows and windows[-1][3] == sec_start and windows[-1][1] >= start:
+                windows[-1][1] = max(windows[-1][1], end)
+                windows[-1][2] += 1
+            else:
+                windows.append([start, end, 1, sec_start])
+
+    chosen: List[Tuple[int, int, int]] = []
+    used = 0
+    for start, end, _, sec_start in sorted(windows, key=lambda w: w[2], reverse=True):
+        remaining = char_budget - used
+        if remaining <= 200:
+            break
+        end = min(end, start + remaining)
+        chosen.append((start, end, sec_start))
+        used += end - start
+
+    pieces = []
+    for start, end, sec_start in sorted(chosen):
+        heading = ""
+        if cleaned.startswith("#", sec_start):
+            line_end = cleaned.find("\n", sec_start)
+            heading = cleaned[sec_start:line_end if line_end != -1 else len(cleaned)]
+        body = cleaned[start:end].strip()
+        if heading and not body.startswith(heading):
+            body = f"{heading}\n...{body}"
+        pieces.append(body)
+    return "\n\n[...]\n\n".join(pieces)
+
+
+async def reduce_page_text_async(text: str, terms: List[str], max_tokens: int = 2000) -> str:
+    """reduce_page_text, offloaded to a shared process pool for very large pages"""
+    global _reducer_pool
+    if len(text) < PROCESS_POOL_MIN_CHARS:
+        return reduce_page_text(text, terms, max_tokens)
+    if _reducer_pool is None:
+        _reducer_pool = ProcessPoolExecutor(max_workers=max(1, min(4, (os.cpu_count() or 2) - 1)))
+        atexit.register(shutdown_reducer_pool)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_reducer_pool, reduce_page_text, text, terms, max_tokens)
+
+
+def shutdown_reducer_pool() -> None:
+    """Stop the reducer worker processes; registered with atexit when the pool starts"""
+    global _reducer_pool
+    if _reducer_pool is not None:
+        _reducer_pool.shutdown(wait=False, cancel_futures=True)
+        _reducer_pool = None
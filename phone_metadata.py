@@ -0,0 +1,274 @@
+"""
+Local phone-number metadata: country, region and line-type hints from a
+calling-code/prefix trie, without a network round trip.
+
+The result mirrors the fields Numverify returns so step 2 can use it
+directly; Numverify's authoritative validation is merged in later.
+"""
+import re
+from typing import Any, Dict, Tuple
+
+
+# calling code, ISO code, country name
+_CALLING_CODES = """
+1 US United States of America
+7 RU Russia
+20 EG Egypt
+27 ZA South Africa
+30 GR Greece
+31 NL Netherlands
+32 BE Belgium
+33 FR France
+34 ES Spain
+36 HU Hungary
+39 IT Italy
+40 RO Romania
+41 CH Switzerland
+43 AT Austria
+44 GB United Kingdom
+45 DK Denmark
+46 SE Sweden
+47 NO Norway
+48 PL Poland
+49 DE Germany
+51 PE Peru
+52 MX Mexico
+53 CU Cuba
+54 AR Argentina
+55 BR Brazil
+56 CL Chile
+57 CO Colombia
+58 VE Venezuela
+60 MY Malaysia
+61 AU Australia
+62 ID Indonesia
+63 PH Philippines
+64 NZ New Zealand
+65 SG Singapore
+66 TH Thailand
+81 JP Japan
+82 KR South Korea
+84 VN Vietnam
+86 CN China
+90 TR Turkey
+91 IN India
+92 PK Pakistan
+93 AF Afghanistan
+94 LK Sri Lanka
+95 MM Myanmar
+98 IR Iran
+212 MA Morocco
+213 DZ Algeria
+216 TN Tunisia
+218 LY Libya
+220 GM Gambia
+221 SN Senegal
+225 CI Ivory Coast
+233 GH Ghana
+234 NG Nigeria
+237 CM Cameroon
+244 AO Angola
+249 SD Sudan
+250 RW Rwanda
+251 ET Ethiopia
+254 KE Kenya
+255 TZ Tanzania
+256 UG Uganda
+260 ZM Zambia
+263 ZW Zimbabwe
+351 PT Portugal
+352 LU Luxembourg
+353 IE Ireland
+354 IS Iceland
+356 MT Malta
+357 CY Cyprus
+358 FI Finland
+359 BG Bulgaria
+370 LT Lithuania
+371 LV Latvia
+372 EE Estonia
+380 UA Ukraine
+381 RS Serbia
+385 HR Croatia
+386 SI Slovenia
+420 CZ Czech Republic
+421 SK Slovakia
+852 HK Hong Kong
+853 MO Macau
+855 KH Cambodia
+880 BD Bangladesh
+886 TW Taiwan
+960 MV Maldives
+961 LB Lebanon
+962 JO Jordan
+963 SY Syria
+964 IQ Iraq
+965 KW Kuwait
+966 SA Saudi Arabia
+968 OM Oman
+971 AE United Arab Emirates
+972 IL Israel
+973 BH Bahrain
+974 QA Qatar
+977 NP Nepal
+"""
+
+# NANP area codes outside the US share +1 and resolve to their own country
+_NANP_COUNTRIES = {
+    "CA Canada": "204 226 236 249 250 289 306 343 365 403 416 418 431 437 438 450 506 514 519 548 579 581 587 604 613 639 647 672 705 709 778 780 782 807 819 825 867 873 902 905",
+    "JM Jamaica": "876 658",
+    "DO Dominican Republic": "809 829 849",
+    "PR Puerto Rico": "787 939",
+    "BS Bahamas": "242",
+    "BB Barbados": "246",
+    "TT Trinidad and Tobago": "868",
+}
+
+# Full international prefix -> region
+_REGIONS = {
+    # United States
+    "1202": "District of Columbia", "1206": "Washington", "1212": "New York", "1213": "California",
+    "1214": "Texas", "1215": "Pennsylvania", "1303": "Colorado", "1305": "Florida", "1310": "California",
+    "1312": "Illinois", "1313": "Michigan", "1347": "New York", "1404": "Georgia", "1408": "California",
+    "1415": "California", "1424": "California", "1503": "Oregon", "1510": "California", "1512": "Texas",
+    "1602": "Arizona", "1612": "Minnesota", "1615": "Tennessee", "1617": "Massachusetts", "1619": "California",
+    "1628": "California", "1646": "New York", "1650": "California", "1669": "California", "1702": "Nevada",
+    "1704": "North Carolina", "1713": "Texas", "1718": "New York", "1858": "California", "1917": "New York",
+    "1919": "North Carolina",
+    # Canada
+    "1416": "Ontario", "1437": "Ontario", "1647": "Ontario", "1613": "Ontario", "1905": "Ontario",
+    "1604": "British Columbia", "1778": "British Columbia", "1514": "Quebec", "1438": "Quebec",
+    "1403": "Alberta", "1587": "Alberta", "1204": "Manitoba", "1902": "Nova Scotia",
+    # United Kingdom
+    "4420": "London", "44121": "Birmingham", "44131": "Edinburgh", "44141": "Glasgow",
+    "44161": "Manchester", "44113": "Leeds", "44117": "Bristol", "4429": "Cardiff", "4428": "Northern Ireland",
+    # India
+    "9111": "Delhi", "9122": "Mumbai", "9180": "Bengaluru", "9144": "Chennai", "9133": "Kolkata",
+    "9140": "Hyderabad", "9120": "Pune",
+    # Germany
+    "4930": "Berlin", "4989": "Munich", "4940": "Hamburg", "4969": "Frankfurt", "49221": "Cologne",
+    # France, Netherlands
+    "331": "Ile-de-France", "3120": "Amsterdam", "3110": "Rotterdam",
+    # Australia
+    "612": "New South Wales / ACT", "613": "Victoria / Tasmania", "617": "Queensland", "618": "Western / South Australia",
+    # Asia
+    "8610": "Beijing", "8621": "Shanghai", "8620": "Guangzhou", "86755": "Shenzhen",
+    "813": "Tokyo", "816": "Osaka", "822": "Seoul",
+    "9714": "Dubai", "9712": "Abu Dhabi",
+    # Americas / Africa
+    "5511": "Sao Paulo", "5521": "Rio de Janeiro", "5255": "Mexico City", "2341": "Lagos", "25420": "Nairobi",
+}
+
+# Full international prefix -> line type, for numbering plans that separate mobile ranges
+_LINE_TYPES = {
+    "441": "landline", "442": "landline", "447": "mobile", "4470": "personal", "4476": "pager",
+    "916": "mobile", "917": "mobile", "918": "mobile", "919": "mobile",
+    "4915": "mobile", "4916": "mobile", "4917": "mobile",
+    "336": "mobile", "337": "mobile", "346": "mobile", "347": "mobile", "393": "mobile",
+    "316": "mobile", "614": "mobile", "6421": "mobile", "6422": "mobile", "6427": "mobile",
+    "658": "mobile", "659": "mobile", "656": "landline",
+    "8613": "mobile", "8614": "mobile", "8615": "mobile", "8616": "mobile", "8617": "mobile", "8618": "mobile", "8619": "mobile",
+    "8170": "mobile", "8180": "mobile", "8190": "mobile", "8210": "mobile",
+    "9715": "mobile", "9665": "mobile", "9725": "mobile", "905": "mobile",
+    "23470": "mobile", "23480": "mobile", "23481": "mobile", "23490": "mobile", "23491": "mobile",
+    "2547": "mobile", "2541": "mobile", "2776": "mobile", "2782": "mobile", "2783": "mobile", "2784": "mobile",
+    "639": "mobile", "628": "mobile", "601": "mobile", "668": "mobile", "669": "mobile",
+    "8490": "mobile", "8491": "mobile", "8493": "mobile", "8496": "mobile", "8497": "mobile", "8498": "mobile",
+    "923": "mobile", "8801": "mobile", "9477": "mobile", "8529": "mobile", "8526": "mobile",
+    "800": "toll_free", "1800": "toll_free", "1888": "toll_free", "1877": "toll_free", "1866": "toll_free",
+    "44800": "toll_free", "4980": "toll_free",
+}
+
+# National significant number lengths where the plan is fixed; others fall back to E.164 bounds
+_NATIONAL_LENGTHS = {
+    "1": (10,), "7": (10,), "33": (9,), "34": (9,), "44": (9, 10), "49": (6, 7, 8, 9, 10, 11), "61": (9,),
+    "65": (8,), "81": (9, 10), "82": (8, 9, 10), "86": (10, 11), "91": (10,), "971": (8, 9), "234": (8, 10),
+    "27": (9,), "55": (10, 11), "52": (10,), "39": (6, 7, 8, 9, 10, 11), "31": (9,), "353": (7, 8, 9), "254": (9,),
+}
+
+_E164_MAX_DIGITS = 15
+
+
+def _build_trie() -> Dict[str, Any]:
+    """Digit trie of every known prefix; each node's "_" holds the facts that prefix implies"""
+    root: Dict[str, Any] = {}
+
+    def insert(prefix: str, **facts: Any) -> None:
+        node = root
+        for digit in prefix:
+            node = node.setdefault(digit, {})
+        node.setdefault("_", {}).update(facts)
+
+    for line in _CALLING_CODES.strip().splitlines():
+        code, iso, name = line.split(" ", 2)
+        insert(code, calling_code=code, country_code=iso, country_name=name)
+    for country, area_codes in _NANP_COUNTRIES.items():
+        iso, name = country.split(" ", 1)
+        for area in area_codes.split():
+            insert("1" + area, country_code=iso, country_name=name)
+    for prefix, region in _REGIONS.items():
+        insert(prefix, location=region)
+    for prefix, line_type in _LINE_TYPES.items():
+        insert(prefix, line_type=line_type)
+    return root
+
+
+_TRIE = _build_trie()
+
+
+def _international_digits(phone: str) -> str:
+    """Digits after the country code marker, dropping a "(0)" trunk prefix and a 00 exit code"""
+    cleaned = re.sub(r"\(0\)", "", phone or "")
+    digits = re.sub(r"\D", "", cleaned)
+    if not cleaned.strip().startswith("+") and digits.startswith("00"):
+        digits = digits[2:]
+    return digits
+
+
+def lookup_phone(phone: str) -> Tuple[str, Dict[str, Any]]:
+    """Walk the trie along the number; deeper prefixes refine what shallower ones said"""
+    digits = _international_digits(phone)
+    facts: Dict[str, Any] = {}
+    node = _TRIE
+    for digit in digits:
+        node = node.get(digit)
+        if node is None:
+            break
+        facts.update(node.get("_", {}))
+    return digits, facts
+
+
+def phone_metadata(phone: str) -> Dict[str, Any]:
+    """Numverify-shaped metadata derived locally; `valid` is a length plausibility check only"""
+    digits, facts = lookup_phone(phone)
+    calling_code = facts.get("calling_code")
+    if not calling_code:
+        return {
+            "success": False,
+            "error": f"Unknown calling code for {phone}",
+            "data": {"valid": False, "number": digits, "source": "local"},
+        }
+
+    national = digits[len(calling_code):]
+    lengths = _NATIONAL_LENGTHS.get(calling_code)
+    plausible = len(national) in lengths if lengths else 4 <= len(national) and len(digits) <= _E164_MAX_DIGITS
+    line_type = facts.get("line_type")
+    if line_type is None and calling_code == "1":
+        line_type = "landline_or_mobile"  # NANP does not separate mobile ranges
+
+    return {
+        "success": True,
+        "data": {
+            "valid": plausible,
+            "number": digits,
+            "local_format": national,
+            "international_format": f"+{digits}",
+            "country_prefix": f"+{calling_code}",
+            "country_code": facts["country_code"],
+            "country_name": facts["country_name"],
+            "location": facts.get("location", ""),
+            "carrier": "",
+            "line_type": line_type or "unknown",
+            "source": "local",
+        },
+    }
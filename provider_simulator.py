@@ -0,0 +1,270 @@
+"""
+Offline stand-ins for every external provider used by the orchestrator.
+
+SimulatedToolWrappers replaces the ToolWrappers transport and
+SimulatedGeminiAPI replaces genai.Client. Both serve fixture payloads from
+fixtures/simulator.json with configurable latency, error and 429 rates, and
+log every call to a shared CallLog so benchmarks can attribute time to
+providers and stages.
+"""
+import asyncio
+import contextvars
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from string import Template
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from tool_wrappers import ToolWrappers
+
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "simulator.json")
+
+# Tags calls with the benchmark run they belong to; copied into to_thread workers
+current_run: contextvars.ContextVar[str] = contextvars.ContextVar("current_run", default="")
+
+
+class ProviderProfile:
+    """Latency (log-normal around a median) and failure behaviour of one provider"""
+
+    def __init__(self, median_ms: float, p95_ms: float, error_rate: float = 0.0, rate_limit_rate: float = 0.0):
+        self.median_ms = median_ms
+        self.p95_ms = max(p95_ms, median_ms)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+
+    def sample_seconds(self, rng: random.Random) -> float:
+        # p95 of a log-normal is median * exp(1.645 * sigma)
+        sigma = math.log(self.p95_ms / self.median_ms) / 1.645 if self.median_ms > 0 else 0.0
+        return rng.lognormvariate(math.log(max(self.median_ms, 1e-3)), sigma) / 1000.0
+
+
+# Rough production figures; subprocess start-up is included for script-backed tools
+DEFAULT_PROFILES: Dict[str, ProviderProfile] = {
+    "numverify": ProviderProfile(450, 1200),
+    "twitter": ProviderProfile(1100, 2500),
+    "linkedin": ProviderProfile(18000, 40000),  # BrightData trigger + 5s polling loop
+    "serpapi": ProviderProfile(1600, 3500),
+    "firecrawl": ProviderProfile(4000, 12000),
+    "gemini.parse_initial_info": ProviderProfile(3500, 7000),
+    "gemini.filter_search_links": ProviderProfile(3000, 6000),
+    "gemini.parse_scraped_content": ProviderProfile(4500, 9000),
+    "gemini.verify_and_summarize": ProviderProfile(14000, 25000),
+    "gemini.caches": ProviderProfile(400, 900),
+}
+
+
+class CallLog:
+    """Thread-safe record of simulated calls"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls: List[Dict[str, Any]] = []
+
+    def add(self, **call: Any) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def for_run(self, run_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [c for c in self.calls if c["run_id"] == run_id]
+
+
+class SimulatorConfig:
+    """Shared settings for one simulated environment"""
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, ProviderProfile]] = None,
+        time_scale: float = 1.0,
+        seed: Optional[int] = None,
+        fixtures_path: str = FIXTURES_PATH,
+    ) -> None:
+        self.profiles = {k: ProviderProfile(p.median_ms, p.p95_ms, p.error_rate, p.rate_limit_rate)
+                         for k, p in (profiles or DEFAULT_PROFILES).items()}
+        # Multiplies every sampled latency, e.g. 0.01 to run a benchmark 100x faster
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.log = CallLog()
+        with open(fixtures_path, "r", encoding="utf-8") as f:
+            self.fixtures = json.load(f)
+
+    def set_failure_rates(self, error_rate: float = 0.0, rate_limit_rate: float = 0.0, providers: Optional[List[str]] = None) -> None:
+        for name, profile in self.profiles.items():
+            if providers is None or name.split(".")[0] in providers or name in providers:
+                profile.error_rate = error_rate
+                profile.rate_limit_rate = rate_limit_rate
+
+    def sample(self, provider: str) -> Dict[str, Any]:
+        """Decide latency and outcome of one call"""
+        profile = self.profiles.get(provider) or self.profiles.get(provider.split(".")[0]) or ProviderProfile(500, 1000)
+        with self._rng_lock:
+            latency = profile.sample_seconds(self.rng) * self.time_scale
+            roll = self.rng.random()
+        if roll < profile.rate_limit_rate:
+            outcome = 429
+        elif roll < profile.rate_limit_rate + profile.error_rate:
+            outcome = 500
+        else:
+            outcome = 200
+        return {"latency": latency, "status": outcome}
+
+    def render(self, payload: Any, person: Dict[str, str]) -> Any:
+        """Fill $placeholders in a fixture with the simulated person's details"""
+        return json.loads(Template(json.dumps(payload)).safe_substitute(person))
+
+
+def person_placeholders(name: str, phone: str = "", context_info: str = "", company: str = "Acme Robotics") -> Dict[str, str]:
+    words = re.findall(r"[A-Za-z0-9]+", name) or ["person"]
+    return {
+        "name": name,
+        "name_slug": "-".join(words),
+        "handle": "".join(w.lower() for w in words),
+        "phone": phone,
+        "phone_digits": re.sub(r"\D", "", phone),
+        "company": company,
+        "company_slug": re.sub(r"[^a-z0-9]", "", company.lower()),
+        "context": context_info,
+    }
+
+
+class SimulatedToolWrappers(ToolWrappers):
+    """ToolWrappers whose transport serves fixtures instead of running fetcher scripts"""
+
+    def __init__(self, config: SimulatorConfig, person: Dict[str, str]):
+        super().__init__()
+        self.config = config
+        self.person = person
+
+    async def _call_provider(self, provider: str, args: List[str]) -> Dict[str, Any]:
+        outcome = self.config.sample(provider)
+        started = time.perf_counter()
+        await asyncio.sleep(outcome["latency"])
+        self.config.log.add(
+            run_id=current_run.get(), provider=provider, method=provider,
+            start=started, end=time.perf_counter(), status=outcome["status"],
+        )
+        if outcome["status"] == 429:
+            return {"success": False, "error": "HTTP 429: Too Many Requests (simulated)", "status": 429}
+        if outcome["status"] != 200:
+            return {"success": False, "error": f"HTTP {outcome['status']}: simulated provider error", "status": outcome["status"]}
+        return {"success": True, "data": self._payload(provider, args)}
+
+    def _payload(self, provider: str, args: List[str]) -> Any:
+        fixtures = self.config.fixtures
+        if provider == "firecrawl":
+            url = args[0] if args else ""
+            relevant = self.person["handle"] in url or self.person["company_slug"] in url
+            markdown = self.config.render(fixtures["firecrawl"]["relevant" if relevant else "irrelevant"], self.person)
+            # The real fetcher prints the SDK model as a JSON string
+            return json.dumps({"markdown": markdown, "metadata": {"sourceURL": url}})
+        return self.config.render(fixtures[provider], self.person)
+
+
+class _SimulatedModels:
+    def __init__(self, api: "SimulatedGeminiAPI"):
+        self._api = api
+
+    def generate_content(self, model: str, contents: Any, config: Any = None) -> Any:
+        prompt = contents if isinstance(contents, str) else json.dumps(contents, default=str)
+        method = self._api.classify(prompt)
+        cached_tokens = 0
+        cache_name = getattr(config, "cached_content", None) if config is not None else None
+        if cache_name:
+            cached_tokens = self._api.cached_tokens.get(cache_name, 0)
+
+        outcome = self._api.config.sample(f"gemini.{method}")
+        started = time.perf_counter()
+        time.sleep(outcome["latency"])  # called via asyncio.to_thread, like the real SDK
+        self._api.config.log.add(
+            run_id=current_run.get(), provider="gemini", method=method,
+            start=started, end=time.perf_counter(), status=outcome["status"],
+        )
+        if outcome["status"] == 429:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED (simulated)")
+        if outcome["status"] != 200:
+            raise RuntimeError(f"{outcome['status']} INTERNAL (simulated)")
+
+        text = self._api.response_text(method, prompt)
+        usage = SimpleNamespace(
+            prompt_token_count=len(prompt) // 4 + cached_tokens,
+            cached_content_token_count=cached_tokens,
+            candidates_token_count=len(text) // 4,
+            thoughts_token_count=0,
+        )
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+class _SimulatedCaches:
+    def __init__(self, api: "SimulatedGeminiAPI"):
+        self._api = api
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def _call(self, method: str) -> None:
+        """Sleep, log and fail like a generate_content call to the same provider"""
+        outcome = self._api.config.sample("gemini.caches")
+        started = time.perf_counter()
+        time.sleep(outcome["latency"])
+        self._api.config.log.add(
+            run_id=current_run.get(), provider="gemini", method=method,
+            start=started, end=time.perf_counter(), status=outcome["status"],
+        )
+        if outcome["status"] == 429:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED (simulated)")
+        if outcome["status"] != 200:
+            raise RuntimeError(f"{outcome['status']} INTERNAL (simulated)")
+
+    def create(self, model: str, config: Any = None) -> Any:
+        self._call("caches.create")
+        size = sum(len(getattr(p, "text", "") or "") for c in (getattr(config, "contents", None) or []) for p in (c.parts or []))
+        with self._lock:
+            self._counter += 1
+            name = f"cachedContents/sim-{self._counter}"
+            self._api.cached_tokens[name] = size // 4
+        return SimpleNamespace(name=name)
+
+    def delete(self, name: str) -> None:
+        self._call("caches.delete")
+        with self._lock:
+            self._api.cached_tokens.pop(name, None)
+
+
+class SimulatedGeminiAPI:
+    """Drop-in for genai.Client(...) exposing `models` and `caches`"""
+
+    def __init__(self, config: SimulatorConfig, person: Dict[str, str]):
+        self.config = config
+        self.person = person
+        self.cached_tokens: Dict[str, int] = {}
+        self.models = _SimulatedModels(self)
+        self.caches = _SimulatedCaches(self)
+
+    @staticmethod
+    def classify(prompt: str) -> str:
+        if "SCRAPED URL:" in prompt:
+            return "parse_scraped_content"
+        if "TOP 5 most relevant links" in prompt:
+            return "filter_search_links"
+        if "GROUND TRUTH (Original Input)" in prompt:
+            return "verify_and_summarize"
+        return "parse_initial_info"
+
+    def response_text(self, method: str, prompt: str) -> str:
+        if method == "filter_search_links":
+            links: List[str] = []
+            for link in re.findall(r'"link":\s*"([^"]+)"', prompt):
+                if link not in links:
+                    links.append(link)
+            return json.dumps(links[:5])
+        payload = self.config.render(self.config.fixtures["gemini"][method], self.person)
+        if method == "parse_scraped_content" and self.person["handle"] not in prompt and self.person["company_slug"] not in prompt.lower():
+            payload = {"not_target_person": True, "relevance_score": 0.0, "extracted_info": {},
+                       "confidence_notes": "Page is not about the target person."}
+        return "```json\n" + json.dumps(payload, indent=2) + "\n```"
@@ -0,0 +1,139 @@
+import re
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Set
+
+from phone_metadata import phone_metadata
+
+
+# Pages scoring below this never mention the target in any recognisable way
+DROP_THRESHOLD = 0.2
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_PHONE_RE = re.compile(r"\+?\d[\d\s().-]{6,}\d")
+
+# Words that say nothing about which company a page is about
+_COMPANY_STOPWORDS = {
+    "inc", "ltd", "llc", "llp", "corp", "corporation", "co", "company", "the",
+    "and", "of", "pvt", "private", "limited", "group", "gmbh", "plc", "technologies",
+    "technology", "solutions", "services", "labs", "team",
+}
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _handle_re(handle: str) -> "re.Pattern[str]":
+    """Matches a handle only as a whole token (so "sid" is not found in "inside")"""
+    return re.compile(rf"(?<![\w.-])@?{re.escape(handle)}(?![\w-])")
+
+
+class TargetProfile:
+    """Identifiers for the target person, used to match scraped pages locally"""
+
+    def __init__(
+        self,
+        name: str,
+        handles: List[str],
+        phone_digits: str,
+        company_terms: List[str],
+        phone_national: str = "",
+    ) -> None:
+        self.name = name.strip().lower()
+        self.name_tokens = [t for t in _words(name) if len(t) >= 2]
+        self.handles = sorted({h.lower().lstrip("@") for h in handles if h and len(h.lstrip("@")) >= 3})
+        self.handle_patterns = [(h, _handle_re(h)) for h in self.handles]
+        # Compare on the national part so "+91 99710 83829" matches "9971083829"
+        self.phone_digits = phone_digits[-10:] if len(phone_digits) >= 7 else ""
+        # The number without its country code; a page may quote only this
+        self.phone_national = phone_national if len(phone_national) >= 7 else self.phone_digits
+        self.company_terms = sorted(set(company_terms))
+
+    @classmethod
+    def from_person_info(cls, ground_truth: Dict[str, Any], enrichment_data: Dict[str, Any]) -> "TargetProfile":
+        usernames = enrichment_data.get("usernames_mentioned") or {}
+        handles = [str(v) for v in usernames.values() if isinstance(v, (str, int))]
+
+        company_info = enrichment_data.get("company_info") or {}
+        company_terms: List[str] = []
+        for key in ("current_company", "company", "organization"):
+            value = company_info.get(key)
+            if isinstance(value, str):
+                company_terms.extend(
+                    t for t in _words(value) if len(t) >= 3 and t not in _COMPANY_STOPWORDS
+                )
+
+        phone = str(ground_truth.get("phone", ""))
+        phone_digits = re.sub(r"\D", "", phone)
+        meta = phone_metadata(phone) if phone_digits else {}
+        phone_national = meta["data"]["local_format"] if meta.get("success") else ""
+        return cls(str(ground_truth.get("name", "")), handles, phone_digits, company_terms, phone_national)
+
+    def terms(self) -> List[str]:
+        """Every literal string worth searching for in page text"""
+        out: List[str] = []
+        if self.name:
+            out.append(self.name)
+        out.extend(self.name_tokens)
+        out.extend(self.handles)
+        out.extend(self.company_terms)
+        return out
+
+
+def _fuzzy_token_match(token: str, page_words: Set[str]) -> bool:
+    if token in page_words:
+        return True
+    if len(token) < 4:
+        return False
+    # Only compare candidates that could plausibly be spelling variants
+    for word in page_words:
+        if word[0] == token[0] and abs(len(word) - len(token)) <= 2:
+            if SequenceMatcher(None, token, word).ratio() >= 0.85:
+                return True
+    return False
+
+
+def score_page(profile: TargetProfile, text: str, url: str = "") -> Dict[str, Any]:
+    """Score how likely a scraped page is about the target, in [0, 1].
+
+    Handle or phone matches are treated as near-certain; otherwise the score
+    blends the fraction of name tokens found (allowing small spelling
+    differences) with company-term overlap.
+    """
+    haystack = f"{url}\n{text}".lower()
+    page_words = set(_words(haystack))
+
+    name_exact = bool(profile.name) and profile.name in haystack
+    if profile.name_tokens:
+        matched = sum(1 for t in profile.name_tokens if _fuzzy_token_match(t, page_words))
+        name_score = 1.0 if name_exact else matched / len(profile.name_tokens)
+    else:
+        name_score = 0.0
+
+    handle_hits = [h for h, pattern in profile.handle_patterns if pattern.search(haystack)]
+
+    phone_hit = False
+    if profile.phone_digits:
+        for candidate in _PHONE_RE.findall(text):
+            digits = re.sub(r"\D", "", candidate)
+            # Same last 10 digits, or a shorter number that is the whole national number
+            if digits[-10:] == profile.phone_digits or digits == profile.phone_national:
+                phone_hit = True
+                break
+
+    company_hits = [t for t in profile.company_terms if t in page_words]
+    company_score = len(company_hits) / len(profile.company_terms) if profile.company_terms else 0.0
+
+    score = 0.7 * name_score + 0.3 * company_score
+    if handle_hits or phone_hit:
+        score = max(score, 0.9)
+
+    return {
+        "score": round(min(score, 1.0), 3),
+        "signals": {
+            "name": round(name_score, 3),
+            "handles": handle_hits,
+            "phone": phone_hit,
+            "company_terms": company_hits,
+        },
+    }
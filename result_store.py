@@ -0,0 +1,187 @@
+"""
+SQLite store of enrichment runs, indexed by normalised phone and name.
+
+Every run keeps its final summary, run metadata and each source it used
+(tool output plus when it was fetched). The orchestrator consults the store
+before calling a provider and reuses any source still within its TTL, so a
+contact that is worked repeatedly only re-fetches what has gone stale.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "osint_results.db")
+
+DAY = 24 * 3600
+# How long a fetched source stays reusable, by provider
+SOURCE_TTL_SECONDS: Dict[str, float] = {
+    "numverify": 90 * DAY,  # carrier/country rarely change
+    "linkedin": 30 * DAY,
+    "twitter": 7 * DAY,
+    "firecrawl": 7 * DAY,
+    "serpapi": 3 * DAY,  # rankings drift quickly
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    phone_norm TEXT NOT NULL,
+    name_norm TEXT NOT NULL,
+    context_info TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    verification_status TEXT,
+    confidence_score REAL,
+    error TEXT,
+    final_summary TEXT,
+    metadata TEXT,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_phone ON runs (phone_norm, finished_at);
+CREATE INDEX IF NOT EXISTS idx_runs_name ON runs (name_norm, finished_at);
+
+CREATE TABLE IF NOT EXISTS sources (
+    phone_norm TEXT NOT NULL,
+    name_norm TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    request_key TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    run_id INTEGER,
+    result TEXT NOT NULL,
+    PRIMARY KEY (phone_norm, name_norm, provider, request_key)
+);
+"""
+
+
+def normalize_phone(phone: str) -> str:
+    return re.sub(r"\D", "", phone or "")
+
+
+def normalize_name(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    ascii_name = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[a-z0-9]+", ascii_name.casefold()))
+
+
+class EnrichmentResultStore:
+    """Runs and reusable sources for each contact"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, ttls: Optional[Dict[str, float]] = None) -> None:
+        self.db_path = db_path
+        self.ttls = {**SOURCE_TTL_SECONDS, **(ttls or {})}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def is_fresh(self, provider: str, fetched_at: float, now: Optional[float] = None) -> bool:
+        ttl = self.ttls.get(provider, 0)
+        return (now or time.time()) - fetched_at < ttl
+
+    def fresh_source(self, phone: str, name: str, provider: str, request_key: str) -> Optional[Dict[str, Any]]:
+        """Stored result for this call if it is still within its TTL"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, result FROM sources WHERE phone_norm = ? AND name_norm = ? AND provider = ? AND request_key = ?",
+                (normalize_phone(phone), normalize_name(name), provider, request_key),
+            ).fetchone()
+        if row is None or not self.is_fresh(provider, row["fetched_at"]):
+            return None
+        return {"fetched_at": row["fetched_at"], "result": json.loads(row["result"])}
+
+    def latest_run(self, phone: str, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM runs WHERE phone_norm = ? AND name_norm = ? ORDER BY finished_at DESC LIMIT 1",
+                (normalize_phone(phone), normalize_name(name)),
+            ).fetchone()
+        return self._run_row(row) if row else None
+
+    def reusable_run(self, phone: str, name: str, context_info: str) -> Optional[Dict[str, Any]]:
+        """Latest successful run for the same input whose sources are all still fresh"""
+        run = self.latest_run(phone, name)
+        if run is None or run["error"] or run["context_info"] != context_info or not run["final_summary"]:
+            return None
+        sources = run["result"].get("sources", {})
+        now = time.time()
+        if not sources or not all(self.is_fresh(s["provider"], s["fetched_at"], now) for s in sources.values()):
+            return None
+        return run
+
+    def find_runs(self, phone: Optional[str] = None, name: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Recent runs matching a phone and/or name, newest first"""
+        clauses, params = [], []
+        if phone:
+            clauses.append("phone_norm = ?")
+            params.append(normalize_phone(phone))
+        if name:
+            clauses.append("name_norm = ?")
+            params.append(normalize_name(name))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM runs {where} ORDER BY finished_at DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [self._run_row(r) for r in rows]
+
+    def save_run(self, person_info: Dict[str, Any], started_at: float) -> int:
+        """Persist a finished run and upsert every successful source it fetched"""
+        ground_truth = person_info["ground_truth"]
+        phone_norm = normalize_phone(ground_truth["phone"])
+        name_norm = normalize_name(ground_truth["name"])
+        final_summary = person_info.get("final_summary") or {}
+        metadata = {
+            "usage": person_info.get("usage", {}),
+            "timings": person_info.get("timings", []),
+            "reused_sources": sorted(k for k, s in person_info.get("sources", {}).items() if s.get("reused")),
+        }
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO runs (phone_norm, name_norm, context_info, started_at, finished_at, verification_status,"
+                " confidence_score, error, final_summary, metadata, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    phone_norm, name_norm, ground_truth.get("context_info", ""), started_at, time.time(),
+                    final_summary.get("verification_status"), final_summary.get("confidence_score"),
+                    person_info.get("error"), json.dumps(final_summary, ensure_ascii=False),
+                    json.dumps(metadata, ensure_ascii=False), json.dumps(person_info, ensure_ascii=False, default=str),
+                ),
+            )
+            run_id = cur.lastrowid
+            for output_key, source in person_info.get("sources", {}).items():
+                result = person_info["tool_outputs"].get(output_key)
+                if source.get("reused") or not (result and result.get("success")):
+                    continue
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sources (phone_norm, name_norm, provider, request_key, fetched_at, run_id, result)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (phone_norm, name_norm, source["provider"], source["request_key"], source["fetched_at"],
+                     run_id, json.dumps(result, ensure_ascii=False, default=str)),
+                )
+            self._conn.commit()
+        return run_id
+
+    @staticmethod
+    def _run_row(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "context_info": row["context_info"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "verification_status": row["verification_status"],
+            "confidence_score": row["confidence_score"],
+            "error": row["error"],
+            "final_summary": json.loads(row["final_summary"]) if row["final_summary"] else {},
+            "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
+            "result": json.loads(row["result"]),
+        }
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Tests for the chat API (api.py) without Gemini, Redis or the repo's chats/
+
+Run with pytest, or directly: python test_chat_api.py
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import types
+import uuid
+
+# api.py reads these at import time; point storage at a scratch directory
+_TMP = tempfile.mkdtemp(prefix="convosphere-test-")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+os.environ.setdefault("CHAT_STORE", "json")
+os.environ.setdefault("CHAT_DIR", os.path.join(_TMP, "chats"))
+os.environ.setdefault("CHAT_INDEX_PATH", os.path.join(_TMP, "chat_index.db"))
+
+import httpx
+from fastapi import HTTPException
+
+import api
+from chat_cache import ChatCache
+from chat_turns import ChatTurnQueue
+from chat_schema import GEMINI, IN, OUT, TELEGRAM, message, new_chat
+from chat_store import append_messages
+
+
+async def with_uncached_api(test) -> None:
+    """Run `test` with the API's cache off, so every update_chat loads and version-checks its save"""
+    cache = ChatCache(api.chat_store, capacity=0)
+    saved, api.chat_cache = api.chat_cache, cache
+    try:
+        await test()
+    finally:
+        api.chat_cache = saved
+
+
+def save_elsewhere(chat_id: str, text: str) -> None:
+    """What another worker process does: load, append and save straight to the store"""
+    store = api.chat_store.store
+    other = store.load(chat_id)
+    append_messages(other, message(TELEGRAM, IN, text))
+    store.save(chat_id, other, expected_version=other["version"])
+
+
+def test_update_chat_retries_after_conflicting_save():
+    """A save beaten by another writer is redone on a fresh copy, keeping both writes"""
+    chat_id = f"retry_{uuid.uuid4().hex}"
+    calls = []
+
+    def mutate(chat):
+        calls.append(chat_id)
+        if len(calls) == 1:
+            save_elsewhere(chat_id, "from another worker")
+        return append_messages(chat, message(GEMINI, OUT, "mine"))
+
+    async def test():
+        await api.chat_cache.create(chat_id, new_chat({}))
+        chat, appended = await api.update_chat(chat_id, mutate)
+        stored = await api.chat_store.load(chat_id)
+        assert len(calls) == 2
+        assert [m["text"] for m in stored["messages"]] == ["from another worker", "mine"]
+        assert appended[0]["seq"] == 2
+
+    asyncio.run(with_uncached_api(test))
+
+
+def test_update_chat_gives_up_with_409():
+    """A chat that changes under every attempt ends in 409 after SAVE_ATTEMPTS tries"""
+    chat_id = f"busy_{uuid.uuid4().hex}"
+
+    def mutate(chat):
+        save_elsewhere(chat_id, "again")
+        return append_messages(chat, message(GEMINI, OUT, "never saved"))
+
+    async def test():
+        await api.chat_cache.create(chat_id, new_chat({}))
+        try:
+            await api.update_chat(chat_id, mutate)
+        except HTTPException as e:
+            assert e.status_code == 409
+        else:
+            raise AssertionError("update_chat saved over a newer version")
+        stored = await api.chat_store.load(chat_id)
+        assert [m["text"] for m in stored["messages"]] == ["again"] * api.SAVE_ATTEMPTS
+
+    asyncio.run(with_uncached_api(test))
+
+
+class BlockingGemini:
+    """Stands in for the genai client; replies wait until `release` is set"""
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.models = self
+
+    def generate_content(self, model, contents, config=None):
+        self.release.wait(5)
+        return types.SimpleNamespace(text=f"reply to {contents[-1]['parts'][0]}")
+
+
+async def with_turn_queue(test, workers: int, max_queued: int) -> None:
+    """Run `test(http)` against the app with a fake Gemini and a small turn queue of its own"""
+    gemini = BlockingGemini()
+    saved = api.client, api.turn_queue
+    api.client = gemini
+    api.turn_queue = ChatTurnQueue(api.process_turn, workers=workers, max_queued=max_queued)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://test") as http:
+            await test(http, gemini)
+    finally:
+        gemini.release.set()
+        await api.turn_queue.close()
+        api.client, api.turn_queue = saved
+
+
+def test_gemini_turns_are_queued_and_polled():
+    """send answers 202 with a turn id; the turn endpoint returns the recorded reply once done"""
+    async def test(http, gemini):
+        chat_id = (await http.post("/api/chats", json={"client_name": "queued"})).json()["id"]
+        sent = await http.post("/api/gemini/send", json={"chat_id": chat_id, "text": "hello"})
+        assert sent.status_code == 202
+        assert sent.json()["status"] in ("queued", "running")
+        gemini.release.set()
+        turn = (await http.get(f"/api/gemini/turns/{sent.json()['turn_id']}", params={"wait": 5})).json()
+        assert turn["status"] == "done"
+        assert turn["reply"] == "reply to hello"
+        assert [m["text"] for m in turn["messages"]] == ["hello", "reply to hello"]
+        assert (await http.get("/api/gemini/turns/unknown")).status_code == 404
+        missing = await http.post("/api/gemini/send", json={"chat_id": "no_such_chat", "text": "hi"})
+        assert missing.status_code == 404
+
+    asyncio.run(with_turn_queue(test, workers=1, max_queued=4))
+
+
+def test_full_turn_queue_answers_429_then_503_on_shutdown():
+    """A burst past the queue is refused with 429 and Retry-After; a closed queue answers 503"""
+    async def test(http, gemini):
+        chat_id = (await http.post("/api/chats", json={"client_name": "burst"})).json()["id"]
+        responses = []
+        for i in range(5):
+            responses.append(await http.post("/api/gemini/send", json={"chat_id": chat_id, "text": f"p{i}"}))
+            await asyncio.sleep(0.01)
+        # One running on the single worker, two waiting, the rest turned away
+        assert [r.status_code for r in responses] == [202, 202, 202, 429, 429]
+        assert int(responses[-1].headers["Retry-After"]) >= 1
+        streamed = await http.post("/api/gemini/stream", json={"chat_id": chat_id, "text": "s"})
+        assert streamed.status_code == 429
+
+        gemini.release.set()
+        await api.turn_queue.close()
+        closed = await http.post("/api/gemini/send", json={"chat_id": chat_id, "text": "late"})
+        assert closed.status_code == 503
+        assert "Retry-After" in closed.headers
+
+    asyncio.run(with_turn_queue(test, workers=1, max_queued=2))
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the write-back chat cache in chat_cache.py
+
+Run with pytest, or directly: python test_chat_cache.py
+"""
+import asyncio
+import tempfile
+from pathlib import Path
+
+from chat_cache import ChatCache
+from chat_schema import GEMINI, IN, OUT, TELEGRAM, message, new_chat
+from chat_store import AsyncChatStore, JsonChatStore, append_messages
+
+FLUSH_DELAY = 0.05
+
+
+class CountingStore(JsonChatStore):
+    """JSON store that counts loads and saves"""
+
+    def __init__(self, chat_dir: Path) -> None:
+        super().__init__(chat_dir)
+        self.loads = 0
+        self.saves = 0
+
+    def load(self, chat_id):
+        self.loads += 1
+        return super().load(chat_id)
+
+    def save(self, chat_id, data, expected_version=None):
+        self.saves += 1
+        super().save(chat_id, data, expected_version)
+
+
+def run_with_cache(test, capacity: int = 8) -> None:
+    """Run `test(cache, store)` against a fresh store in a scratch directory"""
+    async def main():
+        with tempfile.TemporaryDirectory() as tmp:
+            store = CountingStore(Path(tmp))
+            cache = ChatCache(AsyncChatStore(store), capacity=capacity, flush_delay=FLUSH_DELAY)
+            try:
+                await test(cache, store)
+            finally:
+                await cache.close()
+
+    asyncio.run(main())
+
+
+def test_writes_are_debounced_into_one_save():
+    """Many puts within flush_delay reach the store as a single save"""
+    async def test(cache, store):
+        await cache.create("c1", new_chat({}))
+        saves_before = store.saves
+        for i in range(10):
+            chat = await cache.get("c1")
+            append_messages(chat, message(TELEGRAM, IN, f"m{i}"))
+            await cache.put("c1", chat)
+        assert store.saves == saves_before
+        await asyncio.sleep(FLUSH_DELAY * 4)
+        assert store.saves == saves_before + 1
+        assert len(store.load("c1")["messages"]) == 10
+
+    run_with_cache(test)
+
+
+def test_hot_chat_is_served_from_memory():
+    """Repeated and concurrent gets of an uncached chat load it from storage once"""
+    async def test(cache, store):
+        chat = new_chat({})
+        store.save("c1", chat, expected_version=0)
+        chats = await asyncio.gather(*(cache.get("c1") for _ in range(20)))
+        await cache.get("c1")
+        assert store.loads == 1
+        assert all(c is chats[0] for c in chats)
+        assert await cache.get("missing") is None
+
+    run_with_cache(test)
+
+
+def test_conflicting_save_rebases_unsaved_messages():
+    """If another process saved first, the cached chat's unsaved messages are re-applied on top"""
+    async def test(cache, store):
+        await cache.create("c1", new_chat({}))
+        chat = await cache.get("c1")
+        append_messages(chat, message(GEMINI, OUT, "q"), message(GEMINI, IN, "a"))
+        await cache.put("c1", chat)
+
+        other = store.load("c1")
+        append_messages(other, message(TELEGRAM, IN, "from another process"))
+        store.save("c1", other, expected_version=other["version"])
+
+        await cache.flush()  # conflicts and rebases
+        await cache.flush()  # saves the rebased chat
+        stored = store.load("c1")
+        assert cache.stats["rebased"] == 1
+        assert [m["text"] for m in stored["messages"]] == ["from another process", "q", "a"]
+        assert [m["seq"] for m in stored["messages"]] == [1, 2, 3]
+        assert (await cache.get("c1"))["messages"] == stored["messages"]
+
+    run_with_cache(test)
+
+
+def test_dirty_chats_are_not_evicted():
+    """Over capacity, only chats with nothing left to save are dropped"""
+    async def test(cache, store):
+        for chat_id in ("a", "b"):
+            await cache.create(chat_id, new_chat({}))
+        chat = await cache.get("a")
+        append_messages(chat, message(TELEGRAM, IN, "unsaved"))
+        await cache.put("a", chat)
+        await cache.create("c", new_chat({}))
+        assert len(cache) == 2
+        assert cache.stats["evictions"] == 1
+        assert await cache.get("a") is chat
+
+    run_with_cache(test, capacity=2)
+
+
+def test_close_flushes_outstanding_writes():
+    """Writes still waiting for their flush are saved on shutdown"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CountingStore(Path(tmp))
+
+        async def main():
+            cache = ChatCache(AsyncChatStore(store), flush_delay=60)
+            await cache.create("c1", new_chat({}))
+            chat = await cache.get("c1")
+            append_messages(chat, message(TELEGRAM, OUT, "last words"))
+            await cache.put("c1", chat)
+            await cache.close()
+
+        asyncio.run(main())
+        assert [m["text"] for m in JsonChatStore(Path(tmp)).load("c1")["messages"]] == ["last words"]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Tests for the chat storage backends in chat_store.py
+
+Run with pytest, or directly: python test_chat_store.py
+"""
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from chat_schema import GEMINI, IN, OUT, TELEGRAM, message, new_chat
+from chat_store import ChatVersionConflict, JsonChatStore, JsonlChatStore, SqliteChatStore, append_messages
+
+
+def make_chat(count: int) -> dict:
+    """A schema 2 chat holding `count` alternating Telegram messages"""
+    chat = new_chat({"client_name": "Ann", "client_phone": "+91 99710 83829"})
+    for i in range(count):
+        append_messages(chat, message(TELEGRAM, IN if i % 2 else OUT, f"message {i}", ts=1000.0 + i))
+    return chat
+
+
+def test_sqlite_round_trip():
+    """A saved chat's metadata and messages load back unchanged, with the version the save assigned"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SqliteChatStore(Path(tmp) / "chats.db")
+        chat = make_chat(5)
+        store.save("c1", chat)
+        loaded = store.load("c1")
+        store.close()
+    assert loaded["metadata"] == chat["metadata"]
+    assert loaded["messages"] == chat["messages"]
+    assert loaded["schema"] == 2
+    assert loaded["version"] == chat["version"] == 1
+
+
+def test_sqlite_save_inserts_only_appended_messages():
+    """Growing a chat inserts its new tail; existing rows are left alone"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "chats.db"
+        store = SqliteChatStore(db_path)
+        chat = make_chat(3)
+        store.save("c1", chat)
+        with sqlite3.connect(db_path) as conn:
+            first_rowids = [r[0] for r in conn.execute("SELECT rowid FROM messages ORDER BY seq")]
+
+        append_messages(chat, message(GEMINI, OUT, "q"), message(GEMINI, IN, "a"))
+        store.save("c1", chat)
+        with sqlite3.connect(db_path) as conn:
+            rowids = [r[0] for r in conn.execute("SELECT rowid FROM messages ORDER BY seq")]
+        loaded = store.load("c1")
+        store.close()
+    assert rowids[:3] == first_rowids
+    assert len(rowids) == 5
+    assert [m["text"] for m in loaded["messages"]][-2:] == ["q", "a"]
+
+
+def test_sqlite_shrunk_history_is_rewritten():
+    """A message list that got shorter replaces the stored one instead of keeping stale rows"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SqliteChatStore(Path(tmp) / "chats.db")
+        chat = make_chat(4)
+        store.save("c1", chat)
+        chat["messages"] = chat["messages"][:2]
+        store.save("c1", chat)
+        loaded = store.load("c1")
+        store.close()
+    assert [m["seq"] for m in loaded["messages"]] == [1, 2]
+
+
+def test_jsonl_drops_torn_final_line():
+    """A crash mid-append leaves a partial line: it is ignored on load and cut off before the next append"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JsonlChatStore(Path(tmp), fsync=False)
+        chat = make_chat(3)
+        store.save("c1", chat)
+        store.close()
+        log_path = Path(tmp) / "c1.log.jsonl"
+        with log_path.open("a", encoding="utf-8") as f:
+            f.write('{"list": "messages", "seq": 3, "item": {"te')
+
+        store = JsonlChatStore(Path(tmp), fsync=False)
+        loaded = store.load("c1")
+        assert [m["seq"] for m in loaded["messages"]] == [1, 2, 3]
+        append_messages(loaded, message(GEMINI, OUT, "after the crash"))
+        store.save("c1", loaded, expected_version=loaded["version"])
+        store.close()
+
+        reopened = JsonlChatStore(Path(tmp), fsync=False)
+        assert [m["text"] for m in reopened.load("c1")["messages"]][-1] == "after the crash"
+        reopened.close()
+        assert all(line.endswith("}") for line in log_path.read_text(encoding="utf-8").splitlines())
+
+
+def test_jsonl_background_compaction_folds_log_into_snapshot():
+    """Passing compact_after queues the chat for the compactor thread, which empties the log"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JsonlChatStore(Path(tmp), compact_after=4, fsync=False)
+        chat = make_chat(0)
+        for i in range(6):
+            append_messages(chat, message(TELEGRAM, IN, f"m{i}"))
+            store.save("c1", chat, expected_version=chat.get("version", 0))
+        # close() lets queued compactions finish before the thread stops
+        store.close()
+        assert not (Path(tmp) / "c1.log.compacting").exists()
+        assert (Path(tmp) / "c1.snapshot.json").exists()
+
+        reopened = JsonlChatStore(Path(tmp), fsync=False)
+        loaded = reopened.load("c1")
+        reopened.close()
+    assert [m["text"] for m in loaded["messages"]] == [f"m{i}" for i in range(6)]
+
+
+def test_jsonl_appends_during_compaction_survive():
+    """Records appended after the log was rotated aside land in the new log and load after the snapshot"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JsonlChatStore(Path(tmp), compact_after=10_000, fsync=False)
+        chat = make_chat(4)
+        store.save("c1", chat)
+        # An interrupted compaction: the log was rotated but never folded
+        (Path(tmp) / "c1.log.jsonl").rename(Path(tmp) / "c1.log.compacting")
+        append_messages(chat, message(GEMINI, OUT, "late"))
+        store.save("c1", chat, expected_version=chat["version"])
+        assert [m["text"] for m in store.load("c1")["messages"]][-1] == "late"
+
+        store.compact("c1")
+        loaded = store.load("c1")
+        store.close()
+    assert len(loaded["messages"]) == 5
+    assert [m["seq"] for m in loaded["messages"]] == [1, 2, 3, 4, 5]
+
+
+def open_backends(tmp: str) -> list:
+    return [
+        JsonChatStore(Path(tmp) / "json"),
+        SqliteChatStore(Path(tmp) / "chats.db"),
+        JsonlChatStore(Path(tmp) / "jsonl", fsync=False),
+    ]
+
+
+def test_stale_save_raises_version_conflict():
+    """On every backend, a save from a copy another writer has replaced is refused and writes nothing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for store in open_backends(tmp):
+            store.save("c1", make_chat(2), expected_version=0)
+            first = store.load("c1")
+            second = store.load("c1")
+
+            append_messages(first, message(TELEGRAM, IN, "first writer"))
+            store.save("c1", first, expected_version=first["version"])
+            second["messages"] = second["messages"][:1]
+            try:
+                store.save("c1", second, expected_version=second["version"])
+            except ChatVersionConflict as e:
+                assert (e.expected, e.stored) == (1, 2), store.location
+            else:
+                raise AssertionError(f"{store.location} accepted a stale save")
+
+            loaded = store.load("c1")
+            store.close()
+            assert loaded["version"] == 2, store.location
+            assert [m["text"] for m in loaded["messages"]][-1] == "first writer", store.location
+
+
+def test_creating_an_existing_chat_conflicts():
+    """expected_version=0 only succeeds for a chat id that is not taken yet"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for store in open_backends(tmp):
+            store.save("c1", make_chat(1), expected_version=0)
+            try:
+                store.save("c1", make_chat(0), expected_version=0)
+            except ChatVersionConflict:
+                pass
+            else:
+                raise AssertionError(f"{store.location} overwrote an existing chat")
+            finally:
+                store.close()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
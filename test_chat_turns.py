@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded Gemini turn queue in chat_turns.py
+
+Run with pytest, or directly: python test_chat_turns.py
+"""
+import asyncio
+
+import chat_turns
+from chat_turns import DONE, ERROR, QUEUED, ChatTurnQueue, TurnQueueFull
+
+
+class Gate:
+    """Turn handler that blocks until released and records how many turns ran at once"""
+
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, turn):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await self.release.wait()
+            return {"reply": f"re: {turn.prompt}"}
+        finally:
+            self.running -= 1
+
+
+def test_workers_bound_concurrent_turns():
+    """No more than `workers` turns run at once, and every accepted turn completes"""
+    async def main():
+        gate = Gate()
+        queue = ChatTurnQueue(gate, workers=2, max_queued=10)
+        turns = [queue.submit("c1", f"p{i}") for i in range(6)]
+        await asyncio.sleep(0.01)
+        assert gate.running == 2
+        assert [queue.position(t) for t in turns] == [0, 0, 1, 2, 3, 4]
+        gate.release.set()
+        await asyncio.gather(*(t.finished.wait() for t in turns))
+        assert gate.peak == 2
+        assert all(t.status == DONE for t in turns)
+        assert turns[3].snapshot()["reply"] == "re: p3"
+        await queue.close()
+
+    asyncio.run(main())
+
+
+def test_full_queue_rejects_with_retry_after():
+    """Past max_queued, submit raises TurnQueueFull with a wait estimate in whole seconds"""
+    async def main():
+        gate = Gate()
+        queue = ChatTurnQueue(gate, workers=1, max_queued=2)
+        queue.submit("c1", "running")
+        await asyncio.sleep(0.01)
+        queue.submit("c1", "waiting 1")
+        queue.submit("c1", "waiting 2")
+        try:
+            queue.submit("c1", "one too many")
+        except TurnQueueFull as e:
+            assert not e.closed
+            # Two queued and one running, at the initial estimate per turn, on one worker
+            assert e.retry_after == round(3 * chat_turns.INITIAL_TURN_SECONDS)
+        else:
+            raise AssertionError("a full queue accepted another turn")
+        assert queue.stats["rejected"] == 1
+        gate.release.set()
+        await queue.close()
+
+    asyncio.run(main())
+
+
+def test_failed_turn_keeps_error_status():
+    """A handler error fails only that turn, with the exception's status_code and detail"""
+    class Unavailable(Exception):
+        status_code = 404
+        detail = "Chat not found"
+
+    async def handler(turn):
+        if turn.prompt == "bad":
+            raise Unavailable()
+        return {"reply": "fine"}
+
+    async def main():
+        queue = ChatTurnQueue(handler, workers=1)
+        bad, good = queue.submit("c1", "bad", stream=True), queue.submit("c1", "good")
+        await asyncio.gather(bad.finished.wait(), good.finished.wait())
+        assert (bad.status, bad.error, bad.error_status) == (ERROR, "Chat not found", 404)
+        assert bad.events.get_nowait() == ("error", {"detail": "Chat not found"})
+        assert good.status == DONE
+        assert queue.stats == {"submitted": 2, "rejected": 0, "done": 1, "failed": 1}
+        await queue.close()
+
+    asyncio.run(main())
+
+
+def test_streaming_turn_relays_events():
+    """Events emitted by the handler reach a streaming turn, followed by `done` with the result"""
+    async def handler(turn):
+        turn.emit("token", {"text": "a"})
+        turn.emit("token", {"text": "b"})
+        return {"reply": "ab"}
+
+    async def main():
+        queue = ChatTurnQueue(handler, workers=1)
+        turn = queue.submit("c1", "p", stream=True)
+        events = [await turn.events.get() for _ in range(3)]
+        assert events == [("token", {"text": "a"}), ("token", {"text": "b"}), ("done", {"reply": "ab"})]
+        await queue.close()
+
+    asyncio.run(main())
+
+
+def test_close_fails_undrained_turns_and_refuses_new_ones():
+    """Turns that do not finish within DRAIN_SECONDS fail with 503; later submits are refused as closed"""
+    async def main():
+        gate = Gate()
+        queue = ChatTurnQueue(gate, workers=1, max_queued=4)
+        running = queue.submit("c1", "running")
+        await asyncio.sleep(0.01)
+        waiting = queue.submit("c1", "waiting")
+        assert waiting.status == QUEUED
+
+        drain, chat_turns.DRAIN_SECONDS = chat_turns.DRAIN_SECONDS, 0.05
+        try:
+            await queue.close()
+        finally:
+            chat_turns.DRAIN_SECONDS = drain
+        for turn in (running, waiting):
+            assert (turn.status, turn.error_status) == (ERROR, 503)
+            assert turn.finished.is_set()
+        try:
+            queue.submit("c1", "late")
+        except TurnQueueFull as e:
+            assert e.closed
+        else:
+            raise AssertionError("a closed queue accepted a turn")
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -1,12 +1,14 @@
 import os
 import sys
 import json
-import subprocess
 import asyncio
-import requests
+import time
 from typing import Dict, List, Optional, Any
 from dotenv import load_dotenv
 
+from cassette import Cassette
+from circuit_breaker import DEFAULT_BREAKERS, CircuitBreakerRegistry, is_provider_failure
+
 load_dotenv()
 
 class ToolWrappers:
@@ -14,36 +16,89 @@ class ToolWrappers:
     
     def __init__(self):
         self.base_path = os.path.dirname(os.path.abspath(__file__))
+        # Records or replays every provider response when set
+        self.cassette: Optional[Cassette] = None
+        # Process-wide by default so every enrichment shares what is known about provider health
+        self.breakers: CircuitBreakerRegistry = DEFAULT_BREAKERS
+    
+    # Providers backed by a standalone fetcher script: (script, log label)
+    PROVIDER_SCRIPTS = {
+        "numverify": ("numverify_fetcher.py", "Numverify"),
+        "twitter": ("twitter_info_fetcher.py", "Twitter fetch"),
+        "serpapi": ("serpapi_tester.py", "SerpAPI"),
+        "firecrawl": ("firecrawler_linkcrawler.py", "Firecrawl"),
+    }
     
     async def run_numverify(self, phone: str) -> Dict[str, Any]:
         """Run numverify phone validation"""
-        try:
-            print(f"🔍 Running numverify for phone: {phone}")
-            cmd = [sys.executable, os.path.join(self.base_path, "numverify_fetcher.py"), phone]
-            result = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await result.communicate()
-            
-            if result.returncode == 0:
-                data = json.loads(stdout.decode())
-                print(f"✅ Numverify completed successfully")
-                return {"success": True, "data": data}
-            else:
-                print(f"❌ Numverify failed: {stderr.decode()}")
-                return {"success": False, "error": stderr.decode()}
-        except Exception as e:
-            print(f"❌ Numverify exception: {str(e)}")
-            return {"success": False, "error": str(e)}
+        print(f"🔍 Running numverify for phone: {phone}")
+        return await self._dispatch("numverify", [phone])
     
     async def run_twitter_get(self, username: str) -> Dict[str, Any]:
         """Get Twitter user info by username"""
+        print(f"🐦 Running Twitter fetch for username: {username}")
+        username = username.lstrip('@')  # Remove @ if present
+        return await self._dispatch("twitter", ["get", username])
+    
+    async def run_linkedin_fetch(self, linkedin_urls: List[str]) -> Dict[str, Any]:
+        """Fetch LinkedIn profile info"""
+        print(f"💼 Running LinkedIn fetch for {len(linkedin_urls)} URLs")
+        return await self._dispatch("linkedin", linkedin_urls)
+    
+    async def run_serpapi(self, query: str) -> Dict[str, Any]:
+        """Run SerpAPI Google search"""
+        print(f"🔍 Running SerpAPI search: {query}")
+        return await self._dispatch("serpapi", [query])
+    
+    async def run_firecrawl(self, url: str) -> Dict[str, Any]:
+        """Scrape URL with Firecrawl"""
+        print(f"🔥 Running Firecrawl for URL: {url}")
+        return await self._dispatch("firecrawl", [url])
+    
+    async def _dispatch(self, provider: str, args: List[str]) -> Dict[str, Any]:
+        """Serve a provider request from the cassette in replay mode, else call the transport (recording if enabled)"""
+        request = {"args": list(args)}
+        if self.cassette is not None and self.cassette.replaying:
+            return await self.cassette.replay("tool", provider, request)
+        breaker = self.breakers.get(provider)
+        permit = breaker.allow()
+        if permit is None:
+            print(f"⚡ {provider} circuit open - skipping call")
+            return self.circuit_open_result(provider)
+        started = time.perf_counter()
         try:
-            print(f"🐦 Running Twitter fetch for username: {username}")
-            username = username.lstrip('@')  # Remove @ if present
-            cmd = [sys.executable, os.path.join(self.base_path, "twitter_info_fetcher.py"), "get", username]
+            result = await self._call_provider(provider, args)
+        except BaseException:
+            breaker.release(permit)
+            raise
+        breaker.record(permit, not is_provider_failure(result), time.perf_counter() - started)
+        if self.cassette is not None:
+            self.cassette.record("tool", provider, request, result, started, time.perf_counter() - started)
+        return result
+    
+    def provider_available(self, provider: str) -> bool:
+        """False while the provider's circuit is open, so callers can skip before spending budget"""
+        return not self.breakers.get(provider).is_open()
+    
+    @staticmethod
+    def circuit_open_result(provider: str) -> Dict[str, Any]:
+        return {"success": False, "error": f"Skipped: {provider} circuit open", "skipped": "circuit_open"}
+    
+    async def _call_provider(self, provider: str, args: List[str]) -> Dict[str, Any]:
+        """Transport for a single provider request.
+        
+        Every run_* method funnels through here, so an alternative transport
+        (e.g. the offline simulator) only needs to override this method.
+        """
+        if provider == "linkedin":
+            return await self._fetch_linkedin(args)
+        return await self._run_script(provider, args)
+    
+    async def _run_script(self, provider: str, args: List[str]) -> Dict[str, Any]:
+        """Run a provider's fetcher script and parse its JSON stdout"""
+        script, label = self.PROVIDER_SCRIPTS[provider]
+        try:
+            cmd = [sys.executable, os.path.join(self.base_path, script), *args]
             result = await asyncio.create_subprocess_exec(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
@@ -53,20 +108,18 @@ class ToolWrappers:
             
             if result.returncode == 0:
                 data = json.loads(stdout.decode())
-                print(f"✅ Twitter fetch completed successfully")
+                print(f"✅ {label} completed successfully")
                 return {"success": True, "data": data}
             else:
-                print(f"❌ Twitter fetch failed: {stderr.decode()}")
+                print(f"❌ {label} failed: {stderr.decode()}")
                 return {"success": False, "error": stderr.decode()}
         except Exception as e:
-            print(f"❌ Twitter fetch exception: {str(e)}")
+            print(f"❌ {label} exception: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    async def run_linkedin_fetch(self, linkedin_urls: List[str]) -> Dict[str, Any]:
-        """Fetch LinkedIn profile info"""
+    async def _fetch_linkedin(self, linkedin_urls: List[str]) -> Dict[str, Any]:
+        """Collect LinkedIn profiles through the BrightData dataset API"""
         try:
-            print(f"💼 Running LinkedIn fetch for {len(linkedin_urls)} URLs")
-            
             # Import and use the LinkedIn fetcher
             from linkedin_info_fetcher import LinkedInProfileInfo
             
@@ -95,52 +148,6 @@ class ToolWrappers:
             print(f"❌ LinkedIn fetch exception: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    async def run_serpapi(self, query: str) -> Dict[str, Any]:
-        """Run SerpAPI Google search"""
-        try:
-            print(f"🔍 Running SerpAPI search: {query}")
-            cmd = [sys.executable, os.path.join(self.base_path, "serpapi_tester.py"), query]
-            result = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await result.communicate()
-            
-            if result.returncode == 0:
-                data = json.loads(stdout.decode())
-                print(f"✅ SerpAPI completed successfully")
-                return {"success": True, "data": data}
-            else:
-                print(f"❌ SerpAPI failed: {stderr.decode()}")
-                return {"success": False, "error": stderr.decode()}
-        except Exception as e:
-            print(f"❌ SerpAPI exception: {str(e)}")
-            return {"success": False, "error": str(e)}
-    
-    async def run_firecrawl(self, url: str) -> Dict[str, Any]:
-        """Scrape URL with Firecrawl"""
-        try:
-            print(f"🔥 Running Firecrawl for URL: {url}")
-            cmd = [sys.executable, os.path.join(self.base_path, "firecrawler_linkcrawler.py"), url]
-            result = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await result.communicate()
-            
-            if result.returncode == 0:
-                data = json.loads(stdout.decode())
-                print(f"✅ Firecrawl completed successfully")
-                return {"success": True, "data": data}
-            else:
-                print(f"❌ Firecrawl failed: {stderr.decode()}")
-                return {"success": False, "error": stderr.decode()}
-        except Exception as e:
-            print(f"❌ Firecrawl exception: {str(e)}")
-            return {"success": False, "error": str(e)}
-    
     def extract_links_from_text(self, text: str) -> List[str]:
         """Extract URLs from text using regex"""
         import re
@@ -0,0 +1,120 @@
+from typing import Any, Dict, Optional
+
+
+# Providers that bill per request; Gemini is accounted separately by tokens
+PAID_PROVIDERS = ("numverify", "twitter", "linkedin", "serpapi", "firecrawl")
+
+
+def _check_provider(provider: str) -> None:
+    if provider not in PAID_PROVIDERS:
+        raise ValueError(f"Unknown paid provider {provider!r}; expected one of {', '.join(PAID_PROVIDERS)}")
+
+
+class RunBudget:
+    """Spend limits for a single enrichment run. `None` means unlimited."""
+
+    def __init__(
+        self,
+        max_total_tokens: Optional[int] = None,
+        max_paid_calls: Optional[int] = None,
+        max_provider_calls: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.max_total_tokens = max_total_tokens
+        self.max_paid_calls = max_paid_calls
+        # e.g. {"firecrawl": 8} caps the number of pages scraped per run
+        self.max_provider_calls = dict(max_provider_calls or {})
+        # A misspelt provider would otherwise leave its calls uncapped
+        for provider in self.max_provider_calls:
+            _check_provider(provider)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "max_total_tokens": self.max_total_tokens,
+            "max_paid_calls": self.max_paid_calls,
+            "max_provider_calls": self.max_provider_calls,
+        }
+
+
+class UsageTracker:
+    """Per-run counters for Gemini tokens and paid provider calls.
+
+    Provider calls are reserved before they are made (`reserve_call`), so a
+    budget holds even when many calls are scheduled concurrently. Token usage
+    is only known after a response arrives, so the token budget is checked
+    before new Gemini work is scheduled and an in-flight batch may overshoot.
+    """
+
+    def __init__(self, budget: Optional[RunBudget] = None) -> None:
+        self.budget = budget or RunBudget()
+        self.gemini: Dict[str, Dict[str, int]] = {}
+        self.provider_calls: Dict[str, int] = {}
+        self.skipped_by_budget: Dict[str, int] = {}
+        self.skipped_by_circuit: Dict[str, int] = {}
+
+    def record_gemini(self, method: str, response: Any) -> None:
+        """Record token counts from a google-genai response's usage_metadata"""
+        usage = getattr(response, "usage_metadata", None)
+        stats = self.gemini.setdefault(
+            method, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "response_tokens": 0, "thought_tokens": 0}
+        )
+        stats["calls"] += 1
+        if usage is None:
+            return
+        stats["prompt_tokens"] += getattr(usage, "prompt_token_count", None) or 0
+        # Cached tokens are a (cheaper) subset of prompt_tokens, tracked for visibility
+        stats["cached_tokens"] += getattr(usage, "cached_content_token_count", None) or 0
+        stats["response_tokens"] += getattr(usage, "candidates_token_count", None) or 0
+        stats["thought_tokens"] += getattr(usage, "thoughts_token_count", None) or 0
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(
+            s["prompt_tokens"] + s["response_tokens"] + s["thought_tokens"]
+            for s in self.gemini.values()
+        )
+
+    @property
+    def total_paid_calls(self) -> int:
+        return sum(self.provider_calls.values())
+
+    def tokens_available(self) -> bool:
+        limit = self.budget.max_total_tokens
+        return limit is None or self.total_tokens < limit
+
+    def reserve_call(self, provider: str) -> bool:
+        """Count a paid call up front; returns False if the budget forbids it"""
+        _check_provider(provider)
+        provider_limit = self.budget.max_provider_calls.get(provider)
+        over_provider = provider_limit is not None and self.provider_calls.get(provider, 0) >= provider_limit
+        over_total = self.budget.max_paid_calls is not None and self.total_paid_calls >= self.budget.max_paid_calls
+        if over_provider or over_total:
+            self.record_skip(provider)
+            return False
+        self.provider_calls[provider] = self.provider_calls.get(provider, 0) + 1
+        return True
+
+    def release_call(self, provider: str) -> None:
+        """Give back a reservation for a call that was never made"""
+        count = self.provider_calls.get(provider, 0) - 1
+        if count > 0:
+            self.provider_calls[provider] = count
+        else:
+            self.provider_calls.pop(provider, None)
+
+    def record_skip(self, stage: str) -> None:
+        self.skipped_by_budget[stage] = self.skipped_by_budget.get(stage, 0) + 1
+
+    def record_circuit_skip(self, provider: str) -> None:
+        """A call not made because the provider's circuit breaker was open"""
+        self.skipped_by_circuit[provider] = self.skipped_by_circuit.get(provider, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "gemini": self.gemini,
+            "total_tokens": self.total_tokens,
+            "provider_calls": self.provider_calls,
+            "total_paid_calls": self.total_paid_calls,
+            "skipped_by_budget": self.skipped_by_budget,
+            "skipped_by_circuit": self.skipped_by_circuit,
+            "budget": self.budget.to_dict(),
+        }